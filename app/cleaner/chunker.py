@@ -0,0 +1,57 @@
+import re
+
+
+class TextChunker:
+    def __init__(self, max_words=150, overlap_words=30):
+        """
+        Splits cleaned text into overlapping passages of whole sentences.
+        150 words stay below the 256 tokens all-MiniLM-L6-v2 reads; each passage
+        repeats up to `overlap_words` words of trailing sentences from the
+        previous one so a fact split across a boundary is still found.
+        """
+        if overlap_words >= max_words:
+            raise ValueError("overlap_words must be smaller than max_words")
+        self.max_words = max_words
+        self.overlap_words = overlap_words
+
+    def _sentences(self, text):
+        """
+        Yields (sentence, word count), cutting long sentences into pieces that
+        still fit in a passage after the overlap.
+        """
+        size = self.max_words - self.overlap_words
+        for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+            words = sentence.split()
+            for start in range(0, len(words), size):
+                piece = words[start : start + size]
+                yield " ".join(piece), len(piece)
+
+    def chunk_text(self, text):
+        """
+        Returns the passages of `text`, in order. Text that fits in one passage
+        is returned whole.
+        """
+        passages = []
+        current, count = [], 0
+        for sentence, words in self._sentences(text):
+            if current and count + words > self.max_words:
+                passages.append(" ".join(sentence for sentence, _ in current))
+                # Carry the trailing sentences that fit in the overlap
+                kept, kept_count = [], 0
+                for previous in reversed(current):
+                    if kept_count + previous[1] > self.overlap_words:
+                        break
+                    kept.insert(0, previous)
+                    kept_count += previous[1]
+                if not kept and self.overlap_words:
+                    # No whole sentence fits: carry the last words instead
+                    tail = current[-1][0].split()[-self.overlap_words :]
+                    kept, kept_count = [(" ".join(tail), len(tail))], len(tail)
+                if kept_count + words > self.max_words:
+                    kept, kept_count = [], 0  # The overlap is best effort
+                current, count = kept, kept_count
+            current.append((sentence, words))
+            count += words
+        if current:
+            passages.append(" ".join(sentence for sentence, _ in current))
+        return passages
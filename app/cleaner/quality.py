@@ -0,0 +1,114 @@
+import os
+import re
+import threading
+from collections import Counter
+
+# Frequent function words per language. Real prose is full of them; the language
+# scoring the most hits is taken as the text's language.
+STOPWORDS = {
+    "en": "the of and to in is that for it as with was on are be this by not "
+    "or from have an they which you at but can",
+    "pt": "de que o a e do da em um para com não uma os no se na por mais as "
+    "dos como mas ao ele das",
+    "es": "de la que el en y los del se las por un para con no una su al lo "
+    "como más pero sus le ya",
+    "fr": "de la le et les des en un du une que est pour qui dans par sur pas "
+    "au plus ne se ce il avec",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht "
+    "ein eine als auch es an werden",
+}
+STOPWORDS = {language: set(words.split()) for language, words in STOPWORDS.items()}
+
+# Phrases of cookie banners, paywalls and navigation chrome
+BOILERPLATE = re.compile(
+    r"\b(?:cookies? (?:policy|settings|preferences)|accept (?:all )?cookies"
+    r"|we use cookies|subscribe (?:now|today|to (?:our|the) newsletter)"
+    r"|sign (?:in|up)|log ?in|newsletter|paywall|enable javascript"
+    r"|all rights reserved|privacy policy|terms of (?:use|service)|accept all"
+    r"|create (?:a free|an) account|members only|continue reading)\b",
+    re.IGNORECASE,
+)
+WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+class QualityGate:
+    def __init__(
+        self,
+        min_words=None,
+        languages=None,
+        min_stopword_ratio=0.08,
+        max_boilerplate_ratio=0.5,
+        min_alpha_ratio=0.6,
+        min_unique_ratio=0.1,
+    ):
+        """
+        Cheap checks run on cleaned text before any model sees it: length,
+        language, boilerplate and gibberish. Rejections are counted by reason in
+        `rejections`.
+        """
+        self.min_words = (
+            int(os.getenv("QUALITY_MIN_WORDS", 50)) if min_words is None else min_words
+        )
+        self.languages = set(
+            languages or os.getenv("QUALITY_LANGUAGES", "en").split(",")
+        )
+        self.min_stopword_ratio = min_stopword_ratio
+        self.max_boilerplate_ratio = max_boilerplate_ratio
+        self.min_alpha_ratio = min_alpha_ratio
+        self.min_unique_ratio = min_unique_ratio
+        self.rejections = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def detect_language(words):
+        """
+        Returns the language whose stopwords make up most of `words` (lowercase),
+        and that share, or (None, 0.0) when none match.
+        """
+        if not words:
+            return None, 0.0
+        hits = {
+            language: sum(word in stopwords for word in words)
+            for language, stopwords in STOPWORDS.items()
+        }
+        language = max(hits, key=hits.get)
+        if not hits[language]:
+            return None, 0.0
+        return language, hits[language] / len(words)
+
+    def rejection_reason(self, text):
+        """
+        Returns why `text` should not be ingested, or None if it passes.
+        """
+        if not text or not text.strip():
+            return "empty"
+        tokens = text.split()
+        if len(tokens) < self.min_words:
+            return "too_short"
+        characters = "".join(tokens)
+        alpha_ratio = sum(c.isalpha() for c in characters) / len(characters)
+        if alpha_ratio < self.min_alpha_ratio:
+            return "gibberish"  # Markup, code or encoding residue
+        words = [word.casefold() for word in WORD.findall(text)]
+        if len(set(words)) / max(len(words), 1) < self.min_unique_ratio:
+            return "repetitive"
+        sentences = [s for s in re.split(r"(?<=[.!?])\s+", text) if s]
+        boilerplate = sum(bool(BOILERPLATE.search(s)) for s in sentences)
+        if boilerplate / len(sentences) > self.max_boilerplate_ratio:
+            return "boilerplate"
+        language, ratio = self.detect_language(words)
+        if ratio < self.min_stopword_ratio:
+            return "gibberish"  # Too few function words to be prose
+        if language not in self.languages:
+            return "language"
+        return None
+
+    def check(self, text):
+        """
+        Like rejection_reason, counting the rejection.
+        """
+        reason = self.rejection_reason(text)
+        if reason is not None:
+            with self._lock:
+                self.rejections[reason] += 1
+        return reason
@@ -0,0 +1,87 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class DynamicBatcher:
+    def __init__(self, embedder, max_wait_ms=5, max_batch_size=64):
+        """
+        Wraps a sentence encoder so that concurrent encode calls made within
+        `max_wait_ms` of each other run as one batch of up to `max_batch_size`
+        texts. Calls that already fill a batch go straight to the encoder.
+        """
+        self.embedder = embedder
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.batches = 0  # Encoder calls made by the batching thread
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        # The batching thread doesn't survive a fork: forked workers start their own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(
+                        target=self._loop,
+                        args=(self._queue,),
+                        name="embedding-batcher",
+                        daemon=True,
+                    ).start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def encode(self, texts, batch_size=64, **kwargs):
+        """
+        Same contract as the wrapped encoder's encode: one row per text, or a
+        single vector for a single string. Calls with extra options such as
+        normalize_embeddings go straight to the encoder, as batched calls share
+        one encode call and its options.
+        """
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size=batch_size, **kwargs)[0]
+        texts = list(texts)
+        if kwargs or not texts or len(texts) >= self.max_batch_size:
+            return self.embedder.encode(texts, batch_size=batch_size, **kwargs)
+        future = Future()
+        self._ensure_thread().put((texts, future))
+        return future.result()
+
+    def _loop(self, requests_queue):
+        while True:
+            requests = [requests_queue.get()]
+            size = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = requests_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                size += len(request[0])
+            self._run(requests)
+
+    def _run(self, requests):
+        texts = [text for request_texts, _ in requests for text in request_texts]
+        try:
+            vectors = np.asarray(
+                self.embedder.encode(texts, batch_size=self.max_batch_size)
+            )
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        offset = 0
+        for request_texts, future in requests:
+            future.set_result(vectors[offset : offset + len(request_texts)])
+            offset += len(request_texts)
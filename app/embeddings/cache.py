@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import fcntl
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+
+def cache_key(model_name, text):
+    """
+    Returns the cache key of `text` for `model_name`. Only normalizations that
+    can't change the embedding (Unicode form, runs of whitespace) are applied.
+    """
+    text = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingStore:
+    def __init__(self, directory, dimension):
+        """
+        Append-only vector file plus an SQLite index of key -> row. The vector file
+        is memory-mapped for reads and survives restarts. Safe to share between
+        processes: appends hold an exclusive file lock.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.dimension = dimension
+        self.row_bytes = dimension * 4
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        open(self.vectors_path, "ab").close()
+        self.index = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self.index.execute("PRAGMA journal_mode=WAL")
+        self.index.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER)"
+        )
+        self.index.commit()
+        self._mapped = None
+        self._lock = threading.Lock()
+
+    def _rows(self, rows):
+        """
+        Returns the vectors at `rows`, remapping the file when it has grown.
+        """
+        needed = max(rows) + 1
+        if self._mapped is None or len(self._mapped) < needed:
+            count = os.path.getsize(self.vectors_path) // self.row_bytes
+            self._mapped = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(count, self.dimension),
+            )
+        return np.array(self._mapped[rows])
+
+    def get_many(self, keys):
+        with self._lock:
+            placeholders = ", ".join("?" * len(keys))
+            found = dict(
+                self.index.execute(
+                    f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})",
+                    keys,
+                ).fetchall()
+            )
+            if not found:
+                return {}
+            found_keys = list(found)
+            vectors = self._rows([found[key] for key in found_keys])
+            return dict(zip(found_keys, vectors))
+
+    def put_many(self, keys, vectors):
+        """
+        Appends the vectors whose key isn't stored yet. The lookup, append and
+        index insert all happen under the file lock, so keys written meanwhile by
+        another process never leave unreferenced rows in the vector file.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self.vectors_path, "ab") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                placeholders = ", ".join("?" * len(keys))
+                stored = {
+                    key
+                    for (key,) in self.index.execute(
+                        f"SELECT key FROM embeddings WHERE key IN ({placeholders})",
+                        list(keys),
+                    )
+                }
+                positions = {}  # First position of each new key
+                for i, key in enumerate(keys):
+                    if key not in stored:
+                        positions.setdefault(key, i)
+                if not positions:
+                    return
+                first_row = handle.seek(0, os.SEEK_END) // self.row_bytes
+                handle.write(vectors[list(positions.values())].tobytes())
+                handle.flush()
+                self.index.executemany(
+                    "INSERT INTO embeddings (key, row) VALUES (?, ?)",
+                    [(key, first_row + i) for i, key in enumerate(positions)],
+                )
+                self.index.commit()
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    def __init__(
+        self, model_name, dimension, max_bytes=64 * 1024 * 1024, directory=None
+    ):
+        """
+        Two-tier embedding cache keyed by (model name, normalized text hash): an
+        in-memory LRU bounded by `max_bytes` of vector data, backed by an optional
+        DiskEmbeddingStore under `directory`.
+        """
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.memory = OrderedDict()
+        self.disk = None
+        if directory:
+            slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+            self.disk = DiskEmbeddingStore(os.path.join(directory, slug), dimension)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _remember(self, key, vector):
+        # Caller holds the lock
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = vector
+        self.bytes += vector.nbytes
+        while self.bytes > self.max_bytes and self.memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def get_many(self, texts):
+        """
+        Returns one cached vector per text, or None for misses.
+        """
+        keys = [cache_key(self.model_name, text) for text in texts]
+        vectors = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self.memory.get(key)
+                if vector is not None:
+                    self.memory.move_to_end(key)
+                    vectors[i] = vector
+                    self.hits += 1
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.disk is not None:
+            found = self.disk.get_many([keys[i] for i in missing])
+            with self._lock:
+                for i in missing:
+                    vector = found.get(keys[i])
+                    if vector is not None:
+                        vectors[i] = vector
+                        self.disk_hits += 1
+                        self._remember(keys[i], vector)
+
+        with self._lock:
+            self.misses += sum(vector is None for vector in vectors)
+        return vectors
+
+    def put_many(self, texts, vectors):
+        keys = [cache_key(self.model_name, text) for text in texts]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                # Copy so a cached row doesn't keep the whole batch array alive
+                self._remember(key, vector.copy())
+        if self.disk is not None:
+            self.disk.put_many(keys, vectors)
+
+    def encode(self, embedder, texts, batch_size=64):
+        """
+        Returns the embeddings of `texts` as one matrix, encoding only the cache
+        misses with `embedder` and caching them.
+        """
+        vectors = self.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = embedder.encode(
+                [texts[i] for i in missing], batch_size=batch_size
+            )
+            self.put_many([texts[i] for i in missing], encoded)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return np.vstack(vectors)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self.memory),
+                "bytes": self.bytes,
+            }
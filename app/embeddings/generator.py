@@ -0,0 +1,70 @@
+import logging
+import os
+import threading
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_ENGINES = ("torch", "onnx")
+
+_embedders = {}
+_lock = threading.Lock()
+
+
+def embedding_model_id(model_name=DEFAULT_MODEL):
+    """
+    Identifies the vectors get_embedder produces for `model_name` under the
+    configured engine, e.g. to key caches: int8 weights give slightly different
+    vectors than the original model.
+    """
+    if os.getenv("EMBEDDING_ENGINE", "torch") == "onnx":
+        quantize = os.getenv("EMBEDDING_QUANTIZE", "False") == "True"
+        return f"{model_name}/onnx" + ("-int8" if quantize else "")
+    return model_name
+
+
+def _load_embedder(model_name):
+    engine = os.getenv("EMBEDDING_ENGINE", "torch")
+    if engine not in EMBEDDING_ENGINES:
+        raise ValueError(
+            f"EMBEDDING_ENGINE must be one of {EMBEDDING_ENGINES}, got '{engine}'"
+        )
+    logging.info(f"Loading embedding model '{model_name}' ({engine})...")
+    if engine == "onnx":
+        from app.embeddings.onnx_engine import OnnxEmbedder
+
+        embedder = OnnxEmbedder(
+            model_name,
+            os.path.join(os.getenv("EMBEDDING_ONNX_DIR", "onnx_models"), model_name),
+            quantize=os.getenv("EMBEDDING_QUANTIZE", "False") == "True",
+        )
+    else:
+        from sentence_transformers import SentenceTransformer
+
+        embedder = SentenceTransformer(model_name)
+
+    max_wait_ms = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", 0))
+    if max_wait_ms > 0:
+        from app.embeddings.batcher import DynamicBatcher
+
+        embedder = DynamicBatcher(
+            embedder,
+            max_wait_ms=max_wait_ms,
+            max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH", 64)),
+        )
+    return embedder
+
+
+def get_embedder(model_name=DEFAULT_MODEL):
+    """
+    Returns the process-wide sentence encoder for `model_name`, loading it on
+    first use. Every MilvusClient and the retrieval path share this instance.
+    EMBEDDING_ENGINE selects PyTorch (default) or ONNX Runtime, and a positive
+    EMBEDDING_BATCH_WAIT_MS batches concurrent calls together.
+    """
+    embedder = _embedders.get(model_name)
+    if embedder is None:
+        with _lock:
+            embedder = _embedders.get(model_name)
+            if embedder is None:
+                embedder = _load_embedder(model_name)
+                _embedders[model_name] = embedder
+    return embedder
@@ -0,0 +1,180 @@
+import inspect
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+CONFIG_FILE = "embedder.json"
+
+
+def export_model(model_name, directory, quantize=False):
+    """
+    Exports the transformer of a SentenceTransformer model to ONNX, with its
+    tokenizer and pooling settings, and optionally an int8 dynamically quantized
+    copy. Needs torch and sentence-transformers; serving the export doesn't.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MODEL_FILE)
+    if not os.path.exists(path):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        logging.info(f"Exporting '{model_name}' to ONNX in {directory}...")
+        model = SentenceTransformer(model_name, device="cpu")
+        tokenizer = model.tokenizer
+        inputs = tokenizer(["export"], return_tensors="pt")
+        names = list(inputs.keys())
+
+        class Encoder(torch.nn.Module):
+            # Maps positional ONNX inputs to the transformer's keyword arguments
+            def __init__(self, transformer):
+                super().__init__()
+                self.transformer = transformer
+
+            def forward(self, *args):
+                return self.transformer(**dict(zip(names, args))).last_hidden_state
+
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        temporary = f"{path}.{os.getpid()}.tmp"
+        options = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            options["dynamo"] = False  # The TorchScript exporter needs no onnxscript
+        with torch.no_grad():
+            torch.onnx.export(
+                Encoder(model[0].auto_model).eval(),
+                tuple(inputs[name] for name in names),
+                temporary,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **options,
+            )
+        tokenizer.save_pretrained(directory)
+        with open(os.path.join(directory, CONFIG_FILE), "w") as handle:
+            json.dump(
+                {
+                    "model_name": model_name,
+                    "max_length": model.max_seq_length,
+                    # Models ending with a Normalize module return unit vectors
+                    "normalize": any(
+                        type(module).__name__ == "Normalize" for module in model
+                    ),
+                },
+                handle,
+            )
+        os.replace(temporary, path)
+
+    quantized_path = os.path.join(directory, QUANTIZED_MODEL_FILE)
+    if quantize and not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logging.info(f"Quantizing '{model_name}' weights to int8...")
+        temporary = f"{quantized_path}.{os.getpid()}.tmp"
+        quantize_dynamic(path, temporary, weight_type=QuantType.QInt8)
+        os.replace(temporary, quantized_path)
+    return quantized_path if quantize else path
+
+
+class OnnxEmbedder:
+    def __init__(self, model_name, directory, quantize=False, threads=None):
+        """
+        Sentence encoder running an exported model on ONNX Runtime: same
+        encode(texts, batch_size) contract and vectors as SentenceTransformer,
+        within numerical tolerance (int8 weights trade a little more of it for
+        speed). The model is exported to `directory` on first use.
+        """
+        self.model_name = model_name
+        self.directory = directory
+        self.quantize = quantize
+        self.threads = threads
+        self.model_path = export_model(model_name, directory, quantize)
+        with open(os.path.join(directory, CONFIG_FILE)) as handle:
+            config = json.load(handle)
+        self.max_length = config["max_length"]
+        self.normalize = config["normalize"]
+
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        """
+        Returns this process' inference session. ONNX Runtime thread pools don't
+        survive a fork, so forked workers open their own.
+        """
+        if self._session_pid != os.getpid():
+            with self._lock:
+                if self._session_pid != os.getpid():
+                    import onnxruntime
+
+                    options = onnxruntime.SessionOptions()
+                    threads = self.threads or int(
+                        os.getenv("EMBEDDING_ONNX_THREADS", 0)
+                    )
+                    if threads:
+                        options.intra_op_num_threads = threads
+                    self._session = onnxruntime.InferenceSession(
+                        self.model_path,
+                        sess_options=options,
+                        providers=["CPUExecutionProvider"],
+                    )
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def encode(
+        self, texts, batch_size=64, normalize_embeddings=False, show_progress_bar=None
+    ):
+        """
+        Embeds `texts` with mean pooling over the attention mask. Vectors are
+        normalized when the model ends with a Normalize module or when
+        `normalize_embeddings` is set. Other SentenceTransformer options are not
+        supported and raise TypeError.
+
+        Returns:
+            np.ndarray: One float32 row per text, or a single vector for a single
+                string.
+        """
+        if isinstance(texts, str):
+            return self.encode(
+                [texts],
+                batch_size=batch_size,
+                normalize_embeddings=normalize_embeddings,
+            )[0]
+        texts = list(texts)
+        session = self.session()
+        input_names = {node.name for node in session.get_inputs()}
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        # Batch texts of similar length together to minimize padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(texts), batch_size):
+            positions = order[start : start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in positions],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feed = {
+                name: value.astype(np.int64)
+                for name, value in inputs.items()
+                if name in input_names
+            }
+            hidden = session.run(["last_hidden_state"], feed)[0]
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[positions] = pooled
+        if (self.normalize or normalize_embeddings) and len(texts):
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
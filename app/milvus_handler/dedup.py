@@ -0,0 +1,18 @@
+import hashlib
+import re
+import unicodedata
+
+
+def normalize_text(text):
+    """
+    Normalizes text for hashing so whitespace and case changes don't defeat dedup.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def content_hash(text):
+    """
+    Returns the hex SHA-256 of the normalized text.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
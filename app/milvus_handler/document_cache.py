@@ -0,0 +1,59 @@
+from collections import OrderedDict
+import threading
+
+
+class DocumentCache:
+    def __init__(self, capacity=1024):
+        """
+        LRU cache of stored documents by primary key, so hot documents are
+        hydrated without a Milvus query. Stored documents never change, so
+        entries only leave by eviction or clear().
+        """
+        self.capacity = capacity
+        self.documents = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, ids):
+        """
+        Returns the cached documents of `ids` by id; missing ids are left out.
+        """
+        found = {}
+        with self._lock:
+            for document_id in ids:
+                document = self.documents.get(document_id)
+                if document is None:
+                    self.misses += 1
+                    continue
+                self.documents.move_to_end(document_id)
+                found[document_id] = document
+                self.hits += 1
+        return found
+
+    def put_many(self, documents):
+        """
+        Caches `documents`, a dict of id -> document.
+        """
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            for document_id, document in documents.items():
+                self.documents[document_id] = document
+                self.documents.move_to_end(document_id)
+            while len(self.documents) > self.capacity:
+                self.documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.documents.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.documents),
+            }
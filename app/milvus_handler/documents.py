@@ -0,0 +1,108 @@
+from datetime import date as Date, datetime
+import logging
+
+from .dedup import content_hash
+
+MAX_CATEGORIES = 32  # Capacity of the categories array
+CATEGORY_MAX_LENGTH = 256
+PASSAGE_MAX_LENGTH = 4096
+EPOCH = Date(1970, 1, 1)
+DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d")  # Spider and newspaper extractor formats
+# Documents sampled, and seconds between checks, to tell whether a collection's
+# documents have passages yet (see passages_ready)
+PASSAGE_CHECK_SAMPLE = 20
+PASSAGE_CHECK_INTERVAL = 60
+# Fields returned by each search projection; "ids" returns ids and distances only
+PROJECTIONS = {
+    "ids": [],
+    "light": ["title", "author", "date", "categories"],
+    "full": ["title", "author", "date", "text", "categories"],
+}
+
+
+def epoch_day(value):
+    """
+    Returns the days since 1970-01-01 of a date, datetime or date string in
+    one of DATE_FORMATS.
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        for date_format in DATE_FORMATS:
+            try:
+                value = datetime.strptime(value, date_format).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Unsupported date: {value}")
+    return (value - EPOCH).days
+
+
+def iso_date(day):
+    """
+    Returns the 'yyyy-mm-dd' date of epoch day `day`.
+    """
+    return Date.fromordinal(EPOCH.toordinal() + day).isoformat()
+
+
+def format_date(date):
+    """
+    Normalizes a 'dd-mm-yyyy' or 'yyyy-mm-dd' date into the 'yyyy-mm-dd' format
+    stored with each document.
+    """
+    try:
+        return iso_date(epoch_day(date))
+    except (TypeError, ValueError) as e:
+        logging.error(f"Invalid date format: {date}. Error: {e}")
+        raise ValueError("Date must be in 'dd-mm-yyyy' or 'yyyy-mm-dd' format")
+
+
+def clip_categories(categories):
+    """
+    Fits a category list into the categories field.
+    """
+    if isinstance(categories, str):  # Read back from a legacy collection
+        categories = [categories]
+    return [
+        str(category)[:CATEGORY_MAX_LENGTH]
+        for category in (categories or [])[:MAX_CATEGORIES]
+    ]
+
+
+def prepare_documents(documents):
+    """
+    First step of every insert_many: normalizes dates and drops duplicates inside
+    the batch, keeping the first occurrence.
+
+    Returns:
+        tuple: The status list, filled for rejected documents and None for the
+            others, and a (position, document, formatted date, content hash)
+            entry per remaining document.
+    """
+    statuses = [None] * len(documents)
+
+    # Normalize dates first so invalid documents never reach the database
+    pending = []
+    for position, document in enumerate(documents):
+        try:
+            formatted_date = format_date(document["date"])
+        except ValueError as e:
+            statuses[position] = {"status": "error", "message": str(e)}
+            continue
+        text_hash = document.get("content_hash") or content_hash(document["text"])
+        pending.append((position, document, formatted_date, text_hash))
+
+    # Drop duplicates inside the batch, keeping the first occurrence
+    unique = []
+    seen_hashes = set()
+    for entry in pending:
+        if entry[3] in seen_hashes:
+            statuses[entry[0]] = {
+                "status": "skipped",
+                "message": "Duplicate text detected",
+            }
+            continue
+        seen_hashes.add(entry[3])
+        unique.append(entry)
+    return statuses, unique
@@ -0,0 +1,134 @@
+import json
+import os
+
+# Build parameters per index type, sized for collections of up to a few
+# million 384-dimensional vectors
+DEFAULT_BUILD_PARAMS = {
+    "FLAT": {},
+    "HNSW": {"M": 16, "efConstruction": 200},
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_SQ8": {"nlist": 1024},
+    "IVF_PQ": {"nlist": 1024, "m": 48, "nbits": 8},
+}
+DEFAULT_SEARCH_PARAMS = {
+    "FLAT": {},
+    "HNSW": {"ef": 64},
+    "IVF_FLAT": {"nprobe": 16},
+    "IVF_SQ8": {"nprobe": 16},
+    "IVF_PQ": {"nprobe": 32},
+}
+
+
+class IndexConfig:
+    def __init__(
+        self,
+        index_type="HNSW",
+        metric_type="COSINE",
+        build_params=None,
+        search_params=None,
+    ):
+        """
+        Vector index type, metric and build/search parameters. Embeddings are
+        L2-normalized, so COSINE and IP rank identically and L2 distances map
+        directly to cosine similarity.
+        """
+        self.index_type = index_type.upper()
+        self.metric_type = metric_type.upper()
+        self.build_params = (
+            dict(DEFAULT_BUILD_PARAMS.get(self.index_type, {}))
+            if build_params is None
+            else dict(build_params)
+        )
+        self.search_params = (
+            dict(DEFAULT_SEARCH_PARAMS.get(self.index_type, {}))
+            if search_params is None
+            else dict(search_params)
+        )
+
+    @classmethod
+    def from_env(cls):
+        """
+        Reads MILVUS_INDEX_TYPE, MILVUS_METRIC_TYPE and the JSON objects
+        MILVUS_INDEX_PARAMS / MILVUS_SEARCH_PARAMS.
+        """
+        build_params = os.getenv("MILVUS_INDEX_PARAMS")
+        search_params = os.getenv("MILVUS_SEARCH_PARAMS")
+        return cls(
+            index_type=os.getenv("MILVUS_INDEX_TYPE", "HNSW"),
+            metric_type=os.getenv("MILVUS_METRIC_TYPE", "COSINE"),
+            build_params=json.loads(build_params) if build_params else None,
+            search_params=json.loads(search_params) if search_params else None,
+        )
+
+    @classmethod
+    def from_index(cls, index, search_params=None):
+        """
+        Describes an index that already exists on a collection, so searches use the
+        metric it was built with.
+        """
+        params = dict(index.params)
+        build_params = params.get("params")
+        if build_params is None:
+            # Some server versions return the build parameters flattened
+            build_params = {
+                key: value
+                for key, value in params.items()
+                if key not in ("index_type", "metric_type")
+            }
+        if isinstance(build_params, str):
+            build_params = json.loads(build_params)
+        return cls(
+            index_type=params.get("index_type", "FLAT"),
+            metric_type=params.get("metric_type", "L2"),
+            build_params=build_params,
+            search_params=search_params,
+        )
+
+    @property
+    def search_knob(self):
+        """
+        The search parameter that trades latency for recall, if any.
+        """
+        if self.index_type.startswith("IVF") or self.index_type.startswith("BIN_IVF"):
+            return "nprobe"
+        if self.index_type == "HNSW":
+            return "ef"
+        return None
+
+    def index_params(self):
+        return {
+            "index_type": self.index_type,
+            "metric_type": self.metric_type,
+            "params": self.build_params,
+        }
+
+    def search_param(self, overrides=None, limit=None):
+        params = dict(self.search_params)
+        params.update(overrides or {})
+        if self.search_knob == "ef" and limit:
+            params["ef"] = max(params.get("ef", 0), limit)  # HNSW needs ef >= limit
+        return {"metric_type": self.metric_type, "params": params}
+
+    def similarity(self, distance):
+        """
+        Converts a Milvus distance between normalized vectors to cosine similarity.
+        COSINE and IP already return it; L2 returns the squared distance 2 - 2cos.
+        """
+        if self.metric_type == "L2":
+            return 1 - distance / 2
+        return distance
+
+    def distance(self, similarity):
+        """
+        Inverse of similarity: the distance this index's metric reports for a
+        cosine similarity, so re-ranked hits keep the usual scale.
+        """
+        if self.metric_type == "L2":
+            return 2 - 2 * similarity
+        return similarity
+
+    def __repr__(self):
+        return (
+            f"IndexConfig({self.index_type}, {self.metric_type}, "
+            f"build={self.build_params}, search={self.search_params})"
+        )
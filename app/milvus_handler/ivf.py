@@ -0,0 +1,43 @@
+import numpy as np
+
+from .near_duplicates import normalize
+
+
+def assign_clusters(vectors, centroids, chunk=65536):
+    """
+    Returns the index of the most similar centroid of each vector.
+    """
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        scores = np.asarray(vectors[start : start + chunk]) @ centroids.T
+        assignments[start : start + chunk] = scores.argmax(axis=1)
+    return assignments
+
+
+def train_centroids(vectors, nlist, iterations=10, seed=0):
+    """
+    Spherical k-means: `nlist` unit centroids, each the normalized mean of the
+    vectors closest to it by cosine similarity.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = normalize(vectors)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)]
+    for _ in range(iterations):
+        assignments = assign_clusters(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = np.bincount(assignments, minlength=nlist) == 0
+        # Re-seed empty clusters so every list stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def nearest_clusters(queries, centroids, nprobe):
+    """
+    Returns, for each query, the indexes of its `nprobe` most similar centroids.
+    """
+    nprobe = min(nprobe, len(centroids))
+    scores = queries @ centroids.T
+    return np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
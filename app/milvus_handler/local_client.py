@@ -0,0 +1,867 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import shutil
+import sqlite3
+import threading
+
+import numpy as np
+
+from app.cleaner.chunker import TextChunker
+from app.embeddings.cache import EmbeddingCache
+from app.embeddings.generator import (
+    DEFAULT_MODEL,
+    embedding_model_id,
+    get_embedder,
+)
+from .dedup import content_hash
+from .documents import (
+    PASSAGE_MAX_LENGTH,
+    PROJECTIONS,
+    clip_categories,
+    epoch_day,
+    prepare_documents,
+)
+from .ivf import assign_clusters, nearest_clusters, train_centroids
+from .near_duplicates import normalize
+
+SQLITE_MAX_VARIABLES = 900  # Below SQLite's historical limit of 999 parameters
+SCAN_CHUNK = 65536  # Rows scored per matrix product
+IVF_TRAINING_SAMPLE = 65536
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY, title TEXT, author TEXT, date TEXT, date_day INTEGER,
+    text TEXT, categories TEXT, content_hash TEXT, url TEXT, cluster INTEGER
+);
+DROP INDEX IF EXISTS documents_content_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS documents_content_hash_unique
+    ON documents (content_hash);
+CREATE INDEX IF NOT EXISTS documents_date_day ON documents (date_day);
+CREATE INDEX IF NOT EXISTS documents_cluster ON documents (cluster);
+CREATE TABLE IF NOT EXISTS document_categories (
+    document_id INTEGER, category TEXT
+);
+CREATE INDEX IF NOT EXISTS document_categories_category
+    ON document_categories (category, document_id);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY, parent_id INTEGER, position INTEGER, text TEXT,
+    date_day INTEGER, cluster INTEGER
+);
+CREATE INDEX IF NOT EXISTS passages_parent_id ON passages (parent_id);
+CREATE INDEX IF NOT EXISTS passages_date_day ON passages (date_day);
+CREATE INDEX IF NOT EXISTS passages_cluster ON passages (cluster);
+CREATE TABLE IF NOT EXISTS ivf (name TEXT PRIMARY KEY, trained_rows INTEGER);
+"""
+
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+def _chunks(values, size=SQLITE_MAX_VARIABLES):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class VectorTable:
+    def __init__(self, store, name, ivf_threshold, nprobe):
+        """
+        Vectors of one SQLite table, kept in an append-only float32 file whose row
+        n belongs to the row with id n. Searches are brute force over a memory
+        map, or over the `nprobe` nearest IVF lists once the table holds
+        `ivf_threshold` rows.
+        """
+        self.store = store
+        self.name = name
+        self.row_bytes = store.dimension * 4
+        self.vectors_path = os.path.join(store.directory, f"{name}.f32")
+        self.centroids_path = os.path.join(store.directory, f"{name}.centroids.npy")
+        open(self.vectors_path, "ab").close()
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._mapped = None
+        self._centroids = None
+        self._centroids_mtime = None
+
+    def count(self):
+        # Rows are only visible once committed, so SQLite has the authoritative count
+        return self.store.execute(
+            f"SELECT COALESCE(MAX(id) + 1, 0) FROM {self.name}"
+        ).fetchone()[0]
+
+    def vectors(self, count):
+        """
+        Returns the first `count` vectors, remapping the file when it has grown.
+        """
+        if self._mapped is None or len(self._mapped) < count:
+            rows = os.path.getsize(self.vectors_path) // self.row_bytes
+            self._mapped = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self.store.dimension),
+            )
+        return self._mapped[:count]
+
+    def centroids(self):
+        """
+        Returns the IVF centroids, reloading them when another process retrained.
+        """
+        try:
+            mtime = os.stat(self.centroids_path).st_mtime_ns
+        except FileNotFoundError:
+            self._centroids = self._centroids_mtime = None
+            return None
+        if mtime != self._centroids_mtime:
+            self._centroids = np.load(self.centroids_path)
+            self._centroids_mtime = mtime
+        return self._centroids
+
+    def append(self, vectors, insert_rows, select=None):
+        """
+        Writes `vectors` after the last committed row and calls
+        insert_rows(first_id, clusters) to insert their rows in the same
+        transaction. `select()`, when given, is called under the write lock first
+        and returns the positions of the vectors to write, so checks against
+        stored rows can't race with other writers. Bytes left by an interrupted
+        append are overwritten.
+
+        Returns:
+            list: The ids of the new rows.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self.store.write_lock():
+            if select is not None:
+                vectors = vectors[select()]
+                if not len(vectors):
+                    return []
+            centroids = self.centroids()
+            clusters = (
+                assign_clusters(vectors, centroids).tolist()
+                if centroids is not None
+                else [None] * len(vectors)
+            )
+            first = self.count()
+            with open(self.vectors_path, "r+b") as handle:
+                handle.seek(first * self.row_bytes)
+                handle.write(vectors.tobytes())
+                handle.flush()
+            try:
+                insert_rows(first, clusters)
+                self.store.commit()
+            except Exception:
+                self.store.rollback()
+                raise
+        return list(range(first, first + len(vectors)))
+
+    def maybe_train(self):
+        """
+        (Re)builds the IVF lists when the table first reaches the threshold and
+        whenever it doubles since the last training.
+        """
+        count = self.count()
+        if count < self.ivf_threshold:
+            return False
+        row = self.store.execute(
+            "SELECT trained_rows FROM ivf WHERE name = ?", (self.name,)
+        ).fetchone()
+        if row and count < row[0] * 2:
+            return False
+
+        nlist = max(int(math.sqrt(count)), 1)
+        logging.info(f"Training {nlist} IVF lists on {count} '{self.name}' rows...")
+        vectors = self.vectors(count)
+        sample = np.random.default_rng().choice(
+            count, size=min(count, IVF_TRAINING_SAMPLE), replace=False
+        )
+        centroids = train_centroids(vectors[np.sort(sample)], nlist)
+        assignments = assign_clusters(vectors, centroids)
+
+        with self.store.write_lock():
+            total = self.count()
+            vectors = self.vectors(total)
+            if total > count:  # Rows appended during training
+                assignments = np.concatenate(
+                    [assignments, assign_clusters(vectors[count:], centroids)]
+                )
+            self.store.executemany(
+                f"UPDATE {self.name} SET cluster = ? WHERE id = ?",
+                zip(assignments.tolist(), range(total)),
+            )
+            self.store.execute(
+                "INSERT OR REPLACE INTO ivf (name, trained_rows) VALUES (?, ?)",
+                (self.name, total),
+            )
+            self.store.commit()
+            temporary = f"{self.centroids_path}.{os.getpid()}.tmp.npy"
+            np.save(temporary, centroids)
+            os.replace(temporary, self.centroids_path)
+        return True
+
+    def _select_ids(self, where, params):
+        rows = self.store.execute(
+            f"SELECT id FROM {self.name} WHERE {where} ORDER BY id", params
+        ).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    @staticmethod
+    def _top_k(queries, k, chunks):
+        """
+        Streams (ids, vectors) chunks and keeps the k most similar per query.
+        """
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+        for ids, vectors in chunks:
+            if len(ids) == 0:
+                continue
+            scores = np.concatenate([best_scores, queries @ vectors.T], axis=1)
+            ids = np.concatenate(
+                [best_ids, np.broadcast_to(ids, (len(queries), len(ids)))], axis=1
+            )
+            keep = min(k, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_ids = np.take_along_axis(ids, top, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        return [
+            list(zip(ids.tolist(), scores.tolist()))
+            for ids, scores in zip(best_ids, best_scores)
+        ]
+
+    def _score(self, queries, k, vectors, ids=None):
+        """
+        Scores every vector, or only the rows of `ids`, SCAN_CHUNK rows at a time.
+        """
+        if ids is None:
+            ids = np.arange(len(vectors))
+            chunks = (
+                (ids[start : start + SCAN_CHUNK], vectors[start : start + SCAN_CHUNK])
+                for start in range(0, len(ids), SCAN_CHUNK)
+            )
+        else:
+            chunks = (
+                (chunk, vectors[chunk])
+                for chunk in (
+                    ids[start : start + SCAN_CHUNK]
+                    for start in range(0, len(ids), SCAN_CHUNK)
+                )
+            )
+        return self._top_k(queries, k, chunks)
+
+    def search(self, queries, k, where="", params=()):
+        """
+        Returns, for each query, up to `k` (id, cosine similarity) pairs, most
+        similar first, among the rows matching the SQL condition `where`.
+        """
+        queries = normalize(queries)
+        count = self.count()
+        if count == 0 or k <= 0:
+            return [[] for _ in queries]
+        vectors = self.vectors(count)
+        centroids = self.centroids()
+        if centroids is None:
+            ids = self._select_ids(where, params) if where else None
+            return self._score(queries, k, vectors, ids)
+
+        results = []
+        for query, clusters in zip(
+            queries, nearest_clusters(queries, centroids, self.nprobe)
+        ):
+            clusters = clusters.tolist()
+            # Rows appended while the lists were retrained have no cluster yet
+            clause = f"(cluster IN ({_placeholders(clusters)}) OR cluster IS NULL)"
+            ids = self._select_ids(
+                " AND ".join(filter(None, [clause, where])), [*clusters, *params]
+            )
+            results.extend(self._score(query[None, :], k, vectors, ids))
+        return results
+
+
+class LocalStore:
+    def __init__(self, directory, dimension):
+        """
+        SQLite metadata database and write lock shared by the tables of a
+        collection directory. Safe to share between threads and processes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dimension = dimension
+        self.connection = sqlite3.connect(
+            os.path.join(directory, "metadata.sqlite"), check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.lock_path = os.path.join(directory, "write.lock")
+        self._lock = threading.RLock()
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return self.connection.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self._lock:
+            return self.connection.executemany(sql, rows)
+
+    def commit(self):
+        with self._lock:
+            self.connection.commit()
+
+    def rollback(self):
+        with self._lock:
+            self.connection.rollback()
+
+    def write_lock(self):
+        return _WriteLock(self)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class _WriteLock:
+    """
+    Holds the store's thread lock and an exclusive lock on its lock file, so
+    appends from every thread and process are serialized.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.handle = None
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        self.handle = open(self.store.lock_path, "a")
+        fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+        finally:
+            self.store._lock.release()
+
+
+class LocalClient:
+    def __init__(
+        self,
+        directory=None,
+        collection_name="ai_ml_knowledge",
+        embedder=None,
+        model_name=DEFAULT_MODEL,
+        passages=None,
+    ):
+        """
+        File-backed alternative to MilvusClient with the same interface, for tests,
+        local development and small deployments: vectors live in memory-mapped
+        float32 files and metadata in SQLite under `directory`/`collection_name`.
+        Similarities are cosine similarities, reported as 'distance' like a
+        COSINE Milvus index.
+        """
+        self.collection_name = collection_name
+        self.directory = os.path.join(
+            directory or os.getenv("LOCAL_STORE_DIR", "local_store"), collection_name
+        )
+        self.dimension = 384  # Embedding vector dimension
+        self.embedder = embedder or get_embedder(model_name)
+        self.embedding_cache = EmbeddingCache(
+            embedding_model_id(model_name),
+            self.dimension,
+            max_bytes=int(os.getenv("EMBEDDING_CACHE_BYTES", 64 * 1024 * 1024)),
+            directory=os.getenv("EMBEDDING_CACHE_DIR"),
+        )
+        self.passages_enabled = (
+            os.getenv("PASSAGE_CHUNKING", "True") == "True"
+            if passages is None
+            else passages
+        )
+        self.chunker = TextChunker(
+            max_words=int(os.getenv("PASSAGE_WORDS", 150)),
+            overlap_words=int(os.getenv("PASSAGE_OVERLAP_WORDS", 30)),
+        )
+        self.ivf_threshold = int(os.getenv("LOCAL_IVF_THRESHOLD", 200_000))
+        self.nprobe = int(os.getenv("LOCAL_IVF_NPROBE", 32))
+        self._passages_complete = False  # See passages_ready
+        self._open()
+
+    def _open(self):
+        self.store = LocalStore(self.directory, self.dimension)
+        self._documents = VectorTable(
+            self.store, "documents", self.ivf_threshold, self.nprobe
+        )
+        self._passages = VectorTable(
+            self.store, "passages", self.ivf_threshold, self.nprobe
+        )
+        logging.info(f"Local collection '{self.collection_name}' opened.")
+
+    def clear_collection(self):
+        """
+        Deletes every document and passage of the collection.
+        """
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._passages_complete = False
+        self._open()
+        logging.info(f"Collection '{self.collection_name}' cleared and recreated.")
+
+    def warm_dedup_index(self, batch_size=1000):
+        """
+        Nothing to load: content hashes are looked up in an SQLite index.
+        """
+        return self.count_documents()
+
+    def tune_search_params(self, force=False):
+        """
+        Brute-force search is exact and IVF lists are sized on training, so there
+        is nothing to tune.
+        """
+        return None
+
+    def embed_texts(self, texts, batch_size=64):
+        """
+        Embeds texts in one batched pass, reusing cached embeddings.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return normalize(self.embedding_cache.encode(self.embedder, texts, batch_size))
+
+    def embedding_cache_stats(self):
+        """
+        Returns the embedding cache hit and miss counters.
+        """
+        return self.embedding_cache.stats()
+
+    def contains_text(self, text):
+        """
+        Tells whether a document with the same normalized content is already stored.
+        """
+        return self.contains_texts([text])[0]
+
+    def contains_texts(self, texts, hashes=None):
+        """
+        Batched contains_text. Precomputed content hashes can be passed in `hashes`.
+        """
+        if not texts:
+            return []
+        hashes = hashes or [content_hash(text) for text in texts]
+        existing = self._existing_hashes(hashes)
+        return [h in existing for h in hashes]
+
+    def _existing_hashes(self, hashes):
+        existing = set()
+        for chunk in _chunks(list(hashes)):
+            rows = self.store.execute(
+                "SELECT content_hash FROM documents "
+                f"WHERE content_hash IN ({_placeholders(chunk)})",
+                chunk,
+            ).fetchall()
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def insert_data(self, title, author, date, text, categories, url=None, vector=None):
+        """
+        Inserts a single document. A precomputed embedding can be passed in `vector`.
+        """
+        result = self.insert_many(
+            [
+                {
+                    "title": title,
+                    "author": author,
+                    "date": date,
+                    "text": text,
+                    "categories": categories,
+                    "url": url,
+                }
+            ],
+            vectors=None if vector is None else [vector],
+        )[0]
+        if result["status"] == "error":
+            raise ValueError(result["message"])
+        return result
+
+    def insert_many(self, documents, batch_size=64, vectors=None):
+        """
+        Inserts a batch of documents; same contract as MilvusClient.insert_many.
+
+        Returns:
+            list: One status dict per input document, in input order.
+        """
+        statuses, unique = prepare_documents(documents)
+        existing = self._existing_hashes([entry[3] for entry in unique])
+        to_insert = []
+        for entry in unique:
+            if entry[3] in existing:
+                statuses[entry[0]] = {
+                    "status": "skipped",
+                    "message": "Duplicate text detected",
+                }
+            else:
+                to_insert.append(entry)
+        if not to_insert:
+            return statuses
+
+        if vectors is not None:
+            embeddings = normalize([vectors[entry[0]] for entry in to_insert])
+        else:
+            embeddings = self.embed_texts(
+                [entry[1]["text"] for entry in to_insert], batch_size=batch_size
+            )
+
+        rows = [
+            {
+                "title": document["title"],
+                "author": document["author"],
+                "date": formatted_date,
+                "date_day": epoch_day(formatted_date),
+                "text": document["text"],
+                "categories": clip_categories(document["categories"]),
+                "content_hash": text_hash,
+                "url": (document.get("url") or "")[:2048],
+            }
+            for _, document, formatted_date, text_hash in to_insert
+        ]
+
+        def select():
+            # Another thread or process may have stored some of them meanwhile
+            stored = self._existing_hashes([row["content_hash"] for row in rows])
+            positions = [
+                i for i, row in enumerate(rows) if row["content_hash"] not in stored
+            ]
+            rows[:] = [rows[i] for i in positions]
+            return positions
+
+        def insert_rows(first, clusters):
+            ids = range(first, first + len(rows))
+            self.store.executemany(
+                "INSERT INTO documents (id, title, author, date, date_day, text, "
+                "categories, content_hash, url, cluster) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        document_id,
+                        row["title"],
+                        row["author"],
+                        row["date"],
+                        row["date_day"],
+                        row["text"],
+                        json.dumps(row["categories"]),
+                        row["content_hash"],
+                        row["url"],
+                        cluster,
+                    )
+                    for document_id, row, cluster in zip(ids, rows, clusters)
+                ],
+            )
+            self.store.executemany(
+                "INSERT INTO document_categories (document_id, category) VALUES (?, ?)",
+                [
+                    (document_id, category)
+                    for document_id, row in zip(ids, rows)
+                    for category in row["categories"]
+                ],
+            )
+
+        ids = self._documents.append(embeddings, insert_rows, select)
+        logging.info(f"{len(rows)} documents inserted successfully.")
+        if self.passages_enabled:
+            self._insert_passages(ids, rows, batch_size=batch_size)
+        self._documents.maybe_train()
+
+        inserted = {row["content_hash"] for row in rows}
+        for position, _, _, text_hash in to_insert:
+            statuses[position] = (
+                {"status": "success", "message": "Document inserted"}
+                if text_hash in inserted
+                else {"status": "skipped", "message": "Duplicate text detected"}
+            )
+        return statuses
+
+    def _insert_passages(self, parent_ids, documents, batch_size=64):
+        """
+        Splits documents into passages and stores them under their parent id.
+        """
+        passages = [
+            (parent_id, position, text[:PASSAGE_MAX_LENGTH], document["date_day"])
+            for parent_id, document in zip(parent_ids, documents)
+            for position, text in enumerate(self.chunker.chunk_text(document["text"]))
+        ]
+        if not passages:
+            return 0
+        vectors = self.embed_texts(
+            [passage[2] for passage in passages], batch_size=batch_size
+        )
+
+        def insert_rows(first, clusters):
+            self.store.executemany(
+                "INSERT INTO passages (id, parent_id, position, text, date_day, "
+                "cluster) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (passage_id, *passage, cluster)
+                    for passage_id, passage, cluster in zip(
+                        range(first, first + len(passages)), passages, clusters
+                    )
+                ],
+            )
+
+        self._passages.append(vectors, insert_rows)
+        self._passages.maybe_train()
+        logging.info(f"{len(passages)} passages inserted successfully.")
+        return len(passages)
+
+    def _filter(self, category_filter, since, until, key="id"):
+        """
+        Builds the SQL condition of a category and date restricted search. `key`
+        is the column holding the document id.
+        """
+        clauses, params = [], []
+        if category_filter:
+            categories = (
+                [category_filter]
+                if isinstance(category_filter, str)
+                else list(category_filter)
+            )
+            clauses.append(
+                f"{key} IN (SELECT document_id FROM document_categories "
+                f"WHERE category IN ({_placeholders(categories)}))"
+            )
+            params.extend(categories)
+        if since is not None:
+            clauses.append("date_day >= ?")
+            params.append(epoch_day(since))
+        if until is not None:
+            clauses.append("date_day <= ?")
+            params.append(epoch_day(until))
+        return " AND ".join(clauses), params
+
+    def get_by_ids(self, ids, projection="full"):
+        """
+        Fetches the documents of `ids`.
+
+        Returns:
+            list: One document dict per id, in input order, or None for ids that
+                don't exist.
+        """
+        fields = PROJECTIONS[projection]
+        columns = ", ".join(["id"] + fields)
+        documents = {}
+        for chunk in _chunks(list(set(ids))):
+            cursor = self.store.execute(
+                f"SELECT {columns} FROM documents WHERE id IN ({_placeholders(chunk)})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                document = dict(zip(["id"] + fields, row))
+                if "categories" in document:
+                    document["categories"] = json.loads(document["categories"])
+                documents[document["id"]] = document
+        return [documents.get(document_id) for document_id in ids]
+
+    def search_similar(
+        self,
+        query_text,
+        category_filter=None,
+        limit=3,
+        projection="full",
+        since=None,
+        until=None,
+    ):
+        """
+        Searches for similar text; same contract as MilvusClient.search_similar.
+        """
+        return self.search_many(
+            [query_text], category_filter, limit, projection, since=since, until=until
+        )[0]
+
+    def search_many(
+        self,
+        queries,
+        category_filter=None,
+        limit=3,
+        projection="full",
+        batch_size=64,
+        since=None,
+        until=None,
+    ):
+        """
+        Batched search_similar: one embedding pass for all queries.
+        """
+        if not queries:
+            return []
+        query_vectors = self.embed_texts(queries, batch_size=batch_size)
+        where, params = self._filter(category_filter, since, until)
+        results = self._documents.search(query_vectors, limit, where, params)
+        hit_ids = list({hit[0] for hits in results for hit in hits})
+        documents = dict(zip(hit_ids, self.get_by_ids(hit_ids, projection)))
+        return [
+            [dict(documents[hit_id], distance=score) for hit_id, score in hits]
+            for hits in results
+        ]
+
+    def search_passages(
+        self,
+        queries,
+        category_filter=None,
+        limit=3,
+        passages_per_document=2,
+        batch_size=64,
+        since=None,
+        until=None,
+    ):
+        """
+        Searches passages and groups them by parent document; same contract as
+        MilvusClient.search_passages.
+        """
+        if not queries:
+            return []
+        query_vectors = self.embed_texts(queries, batch_size=batch_size)
+        where, params = self._filter(category_filter, since, until, key="parent_id")
+        fetch = limit * passages_per_document * 4
+        results = self._passages.search(query_vectors, fetch, where, params)
+
+        passage_ids = list({hit[0] for hits in results for hit in hits})
+        passages = {}
+        for chunk in _chunks(passage_ids):
+            cursor = self.store.execute(
+                "SELECT id, parent_id, position, text FROM passages "
+                f"WHERE id IN ({_placeholders(chunk)})",
+                chunk,
+            )
+            for passage_id, parent_id, position, text in cursor.fetchall():
+                passages[passage_id] = (parent_id, position, text)
+
+        grouped_results = []
+        for hits in results:
+            groups = {}  # Insertion order is best passage first
+            for passage_id, score in hits:
+                parent_id, position, text = passages[passage_id]
+                group = groups.get(parent_id)
+                if group is None:
+                    if len(groups) == limit:
+                        continue
+                    group = groups[parent_id] = {
+                        "id": parent_id,
+                        "distance": score,
+                        "passages": [],
+                    }
+                if len(group["passages"]) < passages_per_document:
+                    group["passages"].append(
+                        {"position": position, "text": text, "distance": score}
+                    )
+            grouped_results.append(list(groups.values()))
+
+        parent_ids = list(
+            {group["id"] for groups in grouped_results for group in groups}
+        )
+        parents = dict(zip(parent_ids, self.get_by_ids(parent_ids, "light")))
+        for groups in grouped_results:
+            for group in groups:
+                group.update(parents.get(group["id"]) or {})
+                group["passages"].sort(key=lambda passage: passage["position"])
+        return grouped_results
+
+    def check_text_existence(self, text=None, similarity_threshold=0.9, vector=None):
+        """
+        Checks if the provided text has a similar instance in the collection.
+        """
+        if vector is not None:
+            return self.check_many_existence(
+                similarity_threshold=similarity_threshold, vectors=[vector]
+            )[0]
+        return self.check_many_existence([text], similarity_threshold)[0]
+
+    def check_many_existence(
+        self, texts=None, similarity_threshold=0.9, batch_size=64, vectors=None
+    ):
+        """
+        Batched check_text_existence; same contract as
+        MilvusClient.check_many_existence. Inserts are visible immediately, so
+        there is no recent-vector cache to consult.
+        """
+        if vectors is None:
+            if not texts:
+                return []
+            vectors = self.embed_texts(texts, batch_size=batch_size)
+        if len(vectors) == 0:
+            return []
+        vectors = normalize(vectors)
+        matches = [None] * len(vectors)
+
+        # Earlier texts of the same batch are about to be inserted too
+        similarities = vectors @ vectors.T
+        for i in range(1, len(vectors)):
+            j = int(similarities[i, :i].argmax())
+            if similarities[i, j] >= similarity_threshold:
+                matches[i] = {
+                    "text": texts[j] if texts else None,
+                    "title": None,
+                    "author": None,
+                    "date": None,
+                    "categories": None,
+                    "similarity_score": float(similarities[i, j]),
+                }
+
+        unresolved = [i for i, match in enumerate(matches) if match is None]
+        if not unresolved:
+            return matches
+        results = self._documents.search(vectors[unresolved], 1)
+        duplicates = {
+            i: hits[0]
+            for i, hits in zip(unresolved, results)
+            if hits and hits[0][1] >= similarity_threshold
+        }
+        if duplicates:
+            documents = self.get_by_ids([hit[0] for hit in duplicates.values()])
+            for (i, (_, score)), document in zip(duplicates.items(), documents):
+                fields = {
+                    key: document[key] if document else None
+                    for key in PROJECTIONS["full"]
+                }
+                matches[i] = dict(fields, similarity_score=score)
+        return matches
+
+    def passages_ready(self):
+        """
+        Tells whether retrieval can use search_passages: chunking is enabled and
+        every stored document with text has passages. Documents stored while
+        chunking was disabled have none, and searches should fall back to whole
+        documents.
+        """
+        if not self.passages_enabled:
+            return False
+        if not self._passages_complete:
+            missing = self.store.execute(
+                "SELECT 1 FROM documents WHERE text != '' AND NOT EXISTS "
+                "(SELECT 1 FROM passages WHERE parent_id = documents.id) LIMIT 1"
+            ).fetchone()
+            self._passages_complete = missing is None
+            if missing is not None:
+                logging.warning(
+                    f"Documents of '{self.collection_name}' have no passages; "
+                    "retrieval falls back to whole documents."
+                )
+        return self._passages_complete
+
+    def sample_texts(self, limit=200):
+        """
+        Returns the texts of up to `limit` randomly chosen stored documents.
+        """
+        rows = self.store.execute(
+            "SELECT text FROM documents WHERE text != '' ORDER BY random() LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_documents(self):
+        """
+        Counts the number of documents in the collection.
+        """
+        count = self._documents.count()
+        logging.info(f"Collection '{self.collection_name}' contains {count} documents.")
+        return count
@@ -0,0 +1,36 @@
+import argparse
+import logging
+
+from app.milvus_handler.milvus_client import MilvusClient
+
+
+def main():
+    """
+    Upgrades an existing collection to the current MilvusClient schema.
+    `--rebuild-passages` re-chunks the documents of an up-to-date collection,
+    e.g. one ingested before passage chunking.
+
+    Usage:
+        python -m app.milvus_handler.migrate --collection ai_ml_knowledge
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s]: %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    parser = argparse.ArgumentParser(description="Migrate a Milvus collection.")
+    parser.add_argument("--collection", default="ai_ml_knowledge")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rebuild-passages", action="store_true")
+    args = parser.parse_args()
+
+    client = MilvusClient(collection_name=args.collection)
+    copied = client.migrate_collection(batch_size=args.batch_size)
+    print(f"[INFO] Migrated {copied} documents in '{args.collection}'.")
+    if args.rebuild_passages and not copied:  # Migration already rebuilds them
+        inserted = client.rebuild_passages()
+        print(f"[INFO] Rebuilt {inserted} passages of '{args.collection}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-from datetime import datetime
-from dateutil import parser
 from pymilvus import (
     connections,
     Collection,
@@ -8,22 +6,139 @@ from pymilvus import (
     DataType,
     utility,
 )
-from sentence_transformers import SentenceTransformer
-from datetime import datetime
+from pymilvus.exceptions import MilvusException
+from app.cleaner.chunker import TextChunker
+from app.embeddings.cache import EmbeddingCache
+from app.embeddings.generator import (
+    DEFAULT_MODEL,
+    embedding_model_id,
+    get_embedder,
+)
+import numpy as np
+from .dedup import content_hash
+from .documents import (
+    CATEGORY_MAX_LENGTH,
+    MAX_CATEGORIES,
+    PASSAGE_CHECK_INTERVAL,
+    PASSAGE_CHECK_SAMPLE,
+    PASSAGE_MAX_LENGTH,
+    PROJECTIONS,
+    clip_categories,
+    epoch_day,
+    format_date,
+    iso_date,
+    prepare_documents,
+)
+from .document_cache import DocumentCache
+from .index_config import IndexConfig
+from .near_duplicates import RecentVectorCache, normalize
+from .quantization import (
+    BINARY_INDEX_PARAMS,
+    BINARY_SEARCH_PARAMS,
+    DEFAULT_RERANK_FACTORS,
+    LOSSY_INDEX_TYPES,
+    QUANTIZATION_MODES,
+    binarize,
+    rerank,
+)
+from .tuner import SearchTuner
 import logging
+import threading
 import time
 import os
 
+SCALAR_INDEXED_FIELDS = ("content_hash", "url", "categories", "parent_id", "date_day")
+MAX_QUERY_IDS = 10000  # Ids per 'id in [...]' query
+
+
+def month_partition(day):
+    """
+    Name of the monthly partition holding documents of epoch day `day`.
+    """
+    year, month, _ = iso_date(day).split("-")
+    return f"m_{year}{month}"
+
 
 class MilvusClient:
-    def __init__(self, host=None, port=None, collection_name="ai_ml_knowledge"):
+    def __init__(
+        self,
+        host=None,
+        port=None,
+        collection_name="ai_ml_knowledge",
+        embedder=None,
+        model_name=DEFAULT_MODEL,
+        index_config=None,
+        tuner=None,
+        passages=None,
+    ):
         self.host = host or os.getenv("MILVUS_HOST", "standalone")
         self.port = port or os.getenv("MILVUS_PORT", "19530")
         self.collection_name = collection_name
+        # Overlapping passages of each document, searched by retrieval
+        self.passages_collection_name = f"{collection_name}_passages"
+        self.passages_enabled = (
+            os.getenv("PASSAGE_CHUNKING", "True") == "True"
+            if passages is None
+            else passages
+        )
+        self.chunker = TextChunker(
+            max_words=int(os.getenv("PASSAGE_WORDS", 150)),
+            overlap_words=int(os.getenv("PASSAGE_OVERLAP_WORDS", 30)),
+        )
         self.dimension = 384  # Embedding vector dimension
-        self.embedder = SentenceTransformer(
-            "all-MiniLM-L6-v2"
-        )  # Pre-trained model for embeddings
+        # Pre-trained model for embeddings, shared by every client in the process
+        self.embedder = embedder or get_embedder(model_name)
+        # Memoized embeddings: an LRU bounded by bytes, plus an optional disk tier
+        self.embedding_cache = EmbeddingCache(
+            embedding_model_id(model_name),
+            self.dimension,
+            max_bytes=int(os.getenv("EMBEDDING_CACHE_BYTES", 64 * 1024 * 1024)),
+            directory=os.getenv("EMBEDDING_CACHE_DIR"),
+        )
+        # Index used for new collections; searches follow the index actually built
+        self.index_config = index_config or IndexConfig.from_env()
+        # Compressed first-pass vectors for new collections, re-ranked exactly
+        self.quantization = os.getenv("MILVUS_QUANTIZATION", "none")
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"MILVUS_QUANTIZATION must be one of {QUANTIZATION_MODES}, "
+                f"got '{self.quantization}'"
+            )
+        if (
+            self.quantization == "int8"
+            and self.index_config.index_type not in LOSSY_INDEX_TYPES
+        ):
+            self.index_config = IndexConfig("IVF_SQ8", self.index_config.metric_type)
+        elif self.quantization == "binary":
+            # Full-precision vectors are only read back to re-rank candidates
+            self.index_config = IndexConfig("FLAT", self.index_config.metric_type)
+        rerank_factor = os.getenv("QUANTIZATION_RERANK_FACTOR")
+        self.rerank_factor = int(rerank_factor) if rerank_factor else None
+        self._active_index = self.index_config
+        # Recall-targeted search parameters, re-tuned as the collection grows
+        self.tuner = tuner or SearchTuner.from_env()
+        self._documents_estimate = None  # Known count plus documents inserted since
+        self._next_tuning_check = None
+        self._tuning_thread = None  # Background re-tune started by an insert
+        self._collection = None  # Cached handle, set once the collection is ready
+        self._passages = None  # Cached handle of the passages collection
+        self._passages_complete = False  # See passages_ready
+        self._passages_checked_at = None
+        self._passage_fields = {}
+        # Insert into one partition per month so date-filtered searches skip old ones
+        self.monthly_partitions = (
+            os.getenv("MILVUS_MONTHLY_PARTITIONS", "False") == "True"
+        )
+        self._fields = {}  # Field schemas of the loaded collection, by name
+        # Last ingested vectors, checked before Milvus for near-duplicates
+        self._recent = RecentVectorCache(
+            int(os.getenv("RECENT_VECTOR_CACHE_SIZE", 4096)), self.dimension
+        )
+        # Hot documents hydrated by get_by_ids
+        self._documents = DocumentCache(int(os.getenv("DOCUMENT_CACHE_SIZE", 1024)))
+        # Content hashes known to be stored, answered without a Milvus query
+        self._known_hashes = set()
+        self._known_hashes_lock = threading.Lock()
         self._connect()
         self._ensure_collection_ready()
 
@@ -31,16 +146,111 @@ class MilvusClient:
         """
         Drops and recreates the collection to ensure a clean state.
         """
+        self._invalidate_collection()
+        self._recent.clear()
+        self._documents.clear()
+        self._forget_hashes()
+        self._documents_estimate = None
+        if self.tuner is not None and self.tuner.store is not None:
+            self.tuner.store.discard(self._tuning_key())
         if utility.has_collection(self.collection_name):
             logging.info(f"Dropping collection '{self.collection_name}'...")
             utility.drop_collection(self.collection_name)
+        if utility.has_collection(self.passages_collection_name):
+            utility.drop_collection(self.passages_collection_name)
         self._ensure_collection_ready()
         logging.info(f"Collection '{self.collection_name}' cleared and recreated.")
 
+    def needs_migration(self, collection=None):
+        """
+        Tells whether the collection was created with an older schema.
+        """
+        collection = collection or self._get_collection()
+        current = {field.name: field.dtype for field in collection.schema.fields}
+        target = {field.name: field.dtype for field in self._build_schema().fields}
+        return current != target
+
+    def _migrate_row(self, row):
+        """
+        Converts a row read from an older collection to the current schema.
+        """
+        row.pop("id", None)
+        row["categories"] = clip_categories(row.get("categories"))
+        row["content_hash"] = row.get("content_hash") or content_hash(row["text"])
+        row["url"] = row.get("url") or ""
+        if "date_day" not in row:
+            try:
+                row["date_day"] = epoch_day(row.get("date") or "")
+            except ValueError:
+                row["date_day"] = 0
+        if self.quantization == "binary":
+            row["binary_vector"] = binarize([row["vector"]])[0]
+        else:
+            row.pop("binary_vector", None)
+        return row
+
+    def migrate_collection(self, batch_size=500):
+        """
+        Upgrades a collection created with an older schema: copies every document
+        into a new collection with the current schema, drops the old collection
+        and renames the new one in its place.
+
+        Returns:
+            int: The number of documents copied.
+        """
+        old_collection = self._get_collection()
+        if not self.needs_migration(old_collection):
+            logging.info(f"Collection '{self.collection_name}' is up to date.")
+            return 0
+
+        target_name = f"{self.collection_name}_migration"
+        if utility.has_collection(target_name):
+            utility.drop_collection(target_name)  # Leftover of an interrupted run
+        target = self._create_collection(target_name, self._build_schema())
+
+        output_fields = [
+            field.name for field in old_collection.schema.fields if field.name != "id"
+        ]
+        iterator = old_collection.query_iterator(
+            batch_size=batch_size, output_fields=output_fields
+        )
+        copied = 0
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                self._insert_rows(
+                    target, [self._migrate_row(dict(row)) for row in rows]
+                )
+                copied += len(rows)
+                logging.info(f"Migrated {copied} documents...")
+        finally:
+            iterator.close()
+        target.flush()
+
+        self._invalidate_collection()
+        utility.drop_collection(self.collection_name)
+        utility.rename_collection(target_name, self.collection_name)
+        self._documents.clear()  # Documents get new ids in the new collection
+        self._forget_hashes()  # Legacy rows were given their hash by the copy
+        self._ensure_collection_ready()
+        if self.passages_enabled:
+            self.rebuild_passages()
+        logging.info(
+            f"Collection '{self.collection_name}' migrated ({copied} documents)."
+        )
+        return copied
+
     def _connect(self):
         """
         Connect to Milvus server.
         """
+        address = f"{self.host}:{self.port}"
+        if connections.has_connection("default"):
+            if connections.get_connection_addr("default").get("address") == address:
+                return  # Reuse the process-wide connection
+            connections.disconnect("default")
         try:
             connections.connect(alias="default", host=self.host, port=self.port)
             logging.info(f"Connected to Milvus at {self.host}:{self.port}")
@@ -48,212 +258,1234 @@ class MilvusClient:
             logging.error(f"Failed to connect to Milvus: {e}")
             raise
 
-    from pymilvus import utility
+    def _build_schema(self):
+        """
+        Returns the schema of the knowledge collection.
+        """
+        fields = [
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+            FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=1024),
+            FieldSchema(name="author", dtype=DataType.VARCHAR, max_length=200),
+            FieldSchema(name="date", dtype=DataType.VARCHAR, max_length=10),
+            FieldSchema(name="date_day", dtype=DataType.INT64),  # Days since epoch
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=20000),
+            FieldSchema(
+                name="categories",
+                dtype=DataType.ARRAY,
+                element_type=DataType.VARCHAR,
+                max_capacity=MAX_CATEGORIES,
+                max_length=CATEGORY_MAX_LENGTH,
+            ),
+            FieldSchema(name="content_hash", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="url", dtype=DataType.VARCHAR, max_length=2048),
+            FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=self.dimension),
+        ] + self._binary_fields()
+        return CollectionSchema(
+            fields=fields,
+            description="Knowledge collection with metadata and vector embeddings",
+        )
+
+    def _binary_fields(self):
+        """
+        The sign-bit vector field searched first when binary quantization is on.
+        """
+        if self.quantization != "binary":
+            return []
+        return [
+            FieldSchema(
+                name="binary_vector", dtype=DataType.BINARY_VECTOR, dim=self.dimension
+            )
+        ]
+
+    def _create_collection(self, name, schema):
+        """
+        Creates a collection. Quantized collections keep their raw field data
+        memory-mapped, since only the compressed vectors are searched in RAM.
+        """
+        collection = Collection(name=name, schema=schema)
+        if self.quantization != "none":
+            collection.set_properties({"mmap.enabled": True})
+        return collection
+
+    def _build_passage_schema(self):
+        """
+        Returns the schema of the passages collection. Categories are repeated on
+        each passage so category filters don't need a join.
+        """
+        fields = [
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+            FieldSchema(name="parent_id", dtype=DataType.INT64),
+            FieldSchema(name="position", dtype=DataType.INT32),
+            FieldSchema(name="date_day", dtype=DataType.INT64),
+            FieldSchema(
+                name="text", dtype=DataType.VARCHAR, max_length=PASSAGE_MAX_LENGTH
+            ),
+            FieldSchema(
+                name="categories",
+                dtype=DataType.ARRAY,
+                element_type=DataType.VARCHAR,
+                max_capacity=MAX_CATEGORIES,
+                max_length=CATEGORY_MAX_LENGTH,
+            ),
+            FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=self.dimension),
+        ] + self._binary_fields()
+        return CollectionSchema(
+            fields=fields,
+            description="Overlapping passages of the knowledge collection documents",
+        )
+
+    def _ensure_indexes(self, collection, index_config=None):
+        """
+        Creates the vector index and the scalar indexes missing from `collection`.
+        """
+        index_config = index_config or self.index_config
+        fields = {field.name for field in collection.schema.fields}
+        indexed_fields = {index.field_name for index in collection.indexes}
+        for field_name in SCALAR_INDEXED_FIELDS:
+            if field_name in fields and field_name not in indexed_fields:
+                if field_name == "categories" and self._is_legacy_categories(
+                    collection
+                ):
+                    continue  # JSON categories can't carry an INVERTED index
+                logging.info(f"Creating scalar index on '{field_name}'...")
+                collection.create_index(
+                    field_name=field_name,
+                    index_params={"index_type": "INVERTED"},
+                    index_name=f"{field_name}_idx",
+                )
+
+        if "binary_vector" in fields and "binary_vector" not in indexed_fields:
+            logging.info("Creating binary index on 'binary_vector'...")
+            collection.create_index(
+                field_name="binary_vector", index_params=BINARY_INDEX_PARAMS
+            )
+
+        if "vector" not in indexed_fields:
+            logging.info(f"Index not found. Creating index {index_config}...")
+            collection.create_index(
+                field_name="vector", index_params=index_config.index_params()
+            )
+            logging.info("Index creation initiated. Waiting for completion...")
+
+            # Wait for index creation to complete
+            while "vector" not in {index.field_name for index in collection.indexes}:
+                logging.info("Waiting for index to be ready...")
+                time.sleep(1)
+            if "binary_vector" in fields:
+                # Only re-ranking reads the float index: page it from disk
+                self._enable_index_mmap(collection, "vector")
+
+    @staticmethod
+    def _enable_index_mmap(collection, field_name):
+        for index in collection.indexes:
+            if index.field_name == field_name:
+                try:
+                    collection.alter_index(
+                        index_name=index.index_name,
+                        extra_params={"mmap.enabled": True},
+                    )
+                except MilvusException as e:
+                    logging.warning(f"Could not memory-map '{field_name}' index: {e}")
+
+    @staticmethod
+    def _is_legacy_categories(collection):
+        return any(
+            field.name == "categories" and field.dtype == DataType.JSON
+            for field in collection.schema.fields
+        )
 
     def _ensure_collection_ready(self):
         """
         Ensures the collection is created, indexed, and loaded into memory.
+        Caches the Collection handle so later operations skip these round trips.
         """
         if not utility.has_collection(self.collection_name):
             logging.info(
                 f"Collection '{self.collection_name}' does not exist. Creating..."
             )
-            # Define the schema for the collection
-            fields = [
-                FieldSchema(
-                    name="id", dtype=DataType.INT64, is_primary=True, auto_id=True
-                ),
-                FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=1024),
-                FieldSchema(name="author", dtype=DataType.VARCHAR, max_length=200),
-                FieldSchema(name="date", dtype=DataType.VARCHAR, max_length=10),
-                FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=20000),
-                FieldSchema(name="categories", dtype=DataType.JSON),
-                FieldSchema(
-                    name="vector", dtype=DataType.FLOAT_VECTOR, dim=self.dimension
-                ),
-            ]
-            schema = CollectionSchema(
-                fields=fields,
-                description="Knowledge collection with metadata and vector embeddings",
-            )
-            Collection(name=self.collection_name, schema=schema)
+            self._create_collection(self.collection_name, self._build_schema())
             logging.info(f"Collection '{self.collection_name}' created.")
         else:
             logging.info(f"Collection '{self.collection_name}' already exists.")
 
         collection = Collection(self.collection_name)
+        self._fields = {field.name: field for field in collection.schema.fields}
+        if self.needs_migration(collection):
+            logging.warning(
+                f"Collection '{self.collection_name}' uses an older schema. "
+                "Run `python -m app.milvus_handler.migrate` to upgrade it."
+            )
 
         # Check if an index exists, create it if missing
-        if not collection.has_index():
-            logging.info("Index not found. Creating index...")
-            index_params = {
-                "index_type": "IVF_FLAT",
-                "metric_type": "L2",
-                "params": {"nlist": 128},
-            }
-            collection.create_index(field_name="vector", index_params=index_params)
-            logging.info("Index creation initiated. Waiting for completion...")
-
-            # Wait for index creation to complete
-            while not collection.has_index():
-                logging.info("Waiting for index to be ready...")
-                time.sleep(1)
+        self._ensure_indexes(collection)
+        for index in collection.indexes:
+            if index.field_name == "vector":
+                active = IndexConfig.from_index(index)
+                if active.index_type == self.index_config.index_type:
+                    active.search_params = dict(self.index_config.search_params)
+                self._active_index = active
+        self._apply_tuning(self._load_tuning())
 
         # Explicitly load the collection into memory
         logging.info("Loading collection into memory...")
         collection.load()
         logging.info(f"Collection '{self.collection_name}' is loaded into memory.")
+        self._collection = collection
+        if self.passages_enabled:
+            self._ensure_passages_ready()
 
-    def insert_data(self, title, author, date, text, categories):
+    def _ensure_passages_ready(self):
         """
-        Inserts a single document into the collection, including its vector embedding.
+        Creates, indexes and loads the passages collection. Its vector index
+        mirrors the documents' so both are searched with the same parameters.
         """
-        self._ensure_collection_ready()
+        if not utility.has_collection(self.passages_collection_name):
+            logging.info(f"Creating collection '{self.passages_collection_name}'...")
+            self._create_collection(
+                self.passages_collection_name, self._build_passage_schema()
+            )
+        passages = Collection(self.passages_collection_name)
+        self._passage_fields = {field.name: field for field in passages.schema.fields}
+        if set(self._passage_fields) != {
+            field.name for field in self._build_passage_schema().fields
+        }:
+            logging.warning(
+                f"Collection '{self.passages_collection_name}' uses an older schema. "
+                "Run `python -m app.milvus_handler.migrate --rebuild-passages`."
+            )
+        self._ensure_indexes(passages, self._active_index)
+        passages.load()
+        self._passages = passages
 
-        collection = Collection(self.collection_name)
+    def _insert_rows(self, collection, rows):
+        """
+        Inserts `rows` into `collection`, each into the partition of its month
+        when monthly partitions are enabled.
+
+        Returns:
+            list: The primary keys of the rows, in row order.
+        """
+        if not self.monthly_partitions or "date_day" not in rows[0]:
+            return list(collection.insert(rows).primary_keys)
+
+        positions_by_partition = {}
+        for position, row in enumerate(rows):
+            partition = month_partition(row["date_day"])
+            positions_by_partition.setdefault(partition, []).append(position)
+        existing = {partition.name for partition in collection.partitions}
+        ids = [None] * len(rows)
+        for partition, positions in positions_by_partition.items():
+            if partition not in existing:
+                try:
+                    collection.create_partition(partition)
+                except MilvusException:
+                    if not collection.has_partition(partition):
+                        raise  # Not a race with another writer
+            result = collection.insert(
+                [rows[position] for position in positions], partition_name=partition
+            )
+            for position, key in zip(positions, result.primary_keys):
+                ids[position] = key
+        return ids
+
+    @staticmethod
+    def _date_partitions(collection, since_day, until_day):
+        """
+        Returns the partitions a search between two epoch days has to visit, or
+        None to search them all. Rows inserted without monthly partitions live
+        in '_default', which is always searched.
+        """
+        names = [partition.name for partition in collection.partitions]
+        if not any(name.startswith("m_") for name in names):
+            return None
+        first = month_partition(since_day) if since_day is not None else "m_"
+        last = month_partition(until_day) if until_day is not None else "m_999999"
+        return [
+            name
+            for name in names
+            if name == "_default" or (name.startswith("m_") and first <= name <= last)
+        ]
+
+    def _tuning_key(self):
+        return f"{self.host}:{self.port}/{self.collection_name}"
+
+    def _load_tuning(self):
+        if self.tuner is None or self.tuner.store is None:
+            return None
+        return self.tuner.store.get(self._tuning_key())
+
+    def _apply_tuning(self, record):
+        """
+        Uses the tuned search parameter of `record` if it was measured on the
+        index the collection actually has.
+        """
+        if self.tuner is None:
+            return
+        active = self._active_index
+        if (
+            record is not None
+            and record["knob"] == active.search_knob
+            and (record["index_type"], record["metric_type"])
+            == (active.index_type, active.metric_type)
+        ):
+            active.search_params[record["knob"]] = record["value"]
+        self._next_tuning_check = self.tuner.next_check(record)
+
+    def tune_search_params(self, force=False):
+        """
+        Re-tunes nprobe/ef when the collection has outgrown the stored tuning (or
+        has none yet), and applies the result.
+
+        Returns:
+            dict: The tuning record in use, or None if the collection isn't tuned.
+        """
+        if self.tuner is None or self._active_index.search_knob is None:
+            return None
+        documents = self.count_documents()
+        self._documents_estimate = documents
+        # Another process sharing the store may have tuned in the meantime
+        record = self._load_tuning()
+        if force or self.tuner.is_stale(record, self._active_index, documents):
+            record = self._run(
+                lambda collection: self.tuner.tune(
+                    collection, self._active_index, documents
+                )
+            )
+            if self.tuner.store is not None:
+                self.tuner.store.put(self._tuning_key(), record)
+        self._apply_tuning(record)
+        return record
+
+    def _maybe_retune(self, inserted):
+        """
+        Marks the tuning stale once the collection outgrew it and re-tunes on a
+        background thread: a tuning run reads the whole collection, which must
+        not stall the insert that crossed the threshold.
+        """
+        if self.tuner is None or self._next_tuning_check is None:
+            return
+        if self._documents_estimate is None:
+            self._documents_estimate = self.count_documents()
+        else:
+            self._documents_estimate += inserted
+        if self._documents_estimate < self._next_tuning_check:
+            return
+        if self._tuning_thread is not None and self._tuning_thread.is_alive():
+            return
+        # Don't start another run for every insert while this one is going
+        self._next_tuning_check = None
+        self._tuning_thread = threading.Thread(
+            target=self._retune_in_background, name="search-tuning", daemon=True
+        )
+        self._tuning_thread.start()
+
+    def _retune_in_background(self):
+        try:
+            self.tune_search_params()
+        except Exception as e:
+            logging.error(f"Search parameter tuning failed: {e}")
+            # Try again once the collection has grown further
+            self._next_tuning_check = int(
+                self._documents_estimate * self.tuner.growth_factor
+            )
+
+    def warm_dedup_index(self, batch_size=1000):
+        """
+        Loads every stored content hash into the in-process set of known hashes,
+        so re-crawled documents are skipped without a Milvus round trip.
+
+        Returns:
+            int: The number of known content hashes.
+        """
+        if "content_hash" not in self._schema_fields():
+            return 0
+
+        def load_hashes(collection):
+            hashes = set()
+            iterator = collection.query_iterator(
+                batch_size=batch_size,
+                expr='content_hash != ""',
+                output_fields=["content_hash"],
+            )
+            try:
+                while True:
+                    rows = iterator.next()
+                    if not rows:
+                        break
+                    hashes.update(row["content_hash"] for row in rows)
+            finally:
+                iterator.close()
+            return hashes
 
-        # Convert the date into a consistent format
+        hashes = self._run(load_hashes)
+        with self._known_hashes_lock:
+            self._known_hashes |= hashes
+            known = len(self._known_hashes)
+        logging.info(f"Dedup index warmed with {known} content hashes.")
+        return known
+
+    def _remember_hashes(self, hashes):
+        with self._known_hashes_lock:
+            self._known_hashes.update(hashes)
+
+    def _forget_hashes(self):
+        with self._known_hashes_lock:
+            self._known_hashes = set()
+
+    def _find_existing(self, hashes, texts):
+        """
+        Returns the subset of `hashes` already stored in the collection. Hashes
+        inserted by this process or loaded by warm_dedup_index are answered
+        locally; the misses are looked up with one strongly consistent query on
+        the indexed content_hash field, so documents inserted moments ago by
+        another worker or the API are seen.
+        """
+        if "content_hash" not in self._schema_fields():
+            return self._find_existing_texts(hashes, texts)
+        with self._known_hashes_lock:
+            known = {h for h in hashes if h in self._known_hashes}
+        misses = sorted(set(hashes) - known)
+        if not misses:
+            return known
+        expr = "content_hash in [{}]".format(", ".join(self._quote(h) for h in misses))
+        results = self._run(
+            lambda collection: collection.query(
+                expr,
+                output_fields=["content_hash"],
+                limit=len(misses),
+                consistency_level="Strong",
+            )
+        )
+        found = {result["content_hash"] for result in results}
+        self._remember_hashes(found)
+        return known | found
+
+    def _find_existing_texts(self, hashes, texts):
+        """
+        Duplicate lookup for collections created before the content_hash field.
+        """
+        expr = "text in [{}]".format(", ".join(self._quote(text) for text in texts))
+        results = self._run(
+            lambda collection: collection.query(
+                expr, output_fields=["text"], limit=len(texts)
+            )
+        )
+        existing_texts = {result["text"] for result in results}
+        return {h for h, text in zip(hashes, texts) if text in existing_texts}
+
+    def _schema_fields(self):
+        """
+        Returns the field schemas by name, preparing the collection if needed.
+        """
+        self._get_collection()
+        return self._fields
+
+    @staticmethod
+    def _quote(value):
+        """
+        Quotes a string literal for a Milvus boolean expression.
+        """
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    def contains_text(self, text):
+        """
+        Tells whether a document with the same normalized content is already stored.
+        Cheap enough to call before embedding a re-crawled article.
+        """
+        return self.contains_texts([text])[0]
+
+    def contains_texts(self, texts, hashes=None):
+        """
+        Batched contains_text: at most one Milvus query for the whole batch.
+        Precomputed content hashes can be passed in `hashes`.
+        """
+        if not texts:
+            return []
+        hashes = hashes or [content_hash(text) for text in texts]
+        existing = self._find_existing(hashes, texts)
+        return [h in existing for h in hashes]
+
+    def _invalidate_collection(self):
+        """
+        Forgets the cached Collection handle so the next operation re-verifies it.
+        """
+        self._collection = None
+        self._passages = None
+
+    def _get_collection(self, passages=False):
+        """
+        Returns the cached Collection handle, preparing the collection if needed.
+        """
+        if self._collection is None or (passages and self._passages is None):
+            self._ensure_collection_ready()
+        return self._passages if passages else self._collection
+
+    @staticmethod
+    def _is_stale_collection_error(error):
+        """
+        Tells whether a Milvus error means the collection was dropped or released.
+        """
+        message = str(getattr(error, "message", error)).lower()
+        return getattr(error, "code", None) in (100, 101) or any(
+            marker in message
+            for marker in (
+                "collection not found",
+                "can't find collection",
+                "collection not exist",
+                "not loaded",
+            )
+        )
+
+    def _run(self, operation, passages=False):
+        """
+        Runs operation(collection) on the cached handle of the documents, or of
+        the passages if `passages` is set. If Milvus reports the collection as
+        missing or not loaded, re-verifies it once and retries.
+        """
         try:
-            # Parse the date using dateutil.parser
-            parsed_date = parser.parse(date)
-            # Convert to the desired format
-            formatted_date = parsed_date.strftime("%Y-%m-%d")
-            formatted_date = datetime.strptime(date, "%d-%m-%Y").strftime("%Y-%m-%d")
-        except ValueError as e:
-            logging.error(f"Invalid date format: {date}. Error: {e}")
-            raise ValueError("Date must be in 'dd-mm-yyyy' format")
-
-        # Check for duplicate text
-        escaped_text = text.replace('"', '\\"')
-        expr = f'text == "{escaped_text}"'
-        results = collection.query(expr, output_fields=["text"], limit=1)
-
-        if results:
-            logging.info("Duplicate text detected. Skipping insertion.")
-            return {"status": "skipped", "message": "Duplicate text detected"}
-
-        # Generate embedding for the text
-        embedding = self.embedder.encode(text).tolist()
-
-        # Insert the new document
-        data = [
-            {
-                "title": title,
-                "author": author,
+            return operation(self._get_collection(passages))
+        except MilvusException as e:
+            if not self._is_stale_collection_error(e):
+                raise
+            logging.warning(
+                f"Collection '{self.collection_name}' is not ready ({e}). Re-verifying..."
+            )
+            self._invalidate_collection()
+            return operation(self._get_collection(passages))
+
+    def _format_date(self, date):
+        """
+        Normalizes a 'dd-mm-yyyy' or 'yyyy-mm-dd' date into the 'yyyy-mm-dd'
+        format stored in Milvus.
+        """
+        return format_date(date)
+
+    def insert_data(self, title, author, date, text, categories, url=None, vector=None):
+        """
+        Inserts a single document into the collection, including its vector embedding.
+        A precomputed embedding can be passed in `vector`.
+        """
+        result = self.insert_many(
+            [
+                {
+                    "title": title,
+                    "author": author,
+                    "date": date,
+                    "text": text,
+                    "categories": categories,
+                    "url": url,
+                }
+            ],
+            vectors=None if vector is None else [vector],
+        )[0]
+        if result["status"] == "error":
+            raise ValueError(result["message"])
+        return result
+
+    def embed_texts(self, texts, batch_size=64):
+        """
+        Embeds texts in one batched pass. The result can be handed to insert_many
+        and to the categorizer so each article is encoded once. Texts found in the
+        embedding cache are not encoded again.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        vectors = self.embedding_cache.encode(self.embedder, texts, batch_size)
+        # Normalized so COSINE, IP and L2 scores all map to cosine similarity
+        return normalize(vectors)
+
+    def embedding_cache_stats(self):
+        """
+        Returns the embedding cache hit and miss counters.
+        """
+        return self.embedding_cache.stats()
+
+    def insert_many(self, documents, batch_size=64, vectors=None):
+        """
+        Inserts a batch of documents with a single embedding pass, a single insert
+        and at most one flush.
+
+        Parameters:
+            documents (list): Dicts with 'title', 'author', 'date', 'text', 'categories',
+                an optional source 'url' and an optional precomputed 'content_hash'.
+            batch_size (int): Batch size handed to the sentence encoder.
+            vectors (list): Optional precomputed embeddings, one per document.
+
+        Returns:
+            list: One status dict per input document, in input order.
+        """
+        statuses, unique = prepare_documents(documents)
+
+        # Check the remaining documents against the collection
+        existing = set()
+        if unique:
+            existing = self._find_existing(
+                [entry[3] for entry in unique],
+                [entry[1]["text"] for entry in unique],
+            )
+        to_insert = []
+        for entry in unique:
+            if entry[3] in existing:
+                logging.info("Duplicate text detected. Skipping insertion.")
+                statuses[entry[0]] = {
+                    "status": "skipped",
+                    "message": "Duplicate text detected",
+                }
+            else:
+                to_insert.append(entry)
+
+        if not to_insert:
+            return statuses
+
+        # Generate all missing embeddings in one batched pass
+        if vectors is not None:
+            # IP/L2 metrics, the recent-vector cache and binary rerank need unit
+            # vectors, and callers may pass raw model output
+            embeddings = normalize([vectors[entry[0]] for entry in to_insert]).tolist()
+        else:
+            embeddings = self.embed_texts(
+                [entry[1]["text"] for entry in to_insert], batch_size=batch_size
+            ).tolist()
+
+        data = []
+        for (_, document, formatted_date, text_hash), embedding in zip(
+            to_insert, embeddings
+        ):
+            row = {
+                "title": document["title"],
+                "author": document["author"],
                 "date": formatted_date,
-                "text": text,
-                "categories": categories,
+                "date_day": epoch_day(formatted_date),
+                "text": document["text"],
+                "categories": clip_categories(document["categories"]),
                 "vector": embedding,
             }
-        ]
-        collection.insert(data)
-        collection.flush()
-        logging.info("Document inserted successfully.")
-        return {"status": "success", "message": "Document inserted"}
+            if "content_hash" in self._fields:
+                row["content_hash"] = text_hash
+                row["url"] = (document.get("url") or "")[:2048]
+            data.append(row)
+        if "binary_vector" in self._fields:
+            for row, bits in zip(data, binarize(embeddings)):
+                row["binary_vector"] = bits
+
+        def write(collection):
+            rows = data
+            if "date_day" not in self._fields:  # Collection predates the field
+                rows = [
+                    {key: value for key, value in row.items() if key != "date_day"}
+                    for row in data
+                ]
+            ids = self._insert_rows(collection, rows)
+            collection.flush()
+            return ids
 
-    def search_similar(self, query_text, category_filter=None, limit=3):
+        ids = self._run(write)
+        logging.info(f"{len(data)} documents inserted successfully.")
+        if self.passages_enabled:
+            self._insert_passages(ids, data, batch_size=batch_size)
+
+        self._recent.add(
+            [row["vector"] for row in data],
+            [
+                {
+                    key: row[key]
+                    for key in ("text", "title", "author", "date", "categories")
+                }
+                for row in data
+            ],
+        )
+        if "content_hash" in self._fields:
+            self._remember_hashes(entry[3] for entry in to_insert)
+        for position, _, _, _ in to_insert:
+            statuses[position] = {"status": "success", "message": "Document inserted"}
+        self._maybe_retune(len(data))
+        return statuses
+
+    def _insert_passages(self, parent_ids, documents, batch_size=64):
         """
-        Searches for similar text in the collection based on embeddings.
+        Splits documents into passages, embeds all of them in one batch and
+        stores them under their parent document id.
+
+        Returns:
+            int: The number of passages inserted.
         """
-        self._ensure_collection_ready()
-        query_vector = self.embedder.encode(query_text).tolist()
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        expr = None
+        passages = []
+        for parent_id, document in zip(parent_ids, documents):
+            categories = clip_categories(document.get("categories"))
+            day = document.get("date_day")
+            if day is None:
+                try:
+                    day = epoch_day(document.get("date") or "")
+                except ValueError:
+                    day = 0
+            for position, text in enumerate(self.chunker.chunk_text(document["text"])):
+                passage = {
+                    "parent_id": parent_id,
+                    "position": position,
+                    "text": text[:PASSAGE_MAX_LENGTH],
+                    "categories": categories,
+                }
+                if "date_day" in self._passage_fields:
+                    passage["date_day"] = day
+                passages.append(passage)
+        if not passages:
+            return 0
+
+        # Single-passage documents hit the embedding cache with the document text
+        vectors = self.embed_texts(
+            [passage["text"] for passage in passages], batch_size=batch_size
+        ).tolist()
+        for passage, vector in zip(passages, vectors):
+            passage["vector"] = vector
+        if "binary_vector" in self._passage_fields:
+            for passage, bits in zip(passages, binarize(vectors)):
+                passage["binary_vector"] = bits
+
+        def write(collection):
+            self._insert_rows(collection, passages)
+            collection.flush()
+
+        self._run(write, passages=True)
+        logging.info(f"{len(passages)} passages inserted successfully.")
+        return len(passages)
+
+    def passages_ready(self):
+        """
+        Tells whether retrieval can use search_passages: chunking is enabled and
+        a sample of the stored documents have passages. Collections ingested before
+        chunking only get them from `migrate --rebuild-passages`; until then
+        searches should fall back to whole documents. A negative answer is
+        re-checked every PASSAGE_CHECK_INTERVAL seconds.
+        """
+        if not self.passages_enabled:
+            return False
+        if self._passages_complete:
+            return True
+        now = time.monotonic()
+        if (
+            self._passages_checked_at is not None
+            and now - self._passages_checked_at < PASSAGE_CHECK_INTERVAL
+        ):
+            return False
+        self._passages_checked_at = now
+
+        rows = self._run(
+            lambda collection: collection.query(
+                'text != ""', output_fields=["id"], limit=PASSAGE_CHECK_SAMPLE
+            )
+        )
+        ids = [row["id"] for row in rows]
+        covered = set()
+        if ids:
+            passages = self._run(
+                lambda collection: collection.query(
+                    f"parent_id in {ids}", output_fields=["parent_id"], limit=16384
+                ),
+                passages=True,
+            )
+            covered = {row["parent_id"] for row in passages}
+        self._passages_complete = covered.issuperset(ids)
+        if not self._passages_complete:
+            logging.warning(
+                f"Documents of '{self.collection_name}' have no passages yet; "
+                "retrieval falls back to whole documents. Run "
+                "`python -m app.milvus_handler.migrate --rebuild-passages`."
+            )
+        return self._passages_complete
+
+    def rebuild_passages(self, batch_size=100):
+        """
+        Re-chunks every stored document into a fresh passages collection, for
+        collections ingested before chunking or migrated to new document ids.
+
+        Returns:
+            int: The number of passages inserted.
+        """
+        collection = self._get_collection()
+        self._passages = None
+        self._passages_complete = False
+        if utility.has_collection(self.passages_collection_name):
+            utility.drop_collection(self.passages_collection_name)
+        self._ensure_passages_ready()
+
+        iterator = collection.query_iterator(
+            batch_size=batch_size,
+            output_fields=["text", "categories", "date"]
+            + (["date_day"] if "date_day" in self._fields else []),
+        )
+        inserted = 0
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                inserted += self._insert_passages(
+                    [row["id"] for row in rows], rows, batch_size=64
+                )
+        finally:
+            iterator.close()
+        logging.info(
+            f"Rebuilt '{self.passages_collection_name}' with {inserted} passages."
+        )
+        self._passages_complete = True
+        return inserted
+
+    def _category_expr(self, category_filter, legacy=None):
+        """
+        Builds an exact-match filter for one category or any of a list of them.
+        `legacy` forces the JSON form; by default it follows the collection.
+        """
+        categories = (
+            [category_filter]
+            if isinstance(category_filter, str)
+            else list(category_filter)
+        )
+        # Collections created before the array field store categories as JSON
+        if legacy is None:
+            legacy = self._schema_fields()["categories"].dtype == DataType.JSON
+        prefix = "json" if legacy else "array"
+        if len(categories) == 1:
+            return f"{prefix}_contains(categories, {self._quote(categories[0])})"
+        quoted = ", ".join(self._quote(category) for category in categories)
+        return f"{prefix}_contains_any(categories, [{quoted}])"
 
+    def _search_filter(self, category_filter, since, until, passages=False):
+        """
+        Builds the filter expression of a search restricted to categories and to
+        a date range. `since` and `until` are inclusive dates, datetimes or date
+        strings.
+        """
+        clauses = []
         if category_filter:
-            expr = f'categories LIKE "%{category_filter}%"'
+            clauses.append(
+                self._category_expr(category_filter, legacy=False if passages else None)
+            )
+        fields = self._passage_fields if passages else self._schema_fields()
+        for bound, operator in ((since, ">="), (until, "<=")):
+            if bound is None:
+                continue
+            day = epoch_day(bound)
+            if "date_day" in fields:
+                clauses.append(f"date_day {operator} {day}")
+            else:
+                # 'yyyy-mm-dd' strings compare in date order
+                clauses.append(f'date {operator} "{iso_date(day)}"')
+        return " and ".join(clauses) or None
 
-        collection = Collection(self.collection_name)
-        results = collection.search(
-            data=[query_vector],
-            anns_field="vector",
-            param=search_params,
-            limit=limit,
-            expr=expr,
-            output_fields=["title", "author", "date", "text", "categories"],
+    def _search_partitions(self, collection, since, until):
+        if since is None and until is None:
+            return None
+        return self._date_partitions(
+            collection,
+            epoch_day(since) if since is not None else None,
+            epoch_day(until) if until is not None else None,
         )
 
-        formatted_results = []
-        for result in results[0]:
-            formatted_results.append(
-                {
-                    "title": result.entity.title,
-                    "author": result.entity.author,
-                    "date": result.entity.date,
-                    "text": result.entity.text,
-                    "categories": result.entity.categories,
-                    "distance": result.distance,
-                }
+    def _first_pass(self, passages=False):
+        """
+        How the documents, or the passages, are searched for candidates: "binary"
+        on the sign-bit field, "lossy" on a quantized index, or None when the
+        index scores are exact enough to return as they are.
+        """
+        fields = self._passage_fields if passages else self._schema_fields()
+        if "binary_vector" in fields:
+            return "binary"
+        if self._active_index.index_type in LOSSY_INDEX_TYPES:
+            return "lossy"
+        return None
+
+    def _fetch_rows(self, ids, output_fields, passages=False):
+        """
+        Fetches `output_fields` of the rows of `ids`, keyed by id.
+        """
+        rows = {}
+        ids = list(ids)
+        for start in range(0, len(ids), MAX_QUERY_IDS):
+            chunk = ids[start : start + MAX_QUERY_IDS]
+            for row in self._run(
+                lambda collection: collection.query(
+                    expr=f"id in {chunk}", output_fields=["id"] + output_fields
+                ),
+                passages=passages,
+            ):
+                rows[row["id"]] = row
+        return rows
+
+    def _vector_search(
+        self,
+        query_vectors,
+        limit,
+        expr=None,
+        output_fields=(),
+        since=None,
+        until=None,
+        passages=False,
+    ):
+        """
+        Searches the documents, or the passages, for the `limit` nearest
+        neighbours of each query. Quantized collections are searched for
+        `rerank_factor` (by default DEFAULT_RERANK_FACTORS) times more
+        candidates, which are then re-ranked exactly with their full-precision
+        vectors.
+
+        Returns:
+            list: For each query, hit dicts with 'id', 'distance' and the
+                `output_fields`, most similar first.
+        """
+        output_fields = list(output_fields)
+        first_pass = self._first_pass(passages)
+        fetch = limit
+        if first_pass:
+            factor = self.rerank_factor or DEFAULT_RERANK_FACTORS[first_pass]
+            fetch = min(limit * factor, 16384)
+        if first_pass == "binary":
+            anns_field, data, param = (
+                "binary_vector",
+                binarize(query_vectors),
+                BINARY_SEARCH_PARAMS,
+            )
+        else:
+            anns_field, data, param = (
+                "vector",
+                query_vectors.tolist(),
+                self._active_index.search_param(limit=fetch),
             )
 
-        logging.info("Search completed.")
+        results = self._run(
+            lambda collection: collection.search(
+                data=data,
+                anns_field=anns_field,
+                param=param,
+                limit=fetch,
+                expr=expr,
+                output_fields=[] if first_pass else output_fields,
+                partition_names=self._search_partitions(collection, since, until),
+            ),
+            passages=passages,
+        )
+        if not first_pass:
+            return [
+                [
+                    dict(
+                        {field: hit.entity.get(field) for field in output_fields},
+                        id=hit.id,
+                        distance=hit.distance,
+                    )
+                    for hit in hits
+                ]
+                for hits in results
+            ]
+
+        candidates = [list(hits.ids) for hits in results]
+        vectors = self._fetch_rows(
+            {hit for ids in candidates for hit in ids}, ["vector"], passages
+        )
+        reranked = rerank(
+            query_vectors,
+            candidates,
+            {hit: row["vector"] for hit, row in vectors.items()},
+            limit,
+        )
+        rows = {}
+        if output_fields:
+            rows = self._fetch_rows(
+                {hit for hits in reranked for hit, _ in hits}, output_fields, passages
+            )
+        return [
+            [
+                dict(
+                    {field: rows.get(hit, {}).get(field) for field in output_fields},
+                    id=hit,
+                    distance=self._active_index.distance(similarity),
+                )
+                for hit, similarity in hits
+            ]
+            for hits in reranked
+        ]
+
+    def search_similar(
+        self,
+        query_text,
+        category_filter=None,
+        limit=3,
+        projection="full",
+        since=None,
+        until=None,
+    ):
+        """
+        Searches for similar text in the collection based on embeddings.
+        `category_filter` is a category name or a list of names (matches any);
+        `since` and `until` restrict the documents' dates, inclusively.
+        `projection` selects the returned fields: "full", "light" (no text) or
+        "ids" (ids and distances only); see get_by_ids for hydrating hits later.
+        """
+        return self.search_many(
+            [query_text], category_filter, limit, projection, since=since, until=until
+        )[0]
+
+    def search_many(
+        self,
+        queries,
+        category_filter=None,
+        limit=3,
+        projection="full",
+        batch_size=64,
+        since=None,
+        until=None,
+    ):
+        """
+        Batched search_similar: one embedding pass and one search request for
+        all queries.
+
+        Returns:
+            list: For each query, its matching documents, most similar first.
+        """
+        output_fields = PROJECTIONS[projection]
+        if not queries:
+            return []
+        query_vectors = self.embed_texts(queries, batch_size=batch_size)
+        expr = self._search_filter(category_filter, since, until)
+        formatted_results = self._vector_search(
+            query_vectors, limit, expr, output_fields, since, until
+        )
+
+        logging.info(f"Search completed for {len(queries)} queries.")
         return formatted_results
 
-    def check_text_existence(self, text, similarity_threshold=0.9):
+    def get_by_ids(self, ids, projection="full"):
+        """
+        Fetches the documents of `ids` in one query, serving hot documents from
+        an in-process LRU cache. Only full documents are cached; a "light"
+        projection is served from the cache when possible but not added to it.
+
+        Returns:
+            list: One document dict per id, in input order, or None for ids that
+                don't exist.
+        """
+        fields = PROJECTIONS[projection]
+        documents = self._documents.get_many(ids)
+        missing = list(set(ids) - set(documents))
+        if missing:
+            rows = self._run(
+                lambda collection: collection.query(
+                    expr=f"id in {missing}", output_fields=["id"] + fields
+                )
+            )
+            fetched = {
+                row["id"]: dict(
+                    {field: row.get(field) for field in fields}, id=row["id"]
+                )
+                for row in rows
+            }
+            if projection == "full":
+                self._documents.put_many(fetched)
+            documents.update(fetched)
+        return [
+            (
+                dict({field: document[field] for field in fields}, id=document["id"])
+                if document is not None
+                else None
+            )
+            for document in (documents.get(document_id) for document_id in ids)
+        ]
+
+    def search_passages(
+        self,
+        queries,
+        category_filter=None,
+        limit=3,
+        passages_per_document=2,
+        batch_size=64,
+        since=None,
+        until=None,
+    ):
+        """
+        Searches the passages collection and groups the hits by parent document:
+        for each query, the `limit` best documents with their light metadata and
+        up to `passages_per_document` matching passages, in reading order.
+        `since` and `until` restrict dates as in search_similar.
+
+        Returns:
+            list: For each query, a list of documents, most similar first. Each has
+                'id', 'title', 'author', 'date', 'categories', the 'distance' of
+                its best passage and its 'passages' ('position', 'text',
+                'distance').
+        """
+        if not queries:
+            return []
+        query_vectors = self.embed_texts(queries, batch_size=batch_size)
+        # Over-fetch so enough distinct documents survive the grouping
+        fetch = min(limit * passages_per_document * 4, 16384)
+        self._get_collection(passages=True)  # Loads the passage fields
+        expr = self._search_filter(category_filter, since, until, passages=True)
+        results = self._vector_search(
+            query_vectors,
+            fetch,
+            expr,
+            ["parent_id", "position", "text"],
+            since,
+            until,
+            passages=True,
+        )
+
+        grouped_results = []
+        for hits in results:
+            groups = {}  # Insertion order is best passage first
+            for hit in hits:
+                parent_id = hit["parent_id"]
+                group = groups.get(parent_id)
+                if group is None:
+                    if len(groups) == limit:
+                        continue
+                    group = groups[parent_id] = {
+                        "id": parent_id,
+                        "distance": hit["distance"],
+                        "passages": [],
+                    }
+                if len(group["passages"]) < passages_per_document:
+                    group["passages"].append(
+                        {
+                            "position": hit["position"],
+                            "text": hit["text"],
+                            "distance": hit["distance"],
+                        }
+                    )
+            grouped_results.append(list(groups.values()))
+
+        # One metadata query for the documents of every query
+        parent_ids = list(
+            {group["id"] for groups in grouped_results for group in groups}
+        )
+        parents = dict(zip(parent_ids, self.get_by_ids(parent_ids, "light")))
+        for groups in grouped_results:
+            for group in groups:
+                group.update(parents.get(group["id"]) or {})
+                group["passages"].sort(key=lambda passage: passage["position"])
+
+        logging.info(f"Passage search completed for {len(queries)} queries.")
+        return grouped_results
+
+    def document_cache_stats(self):
+        """
+        Returns the hit and miss counters of the get_by_ids cache.
+        """
+        return self._documents.stats()
+
+    def check_text_existence(self, text=None, similarity_threshold=0.9, vector=None):
         """
         Checks if the provided text has a similar instance in the database.
 
         Parameters:
             text (str): The text to check for similarity.
             similarity_threshold (float): The similarity score threshold to consider it as existing.
+            vector (list): Precomputed embedding of the text, used instead of `text`.
 
         Returns:
             dict: A dictionary containing the most similar text and its similarity score if found,
                 or None if no similar text meets the threshold.
         """
-        self._ensure_collection_ready()
+        if vector is not None:
+            return self.check_many_existence(
+                similarity_threshold=similarity_threshold, vectors=[vector]
+            )[0]
+        return self.check_many_existence([text], similarity_threshold)[0]
 
-        # Generate embedding for the input text
-        query_vector = self.embedder.encode(text).tolist()
+    def check_many_existence(
+        self, texts=None, similarity_threshold=0.9, batch_size=64, vectors=None
+    ):
+        """
+        Batched check_text_existence: one embedding pass and one search for all texts.
+        Precomputed embeddings can be passed in `vectors` instead of the texts.
 
-        # Search for the most similar text
-        search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-        collection = Collection(self.collection_name)
-        results = collection.search(
-            data=[query_vector],
-            anns_field="vector",
-            param=search_params,
-            limit=1,  # Only return the most similar result
-            output_fields=["text", "title", "author", "date", "categories"],
-        )
+        Before asking Milvus, each vector is compared with the recently ingested
+        vectors and with the earlier texts of the same batch; Milvus is only
+        searched for the vectors those checks don't resolve.
+
+        Returns:
+            list: For each text, the most similar stored document or None.
+        """
+        if vectors is None:
+            if not texts:
+                return []
+            # Generate embeddings for all input texts at once
+            vectors = self.embed_texts(texts, batch_size=batch_size)
+        if len(vectors) == 0:
+            return []
+        vectors = normalize(vectors)
+        matches = [None] * len(vectors)
+
+        # Recently ingested documents may not be searchable in Milvus yet
+        for i, recent in enumerate(self._recent.match(vectors)):
+            if recent and recent[0] >= similarity_threshold:
+                matches[i] = dict(recent[1], similarity_score=recent[0])
+
+        # Earlier texts of the same batch are about to be inserted too
+        similarities = vectors @ vectors.T
+        for i in range(1, len(vectors)):
+            if matches[i] is None:
+                j = int(similarities[i, :i].argmax())
+                if similarities[i, j] >= similarity_threshold:
+                    matches[i] = {
+                        "text": texts[j] if texts else None,
+                        "title": None,
+                        "author": None,
+                        "date": None,
+                        "categories": None,
+                        "similarity_score": float(similarities[i, j]),
+                    }
+
+        unresolved = [i for i, match in enumerate(matches) if match is None]
+        if not unresolved:
+            return matches
+
+        # Search for the most similar text of each input; only ids and distances
+        # come back, most inputs are below the threshold and need nothing else
+        results = self._vector_search(vectors[unresolved], 1)
 
-        if results[0]:
-            top_result = results[0][0]  # Get the top result
-            similarity_score = (
-                1 - top_result.distance
-            )  # Convert distance to similarity score for IP metric
-
-            if similarity_score >= similarity_threshold:
-                return {
-                    "text": top_result.entity.get("text"),
-                    "title": top_result.entity.get("title"),
-                    "author": top_result.entity.get("author"),
-                    "date": top_result.entity.get("date"),
-                    "categories": top_result.entity.get("categories"),
-                    "similarity_score": similarity_score,
+        duplicates = {}
+        for i, hits in zip(unresolved, results):
+            if hits:
+                top_result = hits[0]  # Get the top result
+                # Cosine similarity, whatever metric the index was built with
+                similarity_score = self._active_index.similarity(top_result["distance"])
+
+                if similarity_score >= similarity_threshold:
+                    duplicates[i] = (top_result["id"], similarity_score)
+
+        if duplicates:
+            documents = self.get_by_ids([hit[0] for hit in duplicates.values()])
+            for (i, (_, similarity_score)), document in zip(
+                duplicates.items(), documents
+            ):
+                # A document deleted since the search is still a duplicate
+                fields = {
+                    key: document[key] if document else None
+                    for key in PROJECTIONS["full"]
                 }
+                matches[i] = dict(fields, similarity_score=similarity_score)
 
-        return None  # No similar text found above the threshold
+        return matches
 
-    def count_documents(self):
+    def sample_texts(self, limit=200):
         """
-        Counts the number of documents in the collection.
+        Returns the texts of up to `limit` stored documents, e.g. to calibrate the
+        categorizer on articles like the ones it will score.
         """
-        self._ensure_collection_ready()
-
-        collection = Collection(self.collection_name)
-        count = collection.num_entities  # Get the total number of entities
-        logging.info(f"Collection '{self.collection_name}' contains {count} documents.")
-        return count
+        rows = self._run(
+            lambda collection: collection.query(
+                'text != ""', output_fields=["text"], limit=limit
+            )
+        )
+        return [row["text"] for row in rows]
 
     def count_documents(self):
         """
         Counts the number of documents in the collection.
         """
-        self._ensure_collection_ready()
-
-        collection = Collection(self.collection_name)
-        count = collection.num_entities  # Get the total number of entities
+        count = self._run(
+            lambda collection: collection.num_entities
+        )  # Get the total number of entities
         logging.info(f"Collection '{self.collection_name}' contains {count} documents.")
         return count
 
@@ -0,0 +1,63 @@
+import threading
+import numpy as np
+
+
+def normalize(vectors):
+    """
+    Returns the vectors as an L2-normalized float32 matrix.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class RecentVectorCache:
+    def __init__(self, capacity, dimension):
+        """
+        Ring buffer of the last `capacity` ingested embeddings and their metadata.
+        Recently inserted documents are not searchable in Milvus until they are
+        flushed and loaded, so near-duplicates are checked here first with one
+        matrix product. A capacity of 0 disables the cache.
+        """
+        capacity = max(capacity, 0)
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.documents = [None] * capacity
+        self.size = 0
+        self.next = 0
+        self._lock = threading.Lock()
+
+    def add(self, vectors, documents):
+        if not self.capacity:
+            return
+        vectors = normalize(vectors)
+        with self._lock:
+            for vector, document in zip(vectors, documents):
+                self.vectors[self.next] = vector
+                self.documents[self.next] = document
+                self.next = (self.next + 1) % self.capacity
+                self.size = min(self.size + 1, self.capacity)
+
+    def match(self, vectors):
+        """
+        Finds the most similar cached document for each vector.
+
+        Returns:
+            list: (cosine similarity, document) per vector, or None when empty.
+        """
+        vectors = normalize(vectors)
+        with self._lock:
+            if self.size == 0:
+                return [None] * len(vectors)
+            similarities = vectors @ self.vectors[: self.size].T
+            best = similarities.argmax(axis=1)
+            return [
+                (float(similarities[i, j]), self.documents[j])
+                for i, j in enumerate(best)
+            ]
+
+    def clear(self):
+        with self._lock:
+            self.documents = [None] * self.capacity
+            self.size = 0
+            self.next = 0
@@ -0,0 +1,69 @@
+import numpy as np
+
+from .near_duplicates import normalize
+
+# First-pass encodings: full float32 vectors, an int8 scalar-quantized index
+# (IVF_SQ8) or one sign bit per dimension in a BINARY_VECTOR field
+QUANTIZATION_MODES = ("none", "int8", "binary")
+# Index types whose scores are approximate and benefit from an exact re-rank
+LOSSY_INDEX_TYPES = ("IVF_SQ8", "IVF_PQ")
+BINARY_INDEX_PARAMS = {
+    "index_type": "BIN_IVF_FLAT",
+    "metric_type": "HAMMING",
+    "params": {"nlist": 1024},
+}
+BINARY_SEARCH_PARAMS = {"metric_type": "HAMMING", "params": {"nprobe": 32}}
+# Candidates re-ranked per result: sign bits need ~8x for 0.99 recall@10 in
+# benchmarks/bench_quantization.py, int8 codes ~2x
+DEFAULT_RERANK_FACTORS = {"binary": 8, "lossy": 2}
+
+
+def binarize(vectors):
+    """
+    Packs the sign of each dimension into bits, 8 dimensions per byte, as
+    expected by a Milvus BINARY_VECTOR field.
+
+    Returns:
+        list: One bytes object of dimension / 8 bytes per vector.
+    """
+    bits = np.packbits(np.asarray(vectors) > 0, axis=1)
+    return [row.tobytes() for row in bits]
+
+
+def quantize_int8(vectors):
+    """
+    Scalar-quantizes normalized vectors to int8 with one scale per vector.
+
+    Returns:
+        tuple: The int8 codes and the float32 scales to multiply them by.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.maximum(np.abs(vectors).max(axis=1, keepdims=True), 1e-12) / 127
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def rerank(queries, candidates, vectors, limit):
+    """
+    Re-scores first-pass candidates with their full-precision vectors.
+
+    Parameters:
+        queries (array): Normalized query vectors.
+        candidates (list): For each query, the candidate ids of the first pass.
+        vectors (dict): Full-precision vector of each candidate id.
+        limit (int): Number of results to keep per query.
+
+    Returns:
+        list: For each query, up to `limit` (id, cosine similarity) pairs, most
+            similar first. Candidates without a vector are dropped.
+    """
+    results = []
+    for query, ids in zip(queries, candidates):
+        ids = [candidate for candidate in ids if candidate in vectors]
+        if not ids:
+            results.append([])
+            continue
+        scores = normalize([vectors[candidate] for candidate in ids]) @ query
+        order = np.argsort(-scores)[:limit]
+        results.append([(ids[i], float(scores[i])) for i in order])
+    return results
@@ -0,0 +1,44 @@
+import argparse
+import logging
+
+from app.milvus_handler.milvus_client import MilvusClient
+
+
+def main():
+    """
+    Tunes the search parameters of a collection for the configured recall target.
+
+    Usage:
+        python -m app.milvus_handler.tune --collection ai_ml_knowledge --force
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s]: %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    parser = argparse.ArgumentParser(description="Tune Milvus search parameters.")
+    parser.add_argument("--collection", default="ai_ml_knowledge")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-tune even if the stored result is fresh",
+    )
+    args = parser.parse_args()
+
+    client = MilvusClient(collection_name=args.collection)
+    if client.tuner is None:
+        print("[INFO] Search tuning is disabled; set SEARCH_TUNING=True.")
+        return
+    record = client.tune_search_params(force=args.force)
+    if record is None:
+        print(f"[INFO] '{args.collection}' is too small or its index has no knob.")
+    else:
+        print(
+            f"[INFO] '{args.collection}': {record['knob']}={record['value']} "
+            f"(recall@{record['k']} {record['recall']:.3f}, "
+            f"{record['documents']} documents)."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from .near_duplicates import normalize
+
+# Query ids are drawn from this many times `sample_size` stored ids
+SAMPLE_SCAN_FACTOR = 10
+
+
+def exact_top_k(chunks, queries, k, exclude_ids=None):
+    """
+    Brute-force top-k ids by cosine similarity, streamed over `chunks` of
+    (ids, vectors) so the corpus never has to fit in memory at once.
+    `exclude_ids[i]`, when given, is never returned for query i.
+    """
+    queries = normalize(queries)
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for ids, vectors in chunks:
+        ids = np.asarray(ids, dtype=np.int64)
+        scores = queries @ normalize(vectors).T
+        if exclude_ids is not None:
+            scores[np.asarray(exclude_ids)[:, None] == ids[None, :]] = -np.inf
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate(
+            [best_ids, np.broadcast_to(ids, scores.shape)], axis=1
+        )
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    return best_ids
+
+
+def recall_at_k(found, truth):
+    """
+    Fraction of the exact neighbours that were found, over all queries.
+    """
+    total = sum(len(expected) for expected in truth)
+    hits = sum(len(set(ids) & set(expected)) for ids, expected in zip(found, truth))
+    return hits / total if total else 1.0
+
+
+class TuningStore:
+    def __init__(self, path):
+        """
+        JSON file of tuning results keyed by collection. Writes replace the file
+        atomically so processes sharing it never read a partial file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key):
+        with self._lock:
+            return self._read().get(key)
+
+    def _write(self, records):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump(records, handle, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def put(self, key, record):
+        with self._lock:
+            records = self._read()
+            records[key] = record
+            self._write(records)
+
+    def discard(self, key):
+        with self._lock:
+            records = self._read()
+            if records.pop(key, None) is not None:
+                self._write(records)
+
+
+class SearchTuner:
+    def __init__(
+        self,
+        recall_target=0.95,
+        k=10,
+        sample_size=200,
+        growth_factor=2.0,
+        min_documents=1000,
+        store=None,
+    ):
+        """
+        Picks the smallest nprobe/ef that reaches `recall_target` recall@k against
+        brute force on a sample of stored vectors. Results are kept per collection
+        in `store` and go stale once the collection grows by `growth_factor`.
+        Collections under `min_documents` keep the default search parameters.
+        """
+        self.recall_target = recall_target
+        self.k = k
+        self.sample_size = sample_size
+        self.growth_factor = growth_factor
+        self.min_documents = min_documents
+        self.store = store
+
+    @classmethod
+    def from_env(cls):
+        """
+        Reads the SEARCH_TUNING_* settings. Tuning is opt-in: returns None unless
+        SEARCH_TUNING is "True", which pins the search parameters to
+        MILVUS_SEARCH_PARAMS.
+        """
+        if os.getenv("SEARCH_TUNING", "False") != "True":
+            return None
+        return cls(
+            recall_target=float(os.getenv("SEARCH_RECALL_TARGET", 0.95)),
+            k=int(os.getenv("SEARCH_TUNING_K", 10)),
+            sample_size=int(os.getenv("SEARCH_TUNING_SAMPLE", 200)),
+            growth_factor=float(os.getenv("SEARCH_TUNING_GROWTH", 2.0)),
+            min_documents=int(os.getenv("SEARCH_TUNING_MIN_DOCUMENTS", 1000)),
+            store=TuningStore(os.getenv("SEARCH_TUNING_PATH", "search_tuning.json")),
+        )
+
+    def candidates(self, index_config):
+        """
+        Values of the index's search knob to try, in increasing order of cost.
+        """
+        if index_config.search_knob == "nprobe":
+            nlist = int(index_config.build_params.get("nlist", 1024))
+            values = [1]
+            while values[-1] < nlist:
+                values.append(min(values[-1] * 2, nlist))
+            return values
+        if index_config.search_knob == "ef":
+            # Milvus requires ef >= limit; tune() searches k + 1 hits
+            values = [max(self.k + 1, 8)]
+            while values[-1] < 2048:
+                values.append(values[-1] * 2)
+            return values
+        return []
+
+    def is_stale(self, record, index_config, documents):
+        """
+        Tells whether `record` has to be (re)computed for a collection holding
+        `documents` documents under `index_config`.
+        """
+        if index_config.search_knob is None or documents < self.min_documents:
+            return False
+        if record is None:
+            return True
+        if (record["index_type"], record["metric_type"], record["k"]) != (
+            index_config.index_type,
+            index_config.metric_type,
+            self.k,
+        ):
+            return True
+        if record["recall_target"] != self.recall_target:
+            return True
+        return documents >= record["documents"] * self.growth_factor
+
+    def next_check(self, record):
+        """
+        Collection size at which `record` should be checked again.
+        """
+        if record is None:
+            return self.min_documents
+        return max(int(record["documents"] * self.growth_factor), self.min_documents)
+
+    def _sample_ids(self, collection, batch_size):
+        """
+        Draws the query ids from the first `sample_size * SAMPLE_SCAN_FACTOR` ids
+        of a bounded query_iterator, so large collections aren't read whole.
+        """
+        iterator = collection.query_iterator(
+            batch_size=min(batch_size, self.sample_size * SAMPLE_SCAN_FACTOR),
+            limit=self.sample_size * SAMPLE_SCAN_FACTOR,
+            expr="id >= 0",
+            output_fields=["id"],
+        )
+        ids = []
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                ids.extend(row["id"] for row in rows)
+        finally:
+            iterator.close()
+        size = min(self.sample_size, len(ids))
+        return np.random.default_rng().choice(ids, size=size, replace=False).tolist()
+
+    def _iter_vectors(self, collection, batch_size):
+        iterator = collection.query_iterator(
+            batch_size=batch_size, expr="id >= 0", output_fields=["vector"]
+        )
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                yield [row["id"] for row in rows], np.array(
+                    [row["vector"] for row in rows], dtype=np.float32
+                )
+        finally:
+            iterator.close()
+
+    def tune(self, collection, index_config, documents, batch_size=1000):
+        """
+        Measures recall@k for each candidate value on `collection` and returns the
+        tuning record of the smallest value that reaches the target.
+
+        The queries are stored vectors held out of their own ground truth: each
+        query's exact neighbours and search hits exclude the query document.
+        """
+        started = time.perf_counter()
+        query_ids = self._sample_ids(collection, batch_size)
+        rows = collection.query(
+            expr=f"id in {query_ids}", output_fields=["id", "vector"]
+        )
+        query_ids = [row["id"] for row in rows]
+        queries = normalize(np.array([row["vector"] for row in rows], np.float32))
+        truth = exact_top_k(
+            self._iter_vectors(collection, batch_size),
+            queries,
+            self.k,
+            exclude_ids=query_ids,
+        ).tolist()
+
+        knob = index_config.search_knob
+        chosen, recall = None, 0.0
+        for value in self.candidates(index_config):
+            results = collection.search(
+                data=queries.tolist(),
+                anns_field="vector",
+                param=index_config.search_param({knob: value}, limit=self.k + 1),
+                limit=self.k + 1,  # One extra for the query document itself
+            )
+            found = [
+                [hit for hit in hits.ids if hit != query_id][: self.k]
+                for query_id, hits in zip(query_ids, results)
+            ]
+            chosen, recall = value, recall_at_k(found, truth)
+            if recall >= self.recall_target:
+                break
+        if recall < self.recall_target:
+            logging.warning(
+                f"Recall target {self.recall_target} not reached; "
+                f"using {knob}={chosen} (recall {recall:.3f})."
+            )
+
+        logging.info(
+            f"Tuned {knob}={chosen} for {documents} documents: recall@{self.k} "
+            f"{recall:.3f} in {time.perf_counter() - started:.1f}s."
+        )
+        return {
+            "index_type": index_config.index_type,
+            "metric_type": index_config.metric_type,
+            "knob": knob,
+            "value": chosen,
+            "recall": recall,
+            "recall_target": self.recall_target,
+            "k": self.k,
+            "documents": documents,
+            "tuned_at": time.time(),
+        }
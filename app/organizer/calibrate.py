@@ -0,0 +1,61 @@
+import argparse
+import logging
+import time
+
+from app.organizer.categorizer import (
+    CALIBRATION_PATH,
+    DEFAULT_MODEL,
+    ContentCategorizer,
+    save_calibration,
+)
+from app.registry import get_milvus_client
+from app.worker.worker import CANDIDATE_CATEGORIES
+
+
+def main():
+    """
+    Fits the similarity calibration of the embedding categorizer to the NLI
+    scores of a sample of stored articles, and saves it where the categorizer
+    reads its defaults.
+
+    Usage:
+        python -m app.organizer.calibrate --collection ai_ml_knowledge --sample 200
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s]: %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    parser = argparse.ArgumentParser(description="Calibrate the categorizer.")
+    parser.add_argument("--collection", default="ai_ml_knowledge")
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--output", default=CALIBRATION_PATH)
+    args = parser.parse_args()
+
+    texts = get_milvus_client(collection_name=args.collection).sample_texts(args.sample)
+    if not texts:
+        print(f"[INFO] '{args.collection}' has no articles to calibrate on.")
+        return
+    categorizer = ContentCategorizer(model_name=args.model)
+    scale, center = categorizer.calibrate(texts, CANDIDATE_CATEGORIES)
+    save_calibration(
+        {
+            "scale": scale,
+            "center": center,
+            "model": args.model,
+            "collection": args.collection,
+            "samples": len(texts),
+            "labels": len(CANDIDATE_CATEGORIES),
+            "fitted_at": int(time.time()),
+        },
+        args.output,
+    )
+    print(
+        f"[INFO] Fitted scale={scale:.3f}, center={center:.3f} on {len(texts)} "
+        f"articles of '{args.collection}'; saved to {args.output}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,420 @@
 from transformers import pipeline
+from app.embeddings.generator import get_embedder
+import numpy as np
+import json
+import os
+import threading
+import torch
+
+DEFAULT_MODEL = "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli"
+HYPOTHESIS_TEMPLATE = "This example is {}."  # Same template as the HF pipeline
+
+# Long articles are split into overlapping token windows that each fit in one
+# premise/hypothesis pair, instead of being silently truncated
+WINDOW_TOKENS = int(os.getenv("CATEGORIZER_WINDOW_TOKENS", 320))
+WINDOW_STRIDE = int(os.getenv("CATEGORIZER_WINDOW_STRIDE", 256))
+MAX_WINDOWS = int(os.getenv("CATEGORIZER_MAX_WINDOWS", 8))
+
+# Logistic calibration of cosine similarity into an NLI-like probability, fitted
+# by `python -m app.organizer.calibrate` and stored in CATEGORIZER_CALIBRATION_PATH.
+# CATEGORIZER_SCALE/CENTER override the file; without either the values are
+# unfitted placeholders, not to be relied on with CATEGORIZER_MODE=embedding
+CALIBRATION_PATH = os.getenv(
+    "CATEGORIZER_CALIBRATION_PATH", "categorizer_calibration.json"
+)
+
+
+def load_calibration(path=CALIBRATION_PATH):
+    """
+    Returns the calibration saved by save_calibration, or {} if there is none.
+    """
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_calibration(record, path=CALIBRATION_PATH):
+    """
+    Writes a calibration record, replacing the file atomically.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as handle:
+        json.dump(record, handle, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+_calibration = load_calibration()
+DEFAULT_SCALE = float(os.getenv("CATEGORIZER_SCALE", _calibration.get("scale", 20.0)))
+DEFAULT_CENTER = float(os.getenv("CATEGORIZER_CENTER", _calibration.get("center", 0.3)))
+
+_classifiers = {}
+_lock = threading.Lock()
+
+
+def get_classifier(model_name=DEFAULT_MODEL):
+    """
+    Returns the process-wide zero-shot pipeline for `model_name`, loading it once.
+    """
+    classifier = _classifiers.get(model_name)
+    if classifier is None:
+        with _lock:
+            classifier = _classifiers.get(model_name)
+            if classifier is None:
+                classifier = pipeline("zero-shot-classification", model=model_name)
+                _classifiers[model_name] = classifier
+    return classifier
 
 
 class ContentCategorizer:
-    def __init__(self):
-        self.classifier = pipeline(
-            "zero-shot-classification", model="MoritzLaurer/mDeBERTa-v3-base-mnli-xnli"
-        )
+    def __init__(
+        self,
+        model_name=DEFAULT_MODEL,
+        mode=None,
+        embedder=None,
+        ambiguity_margin=float(os.getenv("CATEGORIZER_AMBIGUITY_MARGIN", 0.1)),
+        scale=DEFAULT_SCALE,
+        center=DEFAULT_CENTER,
+    ):
+        """
+        Parameters:
+            mode (str): "nli" runs the zero-shot pipeline on every text. "embedding"
+                scores texts by cosine similarity to the label embeddings and only
+                runs NLI for scores within `ambiguity_margin` of the threshold.
+            embedder: Sentence encoder for the embedding mode. Defaults to the
+                shared one used for Milvus, so article vectors can be reused.
+        """
+        self.model_name = model_name
+        self.mode = mode or os.getenv("CATEGORIZER_MODE", "nli")
+        self.ambiguity_margin = ambiguity_margin
+        self.scale = scale
+        self.center = center
+        self._label_vectors = {}  # Normalized label embeddings per label tuple
+        self._embedder = embedder
+        self._classifier = None
+        if self.mode == "nli" or self.ambiguity_margin > 0:
+            self._classifier = get_classifier(model_name)
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            self._classifier = get_classifier(self.model_name)
+        return self._classifier
 
-    def categorize(self, text, candidate_labels, threshold=0.3, multi_label=True):
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def categorize(
+        self,
+        text,
+        candidate_labels,
+        threshold=0.3,
+        multi_label=True,
+        embedding=None,
+        windows=None,
+    ):
         """
         Clean and categorize text using multi-label zero-shot classification.
         """
+        labels = self.categorize_many(
+            [text],
+            candidate_labels,
+            threshold=threshold,
+            multi_label=multi_label,
+            embeddings=None if embedding is None else [embedding],
+            windows=None if windows is None else [windows],
+        )[0]
+        print(labels)
+        return labels
+
+    def categorize_many(
+        self,
+        texts,
+        candidate_labels,
+        threshold=0.3,
+        multi_label=True,
+        batch_size=32,
+        embeddings=None,
+        windows=None,
+    ):
+        """
+        Categorize several texts with batched model calls.
 
-        # Perform classification
-        result = self.classifier(text, candidate_labels, multi_label=multi_label)
+        Parameters:
+            batch_size (int): Premise/hypothesis pairs per NLI forward pass.
+            embeddings (array): Optional article embeddings, one row per text, used
+                by the embedding mode instead of encoding the texts again.
+            windows (list): Optional NLI windows per text (see window_texts). None
+                entries are filled in place when the NLI model runs.
 
-        # Return all labels with scores above the threshold
-        labels = [
-            label
-            for label, score in zip(result["labels"], result["scores"])
-            if score >= threshold
-        ]
-        print(labels)
+        Returns:
+            list: The labels above the threshold for each text, in input order.
+        """
+        labels = [[] for _ in texts]  # Empty texts get no categories
+        positions = [i for i, text in enumerate(texts) if text]
+        if not positions:
+            return labels
+        selected_texts = [texts[i] for i in positions]
+        selected_windows = [None if windows is None else windows[i] for i in positions]
+
+        if self.mode == "embedding":
+            vectors = None
+            if embeddings is not None:
+                vectors = np.asarray([embeddings[i] for i in positions])
+            scores = self._embedding_scores(
+                selected_texts, candidate_labels, multi_label, vectors
+            )
+            scores = self._resolve_ambiguous(
+                selected_texts,
+                candidate_labels,
+                scores,
+                threshold,
+                multi_label,
+                batch_size,
+                selected_windows,
+            )
+        else:
+            scores = self._nli_scores(
+                selected_texts,
+                candidate_labels,
+                multi_label,
+                batch_size,
+                selected_windows,
+            )
+        if windows is not None:
+            for i, text_windows in zip(positions, selected_windows):
+                windows[i] = text_windows
+
+        # Return all labels with scores above the threshold, best first
+        for position, label_scores in zip(positions, scores):
+            ranked = sorted(label_scores.items(), key=lambda item: -item[1])
+            labels[position] = [label for label, score in ranked if score >= threshold]
         return labels
+
+    def window_texts(self, text):
+        """
+        Splits a text into overlapping windows of at most WINDOW_TOKENS tokens of
+        the NLI tokenizer. Articles needing more than MAX_WINDOWS windows keep an
+        evenly spaced subset, so the end of the article is still read.
+
+        Returns:
+            list: (window text, token count) tuples, reusable across calls.
+        """
+        encoding = self.classifier.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        offsets = encoding["offset_mapping"]
+        if len(offsets) <= WINDOW_TOKENS:
+            return [(text, len(offsets))]
+        last_start = len(offsets) - WINDOW_TOKENS
+        starts = list(range(0, last_start, WINDOW_STRIDE)) + [last_start]
+        if len(starts) > MAX_WINDOWS:
+            step = (len(starts) - 1) / max(MAX_WINDOWS - 1, 1)
+            starts = [starts[round(k * step)] for k in range(MAX_WINDOWS)]
+        return [
+            (
+                text[offsets[start][0] : offsets[start + WINDOW_TOKENS - 1][1]],
+                WINDOW_TOKENS,
+            )
+            for start in starts
+        ]
+
+    def _nli_scores(
+        self, texts, candidate_labels, multi_label, batch_size, windows=None
+    ):
+        """
+        Zero-shot NLI scores as one {label: score} dict per text.
+
+        Every (window, label) pair of every text is scored in fixed-size batches
+        sorted by length, so batches mix articles and carry little padding.
+        Multi-label scores take the best window for each label; single-label scores
+        average the per-window distributions over labels.
+
+        Parameters:
+            windows (list): Optional window_texts() output per text. Missing
+                entries are computed and written back so callers can keep them.
+        """
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        entailment_id = self.classifier.entailment_id
+        contradiction_id = -1 if entailment_id == 0 else 0
+
+        hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in candidate_labels]
+        hypothesis_lengths = [
+            len(ids)
+            for ids in tokenizer(hypotheses, add_special_tokens=False)["input_ids"]
+        ]
+        if windows is None:
+            windows = [None] * len(texts)
+        for i, text in enumerate(texts):
+            if windows[i] is None:
+                windows[i] = self.window_texts(text)
+
+        # One entry per (text, window, label): (length, text, window, label)
+        pairs = [
+            (windows[i][w][1] + hypothesis_lengths[j], i, w, j)
+            for i in range(len(texts))
+            for w in range(len(windows[i]))
+            for j in range(len(candidate_labels))
+        ]
+        pairs.sort()
+
+        logits = {}
+        with torch.inference_mode():
+            for start in range(0, len(pairs), batch_size):
+                batch = pairs[start : start + batch_size]
+                inputs = tokenizer(
+                    [windows[i][w][0] for _, i, w, _ in batch],
+                    [hypotheses[j] for _, _, _, j in batch],
+                    padding=True,
+                    truncation="only_first",
+                    return_tensors="pt",
+                ).to(model.device)
+                outputs = model(**inputs).logits.float().cpu().numpy()
+                for (_, i, w, j), row in zip(batch, outputs):
+                    logits[(i, w, j)] = row
+
+        scores = []
+        for i in range(len(texts)):
+            window_scores = np.empty((len(windows[i]), len(candidate_labels)))
+            for w in range(len(windows[i])):
+                rows = np.stack(
+                    [logits[(i, w, j)] for j in range(len(candidate_labels))]
+                )
+                if multi_label:
+                    pair = rows[:, [contradiction_id, entailment_id]]
+                    pair = np.exp(pair - pair.max(axis=1, keepdims=True))
+                    window_scores[w] = pair[:, 1] / pair.sum(axis=1)
+                else:
+                    entailment = np.exp(
+                        rows[:, entailment_id] - rows[:, entailment_id].max()
+                    )
+                    window_scores[w] = entailment / entailment.sum()
+            aggregated = (
+                window_scores.max(axis=0) if multi_label else window_scores.mean(axis=0)
+            )
+            scores.append(dict(zip(candidate_labels, aggregated.tolist())))
+        return scores
+
+    def _get_label_vectors(self, candidate_labels):
+        """
+        Embeds each label description once and caches the normalized vectors.
+        """
+        key = tuple(candidate_labels)
+        vectors = self._label_vectors.get(key)
+        if vectors is None:
+            vectors = self._normalize(self.embedder.encode(list(candidate_labels)))
+            self._label_vectors[key] = vectors
+        return vectors
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _similarities(self, texts, candidate_labels, vectors=None):
+        if vectors is None:
+            vectors = self.embedder.encode(list(texts))
+        return self._normalize(vectors) @ self._get_label_vectors(candidate_labels).T
+
+    def _embedding_scores(self, texts, candidate_labels, multi_label, vectors=None):
+        """
+        Calibrated similarity scores as one {label: score} dict per text. Multi-label
+        scores are independent sigmoids, single-label scores a softmax over labels,
+        mirroring how the NLI pipeline scores the two cases.
+        """
+        logits = self.scale * (
+            self._similarities(texts, candidate_labels, vectors) - self.center
+        )
+        if multi_label:
+            probabilities = 1 / (1 + np.exp(-logits))
+        else:
+            exponentials = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities = exponentials / exponentials.sum(axis=1, keepdims=True)
+        return [dict(zip(candidate_labels, row.tolist())) for row in probabilities]
+
+    def _resolve_ambiguous(
+        self,
+        texts,
+        candidate_labels,
+        scores,
+        threshold,
+        multi_label,
+        batch_size,
+        windows=None,
+    ):
+        """
+        Re-scores with NLI the labels whose embedding score falls within
+        `ambiguity_margin` of the threshold, in one batched NLI call. Multi-label
+        scores are independent, so only ambiguous labels are replaced; single-label
+        texts are re-scored whole.
+        """
+        if self.ambiguity_margin <= 0:
+            return scores
+        if windows is None:
+            windows = [None] * len(texts)
+        ambiguous = {}
+        for i, label_scores in enumerate(scores):
+            labels = [
+                label
+                for label, score in label_scores.items()
+                if abs(score - threshold) <= self.ambiguity_margin
+            ]
+            if labels:
+                ambiguous[i] = labels
+        if not ambiguous:
+            return scores
+
+        positions = sorted(ambiguous)
+        if multi_label:
+            union = {label for labels in ambiguous.values() for label in labels}
+            labels = [label for label in candidate_labels if label in union]
+        else:
+            labels = candidate_labels
+        nli_windows = [windows[i] for i in positions]
+        nli_scores = self._nli_scores(
+            [texts[i] for i in positions], labels, multi_label, batch_size, nli_windows
+        )
+        for i, label_scores, text_windows in zip(positions, nli_scores, nli_windows):
+            windows[i] = text_windows
+            if multi_label:
+                scores[i].update({label: label_scores[label] for label in ambiguous[i]})
+            else:
+                scores[i] = label_scores
+        return scores
+
+    def calibrate(self, texts, candidate_labels, steps=1000, learning_rate=0.5):
+        """
+        Fits the logistic scale and center so that embedding scores track the
+        multi-label NLI scores on `texts`, keeping thresholds comparable between
+        the two modes.
+
+        Returns:
+            tuple: The fitted (scale, center).
+        """
+        similarities = self._similarities(texts, candidate_labels).ravel()
+        targets = np.asarray(
+            [
+                [label_scores[label] for label in candidate_labels]
+                for label_scores in self._nli_scores(
+                    texts, candidate_labels, True, batch_size=8
+                )
+            ]
+        ).ravel()
+
+        # Plain logistic regression of the NLI scores on the similarity
+        weight, bias = self.scale, -self.scale * self.center
+        for _ in range(steps):
+            predictions = 1 / (1 + np.exp(-(weight * similarities + bias)))
+            error = predictions - targets
+            weight -= learning_rate * float(np.mean(error * similarities))
+            bias -= learning_rate * float(np.mean(error))
+        self.scale, self.center = weight, -bias / weight
+        return self.scale, self.center
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+
+from app.cleaner.cleaner import TextCleaner
+from app.embeddings.generator import get_embedder
+from app.organizer.categorizer import ContentCategorizer
+
+_clients = {}
+_categorizer = None
+_lock = threading.Lock()
+_settings = {}
+
+
+def configure(backend=None, local_store_dir=None):
+    """
+    Overrides the VECTOR_BACKEND and LOCAL_STORE_DIR environment settings, e.g.
+    from the Flask config. Only affects clients created afterwards.
+    """
+    if backend is not None:
+        _settings["backend"] = backend
+    if local_store_dir is not None:
+        _settings["local_store_dir"] = local_store_dir
+
+
+def get_milvus_client(host=None, port=None, collection_name="ai_ml_knowledge"):
+    """
+    Returns the process-wide vector store client for a collection: a
+    MilvusClient for a host and port, or a LocalClient when VECTOR_BACKEND is
+    'local'. The client shares the embedder with every other client in the
+    process.
+    """
+    backend = _settings.get("backend") or os.getenv("VECTOR_BACKEND", "milvus")
+    if backend == "local":
+        directory = _settings.get("local_store_dir") or os.getenv(
+            "LOCAL_STORE_DIR", "local_store"
+        )
+        key = ("local", directory, collection_name)
+    elif backend == "milvus":
+        host = host or os.getenv("MILVUS_HOST", "standalone")
+        port = port or os.getenv("MILVUS_PORT", "19530")
+        key = (host, str(port), collection_name)
+    else:
+        raise ValueError(f"Unknown vector backend '{backend}'")
+
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                if backend == "local":
+                    # Imported lazily so each backend only needs its own dependencies
+                    from app.milvus_handler.local_client import LocalClient
+
+                    client = LocalClient(
+                        directory=directory, collection_name=collection_name
+                    )
+                else:
+                    from app.milvus_handler.milvus_client import MilvusClient
+
+                    client = MilvusClient(
+                        host=host, port=port, collection_name=collection_name
+                    )
+                _clients[key] = client
+    return client
+
+
+def get_categorizer():
+    """
+    Returns the process-wide ContentCategorizer.
+    """
+    global _categorizer
+    if _categorizer is None:
+        with _lock:
+            if _categorizer is None:
+                _categorizer = ContentCategorizer()
+    return _categorizer
+
+
+def get_cleaner():
+    """
+    Returns a TextCleaner. It holds no state, so a fresh one is as good as shared.
+    """
+    return TextCleaner()
+
+
+def warm_up(embedder=True, categorizer=True, milvus=True):
+    """
+    Loads the models and opens the Milvus connection ahead of the first request.
+    """
+    if embedder:
+        get_embedder()
+    if categorizer:
+        get_categorizer()
+    if milvus:
+        client = get_milvus_client()
+        client.warm_dedup_index()
+        client.tune_search_params()
+    logging.info("Model and client registry warmed up.")
@@ -1,8 +1,7 @@
 from langchain_openai import ChatOpenAI
-from sentence_transformers import SentenceTransformer
 import os
 from dotenv import load_dotenv
-from app.milvus_handler.milvus_client import MilvusClient
+from app.registry import get_milvus_client
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -11,9 +10,10 @@ load_dotenv()
 MILVUS_HOST = "standalone"
 MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Completions requested at once by the batch endpoint
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
 
 collection_name = "ai_ml_knowledge"
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
 model = ChatOpenAI(api_key=OPENAI_API_KEY, model="gpt-4o-mini")
 
 PROMPT = """
@@ -29,10 +29,26 @@ Use the following pieces of information enclosed in <context> tags to provide an
 
 def initialize_milvus_vectorstore():
     """
-    Initialize the Milvus vector store using LangChain integration.
+    Return the process-wide Milvus client used for retrieval.
     """
-    milvus = MilvusClient(host=MILVUS_HOST, port=MILVUS_PORT)
-    return milvus
+    return get_milvus_client(
+        host=MILVUS_HOST, port=MILVUS_PORT, collection_name=collection_name
+    )
+
+
+def build_prompt(query, documents):
+    """
+    Formats the retrieved documents and the query into the generation prompt.
+    """
+    context = ""
+    for document in documents:
+        if "passages" in document:
+            # Only the passages that matched, not the whole article
+            passages = [passage["text"] for passage in document["passages"]]
+            context += " ... ".join(passages) + "\n"
+        else:
+            context += document["text"] + "\n"
+    return PROMPT.format(context=context, question=query)
 
 
 def retrieve_and_generate(query):
@@ -44,17 +60,83 @@ def retrieve_and_generate(query):
     Returns:
         str: The generated response.
     """
-    # Initialize the vector store and retriever
-    milvus_client = initialize_milvus_vectorstore()
     # Query database
-    search_res = milvus_client.search_similar(query, category_filter=None, limit=3)
+    search_res = retrieve_many([query], category_filter=None, limit=3)[0]
 
-    # Loading content
-    context = ""
-    for i in search_res:
-        context += i["text"] + "\n"
     # Generate response
-    prompt = PROMPT.format(context=context, question=query)
+    prompt = build_prompt(query, search_res)
     response = model.invoke([{"role": "system", "content": prompt}])
 
     return response.content
+
+
+def retrieve_many(
+    queries,
+    category_filter=None,
+    limit=3,
+    projection="passages",
+    since=None,
+    until=None,
+):
+    """
+    Retrieve the relevant documents of many queries with one embedding pass and
+    one Milvus search. `projection` is "passages" (the matching passages grouped
+    by document, or full documents when chunking is disabled or the stored
+    documents have no passages yet), "full", "light" (no text) or "ids".
+    `since` and `until` restrict the documents' dates.
+
+    Returns:
+        list: For each query, its matching documents.
+    """
+    milvus_client = initialize_milvus_vectorstore()
+    if projection == "passages":
+        if milvus_client.passages_ready():
+            return milvus_client.search_passages(
+                queries,
+                category_filter=category_filter,
+                limit=limit,
+                since=since,
+                until=until,
+            )
+        projection = "full"
+    return milvus_client.search_many(
+        queries,
+        category_filter=category_filter,
+        limit=limit,
+        projection=projection,
+        since=since,
+        until=until,
+    )
+
+
+def retrieve_and_generate_many(
+    queries, category_filter=None, limit=3, since=None, until=None
+):
+    """
+    Batched retrieve_and_generate: retrieval is a single search and the
+    completions run concurrently, up to LLM_MAX_CONCURRENCY at a time.
+
+    Returns:
+        list: For each query, a dict with its 'response', or its 'error' if the
+            completion failed.
+    """
+    search_results = retrieve_many(
+        queries, category_filter=category_filter, limit=limit, since=since, until=until
+    )
+    prompts = [
+        [{"role": "system", "content": build_prompt(query, documents)}]
+        for query, documents in zip(queries, search_results)
+    ]
+    responses = model.batch(
+        prompts,
+        config={"max_concurrency": LLM_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    return [
+        (
+            {"error": str(response)}
+            if isinstance(response, Exception)
+            else {"response": response.content}
+        )
+        for response in responses
+    ]
@@ -1,6 +1,12 @@
 from flask import Blueprint, render_template, jsonify, request
 from tests import run_all_tests
-from app.retrieval import retrieve_and_generate
+from app.milvus_handler.documents import epoch_day
+from app.retrieval import (
+    retrieve_and_generate,
+    retrieve_and_generate_many,
+    retrieve_many,
+)
+import os
 import subprocess
 import unittest
 import redis
@@ -11,6 +17,10 @@ main = Blueprint("main", __name__)
 # Connect to Redis
 redis_client = redis.StrictRedis(host="redis", port=6379, decode_responses=True)
 
+# Largest number of queries accepted by /query/batch
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", 256))
+QUERY_MAX_LIMIT = int(os.getenv("QUERY_MAX_LIMIT", 100))  # Documents per query
+
 
 @main.route("/")
 def home():
@@ -101,3 +111,81 @@ def query_page():
             return jsonify({"response": response})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+
+
+@main.route("/query/batch", methods=["POST"])
+def query_batch():
+    """
+    Answer many queries in one request: `{"queries": [...], "mode": "retrieval"}`
+    returns the matching documents of each query, `"mode": "rag"` (default) the
+    generated responses. Optional `category` and `limit` apply to every query;
+    in retrieval mode, `projection` ("passages", "full", "light" or "ids") picks
+    what each document carries. `since` and `until` ('yyyy-mm-dd') restrict
+    the documents' dates.
+    """
+    data = request.json or {}
+    queries = data.get("queries")
+    if (
+        not isinstance(queries, list)
+        or not queries
+        or not all(isinstance(query, str) and query.strip() for query in queries)
+    ):
+        return jsonify({"error": "A non-empty list of queries is required"}), 400
+    if len(queries) > QUERY_BATCH_MAX_SIZE:
+        return (
+            jsonify({"error": f"At most {QUERY_BATCH_MAX_SIZE} queries per request"}),
+            400,
+        )
+    mode = data.get("mode", "rag")
+    if mode not in ("retrieval", "rag"):
+        return jsonify({"error": "Mode must be 'retrieval' or 'rag'"}), 400
+    projection = data.get("projection", "passages")
+    if projection not in ("passages", "full", "light", "ids"):
+        return (
+            jsonify(
+                {"error": "Projection must be 'passages', 'full', 'light' or 'ids'"}
+            ),
+            400,
+        )
+    try:
+        limit = int(data.get("limit", 3))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Limit must be an integer"}), 400
+    if not 1 <= limit <= QUERY_MAX_LIMIT:
+        return (
+            jsonify({"error": f"Limit must be between 1 and {QUERY_MAX_LIMIT}"}),
+            400,
+        )
+    since, until = data.get("since"), data.get("until")
+    try:
+        for bound in (since, until):
+            if bound is not None:
+                epoch_day(bound)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Dates must be in 'yyyy-mm-dd' format"}), 400
+
+    try:
+        if mode == "retrieval":
+            results = retrieve_many(
+                queries, data.get("category"), limit, projection, since, until
+            )
+            return jsonify(
+                {
+                    "results": [
+                        {"query": query, "documents": documents}
+                        for query, documents in zip(queries, results)
+                    ]
+                }
+            )
+        results = retrieve_and_generate_many(
+            queries, data.get("category"), limit, since, until
+        )
+        return jsonify(
+            {
+                "results": [
+                    dict(result, query=query) for query, result in zip(queries, results)
+                ]
+            }
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+import zstandard
+
+# Shared with app/worker/payloads.py, which resolves the bodies
+STREAM_NAME = "article_processing_stream"
+BODY_KEY = "article_body:{}"  # zstd-compressed article text
+PROCESSED_KEY = "article_processed:{}"  # Set by the worker once a body is stored
+BODY_TTL = int(os.getenv("ARTICLE_BODY_TTL", 3 * 24 * 3600))
+
+# Stores the body and queues its job in one atomic step. Scripts don't roll
+# back, so a failed XADD deletes the body: a body left behind would make every
+# re-crawl look already queued. Returns 0 when the body was already processed,
+# or is stored for a job still in the stream.
+ENQUEUE = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+if not redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2], 'NX') then return 0 end
+local added = redis.pcall('XADD', KEYS[3], '*', 'job', ARGV[3])
+if type(added) == 'table' and added.err then
+    redis.call('DEL', KEYS[2])
+    return added
+end
+return 1
+"""
+
+_compressor = zstandard.ZstdCompressor(level=3)
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def enqueue_article(redis_client, job_data, stream=STREAM_NAME):
+    """
+    Queues an article as a claim check: the compressed body is stored once under
+    its content hash and the stream entry only carries the metadata and the
+    hash. Bodies already processed, or already waiting in the stream, are not
+    queued again.
+
+    Returns:
+        bool: Whether a job was queued.
+    """
+    job = dict(job_data)
+    text = job.pop("text") or ""
+    digest = body_hash(text)
+    job["body_hash"] = digest
+    queued = redis_client.eval(
+        ENQUEUE,
+        3,
+        PROCESSED_KEY.format(digest),
+        BODY_KEY.format(digest),
+        stream,
+        _compressor.compress(text.encode("utf-8")),
+        BODY_TTL,
+        json.dumps(job),
+    )
+    return bool(queued)
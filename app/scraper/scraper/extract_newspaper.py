@@ -1,7 +1,7 @@
 import newspaper
 from newspaper import Article
 import redis
-import json
+from claim_check import enqueue_article
 from datetime import datetime
 
 # Links to extract articles from
@@ -59,8 +59,10 @@ def send_to_redis(article):
         "url": article["url"],
         "text": article["text"],
     }
-    redis_client.rpush("article_processing_queue", json.dumps(job_data))
-    print(f"Pushed to Redis: {job_data['title']}")
+    if enqueue_article(redis_client, job_data):
+        print(f"Pushed to Redis: {job_data['title']}")
+    else:
+        print(f"Already queued or processed: {job_data['title']}")
 
 
 from datetime import datetime
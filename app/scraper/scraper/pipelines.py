@@ -5,7 +5,7 @@
 
 
 import redis
-import json
+from scraper.claim_check import enqueue_article
 
 
 class ArticlePipeline:
@@ -25,9 +25,11 @@ class ArticlePipeline:
             "url": item["url"],
         }
         print("pushing to queue")
-        # Push data to the Redis queue
-        self.redis_client.rpush("article_processing_queue", json.dumps(job_data))
-        spider.logger.info(f"Pushed job to queue: {job_data['title']}")
+        # Only a reference to the stored body goes through the stream
+        if enqueue_article(self.redis_client, job_data):
+            spider.logger.info(f"Pushed job to queue: {job_data['title']}")
+        else:
+            spider.logger.info(f"Already queued or processed: {job_data['title']}")
         return item
 
     def close_spider(self, spider):
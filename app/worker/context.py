@@ -0,0 +1,70 @@
+import itertools
+from dataclasses import dataclass, field
+from app.milvus_handler.dedup import content_hash
+
+
+@dataclass
+class DocumentContext:
+    """
+    Carries one article through the worker stages so that each derived artifact
+    (cleaned text, content hash, embedding, NLI windows) is computed exactly once.
+    """
+
+    job: dict
+    cleaned_text: str
+    content_hash: str
+    embedding: list = None
+    nli_windows: list = None  # ContentCategorizer.window_texts output
+    categories: list = field(default_factory=list)
+    status: dict = None  # Final outcome; set once the article leaves the pipeline
+
+    @classmethod
+    def from_job(cls, job, cleaner):
+        cleaned_text = cleaner.clean_text(job.get("text") or "")
+        return cls(
+            job=job, cleaned_text=cleaned_text, content_hash=content_hash(cleaned_text)
+        )
+
+    def skip(self, message):
+        self.status = {"status": "skipped", "message": message}
+
+    def to_document(self):
+        """
+        Returns the dict expected by MilvusClient.insert_many.
+        """
+        return {
+            "title": self.job["title"],
+            "author": self.job["author"],
+            "date": self.job["date"],
+            "text": self.cleaned_text,
+            "categories": self.categories,
+            "url": self.job.get("url"),
+            "content_hash": self.content_hash,
+        }
+
+
+_batch_keys = itertools.count()
+
+
+@dataclass
+class JobBatch:
+    """
+    A batch of jobs read from the stream, carried through the worker pipeline.
+    """
+
+    jobs: list
+    entry_ids: list = field(default_factory=list)  # Stream entries to acknowledge
+    contexts: list = field(default_factory=list)
+    error: Exception = None  # Set when a stage failed; the entries stay pending
+    key: int = field(default_factory=lambda: next(_batch_keys))
+
+    @property
+    def pending(self):
+        """
+        The contexts still going through the stages.
+        """
+        return [context for context in self.contexts if context.status is None]
+
+    @property
+    def statuses(self):
+        return [context.status for context in self.contexts]
@@ -0,0 +1,202 @@
+import json
+import os
+import socket
+import time
+
+import redis
+
+from app.worker.payloads import BODY_KEY
+
+STREAM_NAME = "article_processing_stream"
+GROUP_NAME = "article_workers"
+# List the producers pushed to before the stream; drained into it by the workers
+LEGACY_QUEUE_NAME = "article_processing_queue"
+
+# Pops up to ARGV[2] jobs from the legacy list and appends them to the stream in
+# one atomic step, so a crash can't lose a job between the two
+MOVE_LEGACY_JOBS = """
+local moved = 0
+for i = 1, tonumber(ARGV[2]) do
+    local job = redis.call('LPOP', KEYS[1])
+    if not job then break end
+    redis.call('XADD', KEYS[2], '*', ARGV[1], job)
+    moved = moved + 1
+end
+return moved
+"""
+
+
+class JobStream:
+    def __init__(
+        self,
+        redis_client,
+        stream=STREAM_NAME,
+        group=GROUP_NAME,
+        consumer=None,
+        min_idle_ms=None,
+        max_deliveries=None,
+        legacy_queue=LEGACY_QUEUE_NAME,
+    ):
+        """
+        Consumer of the article job stream through a consumer group. Entries stay
+        pending until acked, so jobs of a crashed worker are reclaimed by another
+        one once they have been idle for `min_idle_ms`. Entries delivered
+        `max_deliveries` times are moved to '<stream>:dead' instead of retried,
+        and their claim-check body is deleted so a re-crawl can queue it again.
+        """
+        self.redis = redis_client
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.min_idle_ms = (
+            int(os.getenv("WORKER_CLAIM_IDLE_MS", 300_000))
+            if min_idle_ms is None
+            else min_idle_ms
+        )
+        self.max_deliveries = (
+            int(os.getenv("WORKER_MAX_DELIVERIES", 5))
+            if max_deliveries is None
+            else max_deliveries
+        )
+        self.dead_letter_stream = f"{stream}:dead"
+        self.legacy_queue = legacy_queue
+        self._move_legacy_jobs = redis_client.register_script(MOVE_LEGACY_JOBS)
+        self._claim_cursor = "0-0"
+
+    def ensure_group(self):
+        """
+        Creates the stream and its consumer group if they don't exist yet.
+        """
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def move_legacy_jobs(self, limit=100):
+        """
+        Moves jobs pushed onto the legacy list by producers not yet migrated.
+
+        Returns:
+            int: The number of jobs moved.
+        """
+        if not self.legacy_queue:
+            return 0
+        return self._move_legacy_jobs(
+            keys=[self.legacy_queue, self.stream], args=["job", limit]
+        )
+
+    def claim_stale(self, count):
+        """
+        Takes over entries left pending by consumers idle for `min_idle_ms`,
+        e.g. a worker that crashed mid-batch.
+
+        Returns:
+            list: (entry id, raw job) pairs.
+        """
+        response = self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=self.min_idle_ms,
+            start_id=self._claim_cursor,
+            count=count,
+        )
+        # Redis 7 appends the ids of deleted entries; the cursor wraps to 0-0
+        self._claim_cursor, entries = response[0], response[1]
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if not entries:
+            return []
+        return self._drop_exhausted(entries)
+
+    def _drop_exhausted(self, entries):
+        """
+        Moves the claimed entries that were delivered too often to the
+        dead-letter stream and returns the others.
+        """
+        pending = self.redis.xpending_range(
+            self.stream,
+            self.group,
+            min=entries[0][0],
+            max=entries[-1][0],
+            count=len(entries),
+            consumername=self.consumer,
+        )
+        deliveries = {item["message_id"]: item["times_delivered"] for item in pending}
+        kept = []
+        for entry_id, fields in entries:
+            if deliveries.get(entry_id, 0) > self.max_deliveries:
+                print(f"[WARN] Job {entry_id} failed too often; moved to dead letters.")
+                self._dead_letter(entry_id, fields)
+            else:
+                kept.append((entry_id, fields.get("job")))
+        return kept
+
+    def _dead_letter(self, entry_id, fields):
+        """
+        Copies an entry to the dead-letter stream, acks it and deletes its
+        claim-check body in one transaction. The entry keeps the body hash.
+        """
+        pipeline = self.redis.pipeline()
+        pipeline.xadd(self.dead_letter_stream, dict(fields, entry=entry_id))
+        pipeline.xack(self.stream, self.group, entry_id)
+        pipeline.xdel(self.stream, entry_id)
+        try:
+            digest = json.loads(fields.get("job") or "{}").get("body_hash")
+        except (ValueError, AttributeError):
+            digest = None  # Not a JSON object, so not a claim check either
+        if digest:
+            pipeline.delete(BODY_KEY.format(digest))
+        pipeline.execute()
+
+    def read(self, count, block_ms):
+        """
+        Reads up to `count` new entries, blocking up to `block_ms` for the first.
+
+        Returns:
+            list: (entry id, raw job) pairs.
+        """
+        response = self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        if not response:
+            return []
+        return [(entry_id, fields.get("job")) for entry_id, fields in response[0][1]]
+
+    def pop_jobs(self, batch_size, max_wait, idle_timeout):
+        """
+        Returns a batch of jobs: reclaimed stale entries first, otherwise new
+        ones, blocking up to `idle_timeout` seconds for the first and topping
+        the batch up for `max_wait` seconds.
+
+        Returns:
+            list: (entry id, raw job) pairs.
+        """
+        self.move_legacy_jobs()
+        entries = self.claim_stale(batch_size)
+        if entries:
+            return entries
+        entries = self.read(batch_size, int(idle_timeout * 1000))
+        if not entries:
+            return []
+        deadline = time.monotonic() + max_wait
+        while len(entries) < batch_size:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            more = self.read(batch_size - len(entries), remaining_ms)
+            if not more:
+                break
+            entries.extend(more)
+        return entries
+
+    def ack(self, entry_ids):
+        """
+        Acknowledges processed entries and deletes them from the stream.
+        """
+        if not entry_ids:
+            return
+        pipeline = self.redis.pipeline()
+        pipeline.xack(self.stream, self.group, *entry_ids)
+        pipeline.xdel(self.stream, *entry_ids)
+        pipeline.execute()
@@ -0,0 +1,73 @@
+import os
+
+import zstandard
+
+# Written by the producers, see app/scraper/scraper/claim_check.py
+BODY_KEY = "article_body:{}"
+PROCESSED_KEY = "article_processed:{}"
+
+
+class PayloadStore:
+    def __init__(self, redis_client, processed_ttl=None):
+        """
+        Resolves claim-check jobs, whose article body is stored zstd-compressed
+        under its content hash instead of travelling in the stream entry.
+        `redis_client` must not decode responses, the bodies are binary.
+        Processed hashes are remembered for `processed_ttl` seconds so producers
+        stop queuing them.
+        """
+        self.redis = redis_client
+        self.processed_ttl = (
+            int(os.getenv("ARTICLE_PROCESSED_TTL", 30 * 24 * 3600))
+            if processed_ttl is None
+            else processed_ttl
+        )
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def resolve(self, jobs, entry_ids):
+        """
+        Fills in the `text` of claim-check jobs with one MGET. Jobs carrying
+        their text inline are returned as they are.
+
+        Returns:
+            tuple: The resolved jobs, their entry ids, and the ids of the
+                entries whose body expired.
+        """
+        references = [i for i, job in enumerate(jobs) if job.get("body_hash")]
+        if not references:
+            return jobs, entry_ids, []
+        bodies = self.redis.mget(
+            [BODY_KEY.format(jobs[i]["body_hash"]) for i in references]
+        )
+        missing = set()
+        for i, body in zip(references, bodies):
+            if body is None:
+                print(f"[WARN] Body of '{jobs[i].get('title')}' expired; dropped.")
+                missing.add(i)
+            else:
+                text = self._decompressor.decompress(body)
+                jobs[i] = dict(jobs[i], text=text.decode("utf-8"))
+        kept = [i for i in range(len(jobs)) if i not in missing]
+        return (
+            [jobs[i] for i in kept],
+            [entry_ids[i] for i in kept],
+            [entry_ids[i] for i in sorted(missing)],
+        )
+
+    def mark_processed(self, jobs, statuses):
+        """
+        Records the body hashes of the jobs that were inserted or skipped, and
+        deletes their bodies. Failed jobs keep theirs for the retry.
+        """
+        hashes = [
+            job["body_hash"]
+            for job, status in zip(jobs, statuses)
+            if job.get("body_hash") and status["status"] != "error"
+        ]
+        if not hashes:
+            return
+        pipeline = self.redis.pipeline()
+        for digest in hashes:
+            pipeline.set(PROCESSED_KEY.format(digest), 1, ex=self.processed_ttl)
+            pipeline.delete(BODY_KEY.format(digest))
+        pipeline.execute()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+_STOP = object()
+
+
+class Stage:
+    def __init__(self, name, function, threads=1, always=False):
+        """
+        One step of a StagedPipeline: `function(item)` run by `threads` threads.
+        Items whose `error` is set skip the stage unless `always` is set.
+        """
+        self.name = name
+        self.function = function
+        self.threads = threads
+        self.always = always
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+
+class StagedPipeline:
+    def __init__(self, stages, queue_size=2):
+        """
+        Runs items through `stages` in order, each stage on its own threads, so
+        that different items occupy different stages at the same time. Stages
+        are connected by queues of `queue_size` items: a slow stage blocks the
+        ones before it, and submit() blocks once the first stage is backed up.
+        An exception in a stage is stored on the item's `error` attribute.
+        """
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.threads = []
+        for index, stage in enumerate(stages):
+            workers = []
+            for number in range(stage.threads):
+                thread = threading.Thread(
+                    target=self._run_stage,
+                    args=(index,),
+                    name=f"{stage.name}-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                workers.append(thread)
+            self.threads.append(workers)
+
+    def submit(self, item):
+        self.queues[0].put(item)
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            if stage.always or getattr(item, "error", None) is None:
+                started = time.perf_counter()
+                try:
+                    stage.function(item)
+                except Exception as e:
+                    print(f"[ERROR] Stage '{stage.name}' failed: {e}")
+                    item.error = e
+                with stage._lock:
+                    stage.items += 1
+                    stage.busy_seconds += time.perf_counter() - started
+            if outbox is not None:
+                outbox.put(item)
+
+    def close(self):
+        """
+        Lets every submitted item finish, then stops the stage threads.
+        """
+        for inbox, workers in zip(self.queues, self.threads):
+            for _ in workers:
+                inbox.put(_STOP)
+            for thread in workers:
+                thread.join()
+
+    def stats(self):
+        """
+        Returns the items processed and seconds spent by each stage.
+        """
+        return {
+            stage.name: {"items": stage.items, "busy_seconds": stage.busy_seconds}
+            for stage in self.stages
+        }
+
+
+class InFlightDocuments:
+    """
+    Content hashes and embeddings of batches that passed the duplicate checks
+    but are not inserted yet. While one batch is being categorized or inserted
+    the next one is already being checked, and Milvus can't see the first
+    batch's documents yet.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        self._vectors = {}
+        self._lock = threading.Lock()
+
+    def register_hashes(self, key, hashes, known):
+        """
+        Marks the hashes of other in-flight batches as known and registers the
+        remaining ones under batch `key`.
+
+        Returns:
+            list: `known`, updated.
+        """
+        with self._lock:
+            others = set().union(*self._hashes.values()) if self._hashes else set()
+            known = [is_known or h in others for h, is_known in zip(hashes, known)]
+            self._hashes[key] = {
+                h for h, is_known in zip(hashes, known) if not is_known
+            }
+        return known
+
+    def register_vectors(self, key, vectors, documents, matches, threshold):
+        """
+        Matches the unmatched vectors against the other in-flight batches and
+        registers the still unmatched ones under batch `key` with their
+        `documents` metadata.
+
+        Returns:
+            list: `matches`, updated.
+        """
+        matches = list(matches)
+        with self._lock:
+            if self._vectors:
+                stored = np.vstack([entry[0] for entry in self._vectors.values()])
+                stored_documents = [
+                    document
+                    for entry in self._vectors.values()
+                    for document in entry[1]
+                ]
+                for i, vector in enumerate(vectors):
+                    if matches[i] is not None:
+                        continue
+                    similarities = stored @ vector
+                    best = int(similarities.argmax())
+                    if similarities[best] >= threshold:
+                        matches[i] = dict(
+                            stored_documents[best],
+                            similarity_score=float(similarities[best]),
+                        )
+            unmatched = [i for i, match in enumerate(matches) if match is None]
+            if unmatched:
+                self._vectors[key] = (
+                    np.asarray(vectors)[unmatched],
+                    [documents[i] for i in unmatched],
+                )
+        return matches
+
+    def release(self, key):
+        with self._lock:
+            self._hashes.pop(key, None)
+            self._vectors.pop(key, None)
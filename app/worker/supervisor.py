@@ -0,0 +1,91 @@
+import gc
+import multiprocessing
+import os
+import signal
+import time
+
+# Forked children must not inherit a tokenizer thread pool
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import torch
+from app.registry import warm_up
+from app.worker.worker import run_worker
+
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 2))
+# Intra-op threads per child, so the pool as a whole doesn't oversubscribe the cores
+TORCH_THREADS = int(
+    os.getenv("WORKER_TORCH_THREADS", max(1, (os.cpu_count() or 1) // WORKER_PROCESSES))
+)
+RESTART_DELAY = 5  # Seconds between restarts of a child that keeps crashing
+
+
+def child_main(index):
+    """
+    Entry point of a forked worker. The models were loaded by the supervisor and
+    are shared copy-on-write; the Milvus and Redis connections are opened here
+    because gRPC channels and sockets don't survive a fork.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    torch.set_num_threads(TORCH_THREADS)
+    # ONNX Runtime sessions are opened per child and read this on creation
+    os.environ.setdefault("EMBEDDING_ONNX_THREADS", str(TORCH_THREADS))
+    print(f"[INFO] Worker {index} started (pid {os.getpid()}, {TORCH_THREADS} threads)")
+    run_worker()
+
+
+def start_child(context, index):
+    process = context.Process(target=child_main, args=(index,), name=f"worker-{index}")
+    process.start()
+    return process
+
+
+def main():
+    print(f"Preloading models for {WORKER_PROCESSES} workers...")
+    warm_up(milvus=False)
+    # Keep the garbage collector from touching, and so copying, the shared
+    # model objects in every child
+    gc.freeze()
+
+    context = multiprocessing.get_context("fork")
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    children = {}
+    started_at = {}
+    for index in range(WORKER_PROCESSES):
+        children[index] = start_child(context, index)
+        started_at[index] = time.monotonic()
+
+    while not stopping:
+        for index, process in list(children.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            # Back off when a child dies right after starting
+            if time.monotonic() - started_at[index] < RESTART_DELAY:
+                continue
+            print(
+                f"[WARN] Worker {index} (pid {process.pid}) exited with code "
+                f"{process.exitcode}. Restarting..."
+            )
+            children[index] = start_child(context, index)
+            started_at[index] = time.monotonic()
+        time.sleep(1)
+
+    print("Stopping workers...")
+    for process in children.values():
+        if process.is_alive():
+            process.terminate()
+    for process in children.values():
+        process.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,75 +2,266 @@ import os
 import redis
 import json
 import time
-from cleaner.cleaner import TextCleaner
-from organizer.categorizer import ContentCategorizer
-from milvus_handler.milvus_client import MilvusClient
+from app.cleaner.quality import QualityGate
+from app.registry import get_cleaner, get_categorizer, get_milvus_client, warm_up
+from app.worker.context import DocumentContext, JobBatch
+from app.worker.job_queue import JobStream
+from app.worker.payloads import PayloadStore
+from app.worker.pipeline import InFlightDocuments, Stage, StagedPipeline
 
 print("Starting worker...")
 import sys
 
 print(f"Python Path: {sys.path}")
 
+BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", 16))  # Max jobs per batch
+MAX_WAIT = float(os.getenv("WORKER_MAX_WAIT", 1.0))  # Seconds to fill a batch
+IDLE_TIMEOUT = 5  # Seconds a blocking read waits on an empty stream
+# Overlap the stages of consecutive batches on threads; False runs them in turn
+PIPELINE = os.getenv("WORKER_PIPELINE", "True") == "True"
+IO_THREADS = int(os.getenv("WORKER_IO_THREADS", 2))  # Per Milvus/Redis stage
+PIPELINE_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", 2))  # Batches per stage
+# Drop empty, short, boilerplate, gibberish and foreign-language articles early
+QUALITY_GATE = os.getenv("QUALITY_GATE", "True") == "True"
 
-def process_article(job, cleaner, categorizer):
-    # Initialize required components
+CANDIDATE_CATEGORIES = [
+    "Natural Language Processing (NLP): syntax, semantics, tokenization, embeddings, transformers, chat interfaces, text generation, document summarization, entity recognition, language understanding, machine translation, conversational systems, text classification, language models, semantic search.",
+    "Computer Vision: image analysis, visual data, object detection, facial recognition, segmentation, augmented reality, spatial computing, medical imaging, video tracking, 3D reconstruction, motion detection, scene understanding, object recognition, visual embeddings.",
+    "Reinforcement Learning: reward-based learning, optimal policies, decision-making, autonomous control, trial-and-error strategies, deep Q-networks, policy optimization, exploration strategies, robotic navigation, environment simulation, reward shaping, Q-learning, multi-agent systems.",
+    "Generative AI: synthetic content, creative synthesis, GANs, neural transformations, text-to-image, DALL·E, latent spaces, data augmentation, audio synthesis, visual content creation, style blending, deepfakes, content generation, generative transformers, text generation.",
+    "AI Ethics and Bias: fairness, accountability, transparency, social impact, ethical challenges, privacy safeguards, algorithm discrimination, audit trails, ethical standards, responsible deployment, data protection, algorithm bias, inclusive AI, ethical AI frameworks.",
+    "Autonomous Systems: real-time decisions, unmanned vehicles, robotics, industrial automation, adaptive control, dynamic environments, robotic swarms, sensor-driven systems, navigation algorithms, autonomous drones, real-time perception, control systems, self-driving technology.",
+    "Time-Series Analysis: temporal trends, anomaly identification, forecasting techniques, sequential patterns, data cycles, seasonal variations, predictive analytics, multivariate trends, time-dependent modeling, stock analysis, trend detection, time-series clustering, periodicity analysis.",
+    "Edge AI: localized processing, low-latency solutions, IoT integration, privacy-preserving methods, resource-efficient algorithms, real-time inference, embedded intelligence, on-device computation, distributed AI, compact networks, microcontrollers, edge computing.",
+    "AI in Healthcare: diagnostic tools, genomics, personalized treatments, medical imaging advancements, drug discovery, clinical data analytics, patient monitoring, telemedicine innovations, wearable integration, predictive models, healthcare optimization, medical decision support, hospital management.",
+    "Explainable AI (XAI): decision transparency, interpretability, feature attribution, causality, trust-building, Shapley values, LIME, visualization tools, diagnostic insight, interpretable outputs, explainability techniques, feature importance, sensitivity analysis.",
+    "Federated Learning: distributed training, data privacy, decentralized computation, collaborative networks, secure aggregation, multi-device synchronization, cross-device training, localized updates, privacy-preserving AI, decentralized learning, edge collaboration, collaborative AI.",
+    "Self-Supervised Learning: unlabeled data, contrastive techniques, representation extraction, pretraining, embedding alignment, self-labeling, masked language processing, unsupervised enrichment, latent pattern discovery, unsupervised pretraining, representation learning, feature discovery.",
+    "AI in Creative Industries: art generation, music composition, storytelling, animation, creative augmentation, game design, digital synthesis, style adaptation, visual storytelling, immersive experiences, virtual production, generative storytelling, creative AI tools.",
+    "ML Infrastructure and Engineering: operational pipelines, deployment frameworks, automation, scalable architecture, cloud integration, CI/CD, container orchestration, distributed systems, feature repositories, reproducibility, infrastructure optimization, production-ready pipelines, resource management.",
+    "AI for Social Good: environmental monitoring, disaster preparedness, equitable access, conservation, renewable solutions, poverty alleviation, healthcare expansion, educational tools, sustainability efforts, social impact projects, societal challenges, resource allocation.",
+    "Multimodal AI: text-image fusion, audio-visual synchronization, cross-modal integration, video analytics, multimodal embeddings, sensor data combination, natural interaction, voice-image analysis, cross-modal understanding, video-text models, speech and vision alignment.",
+    "AI Hardware Optimization: GPU efficiency, parallel processing, neural accelerators, low-power computation, hardware-aware design, AI-specific processors, chip-level integration, inference acceleration, optimized computation, resource-efficient hardware, TPUs, custom AI chips.",
+    "AI in Finance: trading algorithms, credit risk analytics, fraud detection, financial trends, portfolio optimization, transaction monitoring, robo-advisors, quantitative strategies, payment processing, investment forecasting, predictive analytics, algorithmic trading.",
+    "Human-Centered AI: user interaction, adaptive interfaces, emotional intelligence, assistive technologies, accessibility features, human augmentation, usability design, inclusive frameworks, personalized interactions, emotion-aware systems, human-friendly interfaces, user-focused AI.",
+    "Data Science: data preprocessing, analytics, visualization, statistical modeling, feature selection, database integration, dimensionality reduction, exploratory analysis, big data solutions, pattern recognition, descriptive statistics, clustering, regression analysis.",
+]
 
-    milvus_host = os.getenv("MILVUS_HOST", "localhost")
-    milvus_port = os.getenv("MILVUS_PORT", "19530")
-    milvus_client = MilvusClient(host=milvus_host, port=milvus_port)
 
-    # Clean the text
-    cleaned_text = cleaner.clean_text(job["text"])
-    print("Clean text:", cleaned_text)
+def process_article(job, cleaner, categorizer, milvus_client):
+    return process_batch([job], cleaner, categorizer, milvus_client)[0]
+
+
+def prepare(batch, cleaner, quality_gate=None):
+    """
+    Cleans and hashes each article of the batch, and skips the ones failing the
+    quality gate before any model or Milvus call.
+    """
+    batch.contexts = [DocumentContext.from_job(job, cleaner) for job in batch.jobs]
+    if quality_gate is None:
+        return
+    for context in batch.contexts:
+        reason = quality_gate.check(context.cleaned_text)
+        if reason is not None:
+            print(f"Rejected '{context.job.get('title')}': {reason}")
+            context.skip(f"Low quality: {reason}")
+    if len(batch.pending) < len(batch.contexts):
+        print(f"[INFO] Rejections so far: {dict(quality_gate.rejections)}")
+
 
-    # Check for existing similar text
-    existing_document = milvus_client.check_text_existence(
-        cleaned_text, similarity_threshold=0.9
+def skip_known(batch, milvus_client, in_flight=None):
+    """
+    Skips unchanged re-crawled articles before spending an embedding on them.
+    """
+    pending = batch.pending
+    if not pending:
+        return
+    hashes = [context.content_hash for context in pending]
+    known = milvus_client.contains_texts(
+        [context.cleaned_text for context in pending], hashes=hashes
     )
-    if existing_document:
-        print(f"Duplicate document detected: {existing_document}")
-        return  # Skip processing this article
-    print("[INFO] CURRENT JOB NOT IN DATABASE")
-    cand_cat = [
-        "Natural Language Processing (NLP): syntax, semantics, tokenization, embeddings, transformers, chat interfaces, text generation, document summarization, entity recognition, language understanding, machine translation, conversational systems, text classification, language models, semantic search.",
-        "Computer Vision: image analysis, visual data, object detection, facial recognition, segmentation, augmented reality, spatial computing, medical imaging, video tracking, 3D reconstruction, motion detection, scene understanding, object recognition, visual embeddings.",
-        "Reinforcement Learning: reward-based learning, optimal policies, decision-making, autonomous control, trial-and-error strategies, deep Q-networks, policy optimization, exploration strategies, robotic navigation, environment simulation, reward shaping, Q-learning, multi-agent systems.",
-        "Generative AI: synthetic content, creative synthesis, GANs, neural transformations, text-to-image, DALL·E, latent spaces, data augmentation, audio synthesis, visual content creation, style blending, deepfakes, content generation, generative transformers, text generation.",
-        "AI Ethics and Bias: fairness, accountability, transparency, social impact, ethical challenges, privacy safeguards, algorithm discrimination, audit trails, ethical standards, responsible deployment, data protection, algorithm bias, inclusive AI, ethical AI frameworks.",
-        "Autonomous Systems: real-time decisions, unmanned vehicles, robotics, industrial automation, adaptive control, dynamic environments, robotic swarms, sensor-driven systems, navigation algorithms, autonomous drones, real-time perception, control systems, self-driving technology.",
-        "Time-Series Analysis: temporal trends, anomaly identification, forecasting techniques, sequential patterns, data cycles, seasonal variations, predictive analytics, multivariate trends, time-dependent modeling, stock analysis, trend detection, time-series clustering, periodicity analysis.",
-        "Edge AI: localized processing, low-latency solutions, IoT integration, privacy-preserving methods, resource-efficient algorithms, real-time inference, embedded intelligence, on-device computation, distributed AI, compact networks, microcontrollers, edge computing.",
-        "AI in Healthcare: diagnostic tools, genomics, personalized treatments, medical imaging advancements, drug discovery, clinical data analytics, patient monitoring, telemedicine innovations, wearable integration, predictive models, healthcare optimization, medical decision support, hospital management.",
-        "Explainable AI (XAI): decision transparency, interpretability, feature attribution, causality, trust-building, Shapley values, LIME, visualization tools, diagnostic insight, interpretable outputs, explainability techniques, feature importance, sensitivity analysis.",
-        "Federated Learning: distributed training, data privacy, decentralized computation, collaborative networks, secure aggregation, multi-device synchronization, cross-device training, localized updates, privacy-preserving AI, decentralized learning, edge collaboration, collaborative AI.",
-        "Self-Supervised Learning: unlabeled data, contrastive techniques, representation extraction, pretraining, embedding alignment, self-labeling, masked language processing, unsupervised enrichment, latent pattern discovery, unsupervised pretraining, representation learning, feature discovery.",
-        "AI in Creative Industries: art generation, music composition, storytelling, animation, creative augmentation, game design, digital synthesis, style adaptation, visual storytelling, immersive experiences, virtual production, generative storytelling, creative AI tools.",
-        "ML Infrastructure and Engineering: operational pipelines, deployment frameworks, automation, scalable architecture, cloud integration, CI/CD, container orchestration, distributed systems, feature repositories, reproducibility, infrastructure optimization, production-ready pipelines, resource management.",
-        "AI for Social Good: environmental monitoring, disaster preparedness, equitable access, conservation, renewable solutions, poverty alleviation, healthcare expansion, educational tools, sustainability efforts, social impact projects, societal challenges, resource allocation.",
-        "Multimodal AI: text-image fusion, audio-visual synchronization, cross-modal integration, video analytics, multimodal embeddings, sensor data combination, natural interaction, voice-image analysis, cross-modal understanding, video-text models, speech and vision alignment.",
-        "AI Hardware Optimization: GPU efficiency, parallel processing, neural accelerators, low-power computation, hardware-aware design, AI-specific processors, chip-level integration, inference acceleration, optimized computation, resource-efficient hardware, TPUs, custom AI chips.",
-        "AI in Finance: trading algorithms, credit risk analytics, fraud detection, financial trends, portfolio optimization, transaction monitoring, robo-advisors, quantitative strategies, payment processing, investment forecasting, predictive analytics, algorithmic trading.",
-        "Human-Centered AI: user interaction, adaptive interfaces, emotional intelligence, assistive technologies, accessibility features, human augmentation, usability design, inclusive frameworks, personalized interactions, emotion-aware systems, human-friendly interfaces, user-focused AI.",
-        "Data Science: data preprocessing, analytics, visualization, statistical modeling, feature selection, database integration, dimensionality reduction, exploratory analysis, big data solutions, pattern recognition, descriptive statistics, clustering, regression analysis.",
-    ]
-    # Categorize the content
-    categories = categorizer.categorize(
-        cleaned_text, cand_cat, threshold=0.5, multi_label=True
+    if in_flight is not None:
+        known = in_flight.register_hashes(batch.key, hashes, known)
+    for context, is_known in zip(pending, known):
+        if is_known:
+            print(f"Duplicate content detected: {context.job['title']}")
+            context.skip("Duplicate content")
+
+
+def embed(batch, milvus_client):
+    """
+    Embeds each article once; the vectors feed the similarity check, the
+    categorizer and the insert.
+    """
+    pending = batch.pending
+    if not pending:
+        return
+    vectors = milvus_client.embed_texts([context.cleaned_text for context in pending])
+    for context, vector in zip(pending, vectors):
+        context.embedding = vector
+
+
+def skip_similar(batch, milvus_client, in_flight=None, similarity_threshold=0.9):
+    """
+    Skips articles too similar to a stored (or in-flight) document.
+    """
+    pending = batch.pending
+    if not pending:
+        return
+    vectors = [context.embedding for context in pending]
+    existing_documents = milvus_client.check_many_existence(
+        similarity_threshold=similarity_threshold, vectors=vectors
     )
-    categories = [categories.split(":")[0] for categories in categories]
-    print(categories)
-    # Store in Milvus
+    if in_flight is not None:
+        existing_documents = in_flight.register_vectors(
+            batch.key,
+            vectors,
+            [{"title": context.job["title"]} for context in pending],
+            existing_documents,
+            similarity_threshold,
+        )
+    for context, existing_document in zip(pending, existing_documents):
+        if existing_document:
+            print(f"Duplicate document detected: {existing_document['title']}")
+            context.skip("Similar document exists")
+    if batch.pending:
+        print(f"[INFO] {len(batch.pending)} JOBS NOT IN DATABASE")
+
+
+def categorize(batch, categorizer):
+    pending = batch.pending
+    if not pending:
+        return
+    windows = [context.nli_windows for context in pending]
+    categories = categorizer.categorize_many(
+        [context.cleaned_text for context in pending],
+        CANDIDATE_CATEGORIES,
+        threshold=0.5,
+        multi_label=True,
+        embeddings=[context.embedding for context in pending],
+        windows=windows,
+    )
+    for context, labels, text_windows in zip(pending, categories, windows):
+        context.categories = [label.split(":")[0] for label in labels]
+        context.nli_windows = text_windows
+    print([context.categories for context in pending])
+
+
+def store(batch, milvus_client):
+    """
+    Inserts the remaining articles into Milvus.
+    """
+    pending = batch.pending
+    if not pending:
+        return
     try:
-        result = milvus_client.insert_data(
-            title=job["title"],
-            author=job["author"],
-            date=job["date"],
-            text=cleaned_text,
-            categories=categories,
+        results = milvus_client.insert_many(
+            [context.to_document() for context in pending],
+            vectors=[context.embedding for context in pending],
         )
-        print(f"Inserted article: {result}")
+        print(f"Inserted articles: {results}")
     except Exception as e:
-        print(f"Error inserting article: {e}")
+        print(f"Error inserting articles: {e}")
+        results = [{"status": "error", "message": str(e)}] * len(pending)
+    for context, result in zip(pending, results):
+        context.status = result
+
+
+def process_batch(jobs, cleaner, categorizer, milvus_client, quality_gate=None):
+    """
+    Runs a batch of jobs through every stage with batched model and Milvus calls.
+    Each article is cleaned, hashed and embedded exactly once.
+
+    Returns:
+        list: One status dict per job, in input order.
+    """
+    batch = JobBatch(jobs)
+    prepare(batch, cleaner, quality_gate)
+    skip_known(batch, milvus_client)
+    embed(batch, milvus_client)
+    skip_similar(batch, milvus_client)
+    categorize(batch, categorizer)
+    store(batch, milvus_client)
+    return batch.statuses
+
+
+def build_pipeline(
+    cleaner,
+    categorizer,
+    milvus_client,
+    job_stream=None,
+    payload_store=None,
+    quality_gate=None,
+):
+    """
+    Runs the stages of process_batch on their own threads, so the models work
+    on one batch while Milvus serves another. Milvus and Redis stages get
+    WORKER_IO_THREADS threads each, model stages one thread each.
+    """
+    in_flight = InFlightDocuments()
+
+    def finish(batch):
+        in_flight.release(batch.key)
+        if batch.error is not None:
+            return
+        if payload_store is not None:
+            payload_store.mark_processed(batch.jobs, batch.statuses)
+        if job_stream is not None:
+            job_stream.ack(completed_entries(batch.entry_ids, batch.statuses))
+
+    return StagedPipeline(
+        [
+            Stage("prepare", lambda batch: prepare(batch, cleaner, quality_gate)),
+            Stage(
+                "skip_known",
+                lambda batch: skip_known(batch, milvus_client, in_flight),
+                threads=IO_THREADS,
+            ),
+            Stage("embed", lambda batch: embed(batch, milvus_client)),
+            Stage(
+                "skip_similar",
+                lambda batch: skip_similar(batch, milvus_client, in_flight),
+                threads=IO_THREADS,
+            ),
+            Stage("categorize", lambda batch: categorize(batch, categorizer)),
+            Stage(
+                "store", lambda batch: store(batch, milvus_client), threads=IO_THREADS
+            ),
+            Stage("finish", finish, threads=IO_THREADS, always=True),
+        ],
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+
+
+def parse_jobs(entries):
+    """
+    Decodes (entry id, raw job) stream entries.
+
+    Returns:
+        tuple: The valid jobs, their entry ids, and the ids of the entries that
+            are not valid jobs.
+    """
+    jobs, entry_ids, invalid_ids = [], [], []
+    for entry_id, raw in entries:
+        try:
+            jobs.append(json.loads(raw))
+            entry_ids.append(entry_id)
+        except (TypeError, json.JSONDecodeError) as e:
+            print(f"Invalid job format: {e}")
+            invalid_ids.append(entry_id)
+    return jobs, entry_ids, invalid_ids
+
+
+def completed_entries(entry_ids, statuses):
+    """
+    Entries to acknowledge: every job that was inserted or skipped. Failed
+    inserts stay pending and are retried once another worker reclaims them.
+    """
+    return [
+        entry_id
+        for entry_id, status in zip(entry_ids, statuses)
+        if status["status"] != "error"
+    ]
 
 
 def check_redis_connection(redis_client):
@@ -84,14 +275,22 @@ def check_redis_connection(redis_client):
 
 def check_milvus_connection(milvus_host, milvus_port):
     try:
-        milvus_client = MilvusClient(host=milvus_host, port=milvus_port)
+        milvus_client = get_milvus_client(host=milvus_host, port=milvus_port)
         print("[PASS] Milvus connection is healthy.")
+        return milvus_client
     except Exception as e:
         print(f"[ERROR] Milvus connection failed: {e}")
         raise
 
 
 def main():
+    """
+    Single-process entry point. See app/worker/supervisor.py for the pool.
+    """
+    run_worker()
+
+
+def run_worker():
     # Connect to Redis
     print("connecting to redis")
     redis_host = os.getenv("REDIS_HOST", "localhost")
@@ -103,33 +302,61 @@ def main():
     # Health checks
     print("checking redis connection")
     check_redis_connection(redis_client)
+    job_stream = JobStream(redis_client)
+    job_stream.ensure_group()
+    # Article bodies are stored compressed, so they're read without decoding
+    payload_store = PayloadStore(redis.StrictRedis(host=redis_host, port=redis_port))
     milvus_host = os.getenv("MILVUS_HOST", "localhost")
     milvus_port = os.getenv("MILVUS_PORT", "19530")
     print("checking milvus connection")
-    check_milvus_connection(milvus_host, milvus_port)
-    cleaner = TextCleaner()
+    milvus_client = check_milvus_connection(milvus_host, milvus_port)
+    # Load both models and the dedup index once, before the first job arrives.
+    # Under the supervisor the models are already loaded and shared.
+    warm_up(milvus=False)
+    milvus_client.warm_dedup_index()
+    cleaner = get_cleaner()
     print("text cleaner initilized")
-    categorizer = ContentCategorizer()
+    quality_gate = QualityGate() if QUALITY_GATE else None
+    categorizer = get_categorizer()
     print("content categorizer initilized")
+    print(f"batch size {BATCH_SIZE}, max wait {MAX_WAIT}s, pipeline {PIPELINE}")
+    pipeline = (
+        build_pipeline(
+            cleaner,
+            categorizer,
+            milvus_client,
+            job_stream,
+            payload_store,
+            quality_gate,
+        )
+        if PIPELINE
+        else None
+    )
     while True:
         try:
-            print("popping job")
-            job_data = redis_client.lpop("article_processing_queue")
-            print(f"Job data: {job_data}")
-            if not job_data:
+            print("reading jobs")
+            entries = job_stream.pop_jobs(BATCH_SIZE, MAX_WAIT, IDLE_TIMEOUT)
+            if not entries:
                 print("No jobs in the queue.")
-                time.sleep(5)  # Avoid busy looping
                 continue
 
-            job = json.loads(job_data)
-            print(f"Processing job: {job}")
-            process_article(job, cleaner, categorizer)
+            jobs, entry_ids, invalid_ids = parse_jobs(entries)
+            jobs, entry_ids, expired_ids = payload_store.resolve(jobs, entry_ids)
+            print(f"Processing {len(jobs)} jobs")
+            job_stream.ack(invalid_ids + expired_ids)  # Retrying them can't help
+            if jobs and pipeline is not None:
+                # Blocks while the pipeline is full, which paces the reads
+                pipeline.submit(JobBatch(jobs, entry_ids))
+            elif jobs:
+                statuses = process_batch(
+                    jobs, cleaner, categorizer, milvus_client, quality_gate
+                )
+                payload_store.mark_processed(jobs, statuses)
+                job_stream.ack(completed_entries(entry_ids, statuses))
 
         except redis.exceptions.ConnectionError as e:
             print(f"Redis connection error: {e}")
             time.sleep(5)  # Retry after a delay
-        except json.JSONDecodeError as e:
-            print(f"Invalid job format: {e}")
         except Exception as e:
             print(f"Unhandled error: {e}")
 
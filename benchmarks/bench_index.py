@@ -0,0 +1,154 @@
+"""
+Builds each configured vector index on the same corpus and reports build time,
+memory, recall@k against brute force and p50/p99 search latency.
+
+Usage:
+    python benchmarks/bench_index.py --synthetic 200000 --queries 500 --k 10
+    python benchmarks/bench_index.py --corpus exported_vectors.npy
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.milvus_handler.index_config import IndexConfig
+from app.milvus_handler.near_duplicates import normalize
+from app.milvus_handler.tuner import exact_top_k, recall_at_k
+from pymilvus import (
+    Collection,
+    CollectionSchema,
+    DataType,
+    FieldSchema,
+    connections,
+    utility,
+)
+
+DEFAULT_SPECS = [
+    {"index_type": "IVF_FLAT", "metric_type": "L2", "build_params": {"nlist": 128}},
+    {"index_type": "IVF_FLAT", "metric_type": "COSINE"},
+    {"index_type": "HNSW", "metric_type": "COSINE"},
+    {"index_type": "IVF_PQ", "metric_type": "IP"},
+]
+
+
+def synthetic_corpus(count, dimension, clusters=256, seed=0):
+    """
+    Clustered unit vectors, closer to real sentence embeddings than uniform noise.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    assignments = rng.integers(0, clusters, size=count)
+    return normalize(centers[assignments] + 0.6 * rng.normal(size=(count, dimension)))
+
+
+def run_spec(spec, corpus, queries, truth, k, batch_size=5000):
+    config = IndexConfig(**spec)
+    name = f"bench_index_{uuid.uuid4().hex[:8]}"
+    schema = CollectionSchema(
+        fields=[
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True),
+            FieldSchema(
+                name="vector", dtype=DataType.FLOAT_VECTOR, dim=corpus.shape[1]
+            ),
+        ]
+    )
+    collection = Collection(name=name, schema=schema)
+    try:
+        for start in range(0, len(corpus), batch_size):
+            chunk = corpus[start : start + batch_size]
+            collection.insert([list(range(start, start + len(chunk))), chunk.tolist()])
+        collection.flush()
+
+        start = time.perf_counter()
+        collection.create_index(field_name="vector", index_params=config.index_params())
+        utility.wait_for_index_building_complete(name)
+        build_seconds = time.perf_counter() - start
+
+        collection.load()
+        memory = sum(
+            segment.mem_size for segment in utility.get_query_segment_info(name)
+        )
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            results = collection.search(
+                data=[query.tolist()],
+                anns_field="vector",
+                param=config.search_param(),
+                limit=k,
+            )
+            latencies.append(time.perf_counter() - start)
+            found.append(results[0].ids)
+    finally:
+        utility.drop_collection(name)
+
+    return {
+        "index": f"{config.index_type}/{config.metric_type}",
+        "build": json.dumps(config.build_params),
+        "search": json.dumps(config.search_params),
+        "build_s": build_seconds,
+        "memory_mb": memory / 1024**2,
+        "recall": recall_at_k(found, truth),
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="Exported vectors as a .npy matrix")
+    parser.add_argument("--synthetic", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--specs", help="JSON list of IndexConfig keyword arguments to compare"
+    )
+    parser.add_argument("--host", default=os.getenv("MILVUS_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("MILVUS_PORT", "19530"))
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = normalize(np.load(args.corpus))
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dimension)
+    rng = np.random.default_rng(1)
+    # Held-out queries: corpus vectors moved by noise of norm ~0.5, so they have
+    # meaningful neighbours without being stored themselves
+    noise = rng.normal(size=(args.queries, corpus.shape[1])) / np.sqrt(corpus.shape[1])
+    queries = normalize(
+        corpus[rng.integers(0, len(corpus), size=args.queries)] + 0.5 * noise
+    )
+    ids = np.arange(len(corpus))
+    chunks = (
+        (ids[start : start + 50_000], corpus[start : start + 50_000])
+        for start in range(0, len(corpus), 50_000)
+    )
+    truth = exact_top_k(chunks, queries, args.k).tolist()
+    specs = json.loads(args.specs) if args.specs else DEFAULT_SPECS
+
+    connections.connect(alias="default", host=args.host, port=args.port)
+    print(f"[INFO] Corpus {corpus.shape}, {len(queries)} queries, k={args.k}")
+    print(
+        f"{'index':<18} {'build_s':>8} {'mem_mb':>8} {'recall':>7} "
+        f"{'p50_ms':>7} {'p99_ms':>7}  params"
+    )
+    for spec in specs:
+        row = run_spec(spec, corpus, queries, truth, args.k)
+        print(
+            f"{row['index']:<18} {row['build_s']:8.1f} {row['memory_mb']:8.1f} "
+            f"{row['recall']:7.3f} {row['p50_ms']:7.2f} {row['p99_ms']:7.2f}  "
+            f"build={row['build']} search={row['search']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
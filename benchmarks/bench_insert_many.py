@@ -0,0 +1,83 @@
+"""
+Compares the per-document insert path with the batched insert_many path.
+
+Usage:
+    python benchmarks/bench_insert_many.py --documents 200 --batch-size 64
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.milvus_handler.milvus_client import MilvusClient
+from pymilvus import utility
+
+
+def make_documents(count, run_id):
+    """
+    Builds synthetic, unique documents shaped like the worker's jobs.
+    """
+    return [
+        {
+            "title": f"Benchmark article {i}",
+            "author": "Benchmark",
+            "date": "01-01-2024",
+            "text": f"[{run_id}] Benchmark article {i} about vector search, "
+            f"embeddings and retrieval pipelines. " * 20,
+            "categories": ["Data Science"],
+        }
+        for i in range(count)
+    ]
+
+
+def bench_single(client, documents):
+    start = time.perf_counter()
+    for document in documents:
+        client.insert_data(**document)
+    return time.perf_counter() - start
+
+
+def bench_batched(client, documents, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(documents), batch_size):
+        client.insert_many(documents[offset : offset + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", default=None)
+    args = parser.parse_args()
+
+    collection_name = f"bench_insert_{uuid.uuid4().hex[:8]}"
+    client = MilvusClient(
+        host=args.host, port=args.port, collection_name=collection_name
+    )
+    try:
+        single_seconds = bench_single(client, make_documents(args.documents, "single"))
+        batched_seconds = bench_batched(
+            client, make_documents(args.documents, "batched"), args.batch_size
+        )
+    finally:
+        utility.drop_collection(collection_name)
+
+    print(f"[INFO] Documents: {args.documents}, batch size: {args.batch_size}")
+    for name, seconds in (
+        ("insert_data", single_seconds),
+        ("insert_many", batched_seconds),
+    ):
+        print(
+            f"[INFO] {name:<12} {seconds:8.2f} s  "
+            f"{args.documents / seconds:8.1f} docs/s"
+        )
+    print(f"[INFO] Speedup: {single_seconds / batched_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
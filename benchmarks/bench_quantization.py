@@ -0,0 +1,115 @@
+"""
+Compares first-pass encodings of the embeddings (float32, int8, sign bits) by
+the memory their search structure needs and the recall@k they reach after an
+exact re-rank of k * factor candidates. Runs in-process, without Milvus.
+
+Usage:
+    python benchmarks/bench_quantization.py --synthetic 200000 --queries 500 --k 10
+    python benchmarks/bench_quantization.py --corpus exported_vectors.npy
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.milvus_handler.near_duplicates import normalize
+from app.milvus_handler.quantization import quantize_int8, rerank
+from app.milvus_handler.tuner import recall_at_k
+
+CHUNK = 50_000
+
+
+def synthetic_corpus(count, dimension, clusters=256, seed=0):
+    """
+    Clustered unit vectors, closer to real sentence embeddings than uniform noise.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    assignments = rng.integers(0, clusters, size=count)
+    return normalize(centers[assignments] + 0.6 * rng.normal(size=(count, dimension)))
+
+
+def top_k(score_chunk, count, queries, k):
+    """
+    Ids of the k best scores per query, best first. score_chunk(queries, start,
+    stop) scores one slice of the corpus.
+    """
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, count, CHUNK):
+        stop = min(start + CHUNK, count)
+        scores = np.concatenate(
+            [best_scores, score_chunk(queries, start, stop)], axis=1
+        )
+        ids = np.concatenate(
+            [
+                best_ids,
+                np.broadcast_to(np.arange(start, stop), (len(queries), stop - start)),
+            ],
+            axis=1,
+        )
+        keep = min(k, scores.shape[1])
+        top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="Exported vectors as a .npy matrix")
+    parser.add_argument("--synthetic", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--factors", default="1,2,4,8", help="Re-rank candidates per result"
+    )
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = normalize(np.load(args.corpus))
+    else:
+        corpus = synthetic_corpus(args.synthetic, args.dimension)
+    count, dimension = corpus.shape
+    rng = np.random.default_rng(1)
+    # Held-out queries: corpus vectors moved by noise of norm ~0.5
+    noise = rng.normal(size=(args.queries, dimension)) / np.sqrt(dimension)
+    queries = normalize(corpus[rng.integers(0, count, size=args.queries)] + 0.5 * noise)
+    factors = [int(factor) for factor in args.factors.split(",")]
+
+    codes, scales = quantize_int8(corpus)
+    signs = np.where(corpus > 0, 1, -1).astype(np.int8)
+    encodings = {
+        # Bytes per vector in the first-pass structure, and its scorer
+        "float32": (4 * dimension, lambda q, a, b: q @ corpus[a:b].T),
+        "int8": (dimension + 4, lambda q, a, b: q @ (codes[a:b] * scales[a:b]).T),
+        # Ranking by the ±1 dot product is ranking by Hamming distance
+        "binary": (dimension // 8, lambda q, a, b: np.sign(q) @ signs[a:b].T),
+    }
+
+    truth = top_k(encodings["float32"][1], count, queries, args.k).tolist()
+    vectors = dict(enumerate(corpus))
+    print(f"[INFO] Corpus {corpus.shape}, {len(queries)} queries, k={args.k}")
+    print(f"{'encoding':<8} {'bytes':>6} {'mem_mb':>8} {'factor':>6} {'recall':>7}")
+    for name, (row_bytes, score_chunk) in encodings.items():
+        candidates = top_k(score_chunk, count, queries, args.k * max(factors))
+        for factor in factors:
+            if name == "float32" and factor > 1:
+                continue  # Exact already
+            reranked = rerank(
+                queries, candidates[:, : args.k * factor].tolist(), vectors, args.k
+            )
+            found = [[hit for hit, _ in hits] for hits in reranked]
+            print(
+                f"{name:<8} {row_bytes:6d} {row_bytes * count / 1024**2:8.1f} "
+                f"{factor:6d} {recall_at_k(found, truth):7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
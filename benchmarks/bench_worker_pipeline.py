@@ -0,0 +1,135 @@
+"""
+Compares the sequential worker loop (process_batch) with the staged pipeline.
+
+The models and Milvus are replaced by stand-ins that sleep for a configurable
+time per call plus a time per document, so the run measures how much the
+stages overlap rather than the models themselves. Like torch, ONNX Runtime and
+the Milvus client, the stand-ins release the GIL while they wait.
+
+Usage:
+    python benchmarks/bench_worker_pipeline.py --batches 20 --batch-size 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.worker.context import JobBatch
+from app.worker.worker import build_pipeline, process_batch
+
+
+def pause(call_ms, document_ms, count):
+    time.sleep((call_ms + document_ms * count) / 1000)
+
+
+class Cleaner:
+    def __init__(self, document_ms):
+        self.document_ms = document_ms
+
+    def clean_text(self, text):
+        pause(0, self.document_ms, 1)
+        return text
+
+
+class Categorizer:
+    def __init__(self, document_ms):
+        self.document_ms = document_ms
+
+    def categorize_many(self, texts, categories, **kwargs):
+        pause(0, self.document_ms, len(texts))
+        return [[categories[0]] for _ in texts]
+
+
+class Milvus:
+    def __init__(self, round_trip_ms, embed_ms, dimension=384):
+        self.round_trip_ms = round_trip_ms
+        self.embed_ms = embed_ms
+        self.rng = np.random.default_rng(0)
+        self.dimension = dimension
+
+    def contains_texts(self, texts, hashes=None):
+        pause(self.round_trip_ms, 0, len(texts))
+        return [False] * len(texts)
+
+    def embed_texts(self, texts):
+        pause(0, self.embed_ms, len(texts))
+        vectors = self.rng.standard_normal((len(texts), self.dimension))
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def check_many_existence(self, similarity_threshold, vectors):
+        pause(self.round_trip_ms, 0, len(vectors))
+        return [None] * len(vectors)
+
+    def insert_many(self, documents, vectors=None):
+        pause(self.round_trip_ms, 0, len(documents))
+        return [{"status": "success"}] * len(documents)
+
+
+def make_batches(count, batch_size):
+    return [
+        [
+            {
+                "title": f"Benchmark article {b}-{i}",
+                "author": "Benchmark",
+                "date": "01-01-2024",
+                "text": f"Benchmark article {b}-{i} about retrieval pipelines.",
+            }
+            for i in range(batch_size)
+        ]
+        for b in range(count)
+    ]
+
+
+def bench_sequential(batches, cleaner, categorizer, milvus):
+    start = time.perf_counter()
+    for jobs in batches:
+        process_batch(jobs, cleaner, categorizer, milvus)
+    return time.perf_counter() - start
+
+
+def bench_pipeline(batches, cleaner, categorizer, milvus):
+    pipeline = build_pipeline(cleaner, categorizer, milvus)
+    start = time.perf_counter()
+    for jobs in batches:
+        pipeline.submit(JobBatch(jobs))
+    pipeline.close()
+    return time.perf_counter() - start, pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--clean-ms", type=float, default=2.0, help="Per document")
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="Per document")
+    parser.add_argument("--categorize-ms", type=float, default=15.0, help="Per doc")
+    parser.add_argument("--milvus-ms", type=float, default=40.0, help="Per call")
+    args = parser.parse_args()
+
+    batches = make_batches(args.batches, args.batch_size)
+    cleaner = Cleaner(args.clean_ms)
+    categorizer = Categorizer(args.categorize_ms)
+    documents = args.batches * args.batch_size
+
+    sequential = bench_sequential(
+        batches, cleaner, categorizer, Milvus(args.milvus_ms, args.embed_ms)
+    )
+    overlapped, stats = bench_pipeline(
+        batches, cleaner, categorizer, Milvus(args.milvus_ms, args.embed_ms)
+    )
+
+    print(f"{'mode':<12}{'seconds':>10}{'docs/s':>10}")
+    print(f"{'sequential':<12}{sequential:>10.2f}{documents / sequential:>10.1f}")
+    print(f"{'pipeline':<12}{overlapped:>10.2f}{documents / overlapped:>10.1f}")
+    print(f"speedup: {sequential / overlapped:.2f}x\n")
+    print(f"{'stage':<14}{'batches':>9}{'busy s':>9}")
+    for name, stage in stats.items():
+        print(f"{name:<14}{stage['items']:>9}{stage['busy_seconds']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
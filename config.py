@@ -8,3 +8,6 @@ class Config:
     MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
     MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
     EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "./embeddings")
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "milvus")
+    LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", "./local_store")
+    WARM_UP_MODELS = os.getenv("WARM_UP_MODELS", "False") == "True"
@@ -1,5 +1,6 @@
 from flask import Flask
 from app.routes import main
+from app.registry import configure, warm_up
 from config import Config
 import os
 
@@ -11,6 +12,13 @@ def create_app():
     )
     app.config.from_object(Config)
     app.register_blueprint(main)
+    configure(
+        backend=app.config["VECTOR_BACKEND"],
+        local_store_dir=app.config["LOCAL_STORE_DIR"],
+    )
+    if app.config["WARM_UP_MODELS"]:
+        # Load the embedder and connect to Milvus before the first /query
+        warm_up(categorizer=False)
     return app
 
 
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import redis
+from app.worker.job_queue import JobStream
+from app.worker.payloads import BODY_KEY
+
+
+class TestJobStream(unittest.TestCase):
+    def setUp(self):
+        """
+        Uses a fresh stream and legacy list on the Redis of REDIS_HOST/REDIS_PORT.
+        """
+        self.redis = redis.StrictRedis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            decode_responses=True,
+        )
+        suffix = uuid.uuid4().hex[:8]
+        self.stream_name = f"test_stream_{suffix}"
+        self.legacy_queue = f"test_queue_{suffix}"
+
+    def tearDown(self):
+        self.redis.delete(
+            self.stream_name, f"{self.stream_name}:dead", self.legacy_queue
+        )
+
+    def consumer(self, name, **kwargs):
+        stream = JobStream(
+            self.redis,
+            stream=self.stream_name,
+            consumer=name,
+            legacy_queue=self.legacy_queue,
+            **kwargs,
+        )
+        stream.ensure_group()
+        return stream
+
+    def add_job(self, title):
+        return self.redis.xadd(self.stream_name, {"job": json.dumps({"title": title})})
+
+    def test_batches_and_ack(self):
+        stream = self.consumer("a")
+        stream.ensure_group()  # Idempotent
+        for i in range(3):
+            self.add_job(f"Job {i}")
+        entries = stream.pop_jobs(batch_size=2, max_wait=0.1, idle_timeout=0.1)
+        self.assertEqual(
+            [json.loads(raw)["title"] for _, raw in entries], ["Job 0", "Job 1"]
+        )
+        stream.ack([entry_id for entry_id, _ in entries])
+        self.assertEqual(self.redis.xlen(self.stream_name), 1)
+        self.assertEqual(len(stream.pop_jobs(2, 0.1, 0.1)), 1)
+        self.assertEqual(stream.pop_jobs(2, 0.1, 0.1), [])
+
+    def test_unacked_jobs_are_reclaimed(self):
+        crashed = self.consumer("crashed", min_idle_ms=0)
+        self.add_job("Lost job")
+        crashed.pop_jobs(1, 0.1, 0.1)  # Read, never acked
+
+        survivor = self.consumer("survivor", min_idle_ms=0)
+        entries = survivor.pop_jobs(1, 0.1, 0.1)
+        self.assertEqual(json.loads(entries[0][1])["title"], "Lost job")
+
+    def test_poison_jobs_go_to_dead_letters(self):
+        stream = self.consumer("a", min_idle_ms=0, max_deliveries=2)
+        self.add_job("Poison")
+        for _ in range(3):
+            stream.pop_jobs(1, 0.1, 0.1)
+        self.assertEqual(self.redis.xlen(f"{self.stream_name}:dead"), 1)
+        self.assertEqual(self.redis.xlen(self.stream_name), 0)
+
+    def test_dead_letters_drop_their_body(self):
+        stream = self.consumer("a", min_idle_ms=0, max_deliveries=1)
+        digest = uuid.uuid4().hex
+        body_key = BODY_KEY.format(digest)
+        self.redis.set(body_key, "compressed body")
+        job = {"title": "Poison", "body_hash": digest}
+        self.redis.xadd(self.stream_name, {"job": json.dumps(job)})
+        for _ in range(2):
+            stream.pop_jobs(1, 0.1, 0.1)
+        dead = self.redis.xrange(f"{self.stream_name}:dead")
+        self.assertEqual(json.loads(dead[0][1]["job"])["title"], "Poison")
+        self.assertFalse(self.redis.exists(body_key))
+
+    def test_legacy_list_is_drained(self):
+        self.redis.rpush(self.legacy_queue, json.dumps({"title": "Old producer"}))
+        entries = self.consumer("a").pop_jobs(1, 0.1, 0.1)
+        self.assertEqual(json.loads(entries[0][1])["title"], "Old producer")
+        self.assertEqual(self.redis.llen(self.legacy_queue), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
 import uuid
 import sys, os
+from unittest import mock
+
+import numpy as np
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 from app.milvus_handler.milvus_client import MilvusClient
@@ -46,6 +49,148 @@ class TestMilvusClient(unittest.TestCase):
         )
         self.assertEqual(result["status"], "success")
 
+    def test_insert_many(self):
+        """
+        Test that a batch insert reports one status per document, in order.
+        """
+        documents = [
+            {
+                "title": f"Batch Title {i}",
+                "author": "Batch Author",
+                "date": "01-01-2023",
+                "text": f"Batch text content {i}.",
+                "categories": ["Category1"],
+            }
+            for i in range(3)
+        ]
+        documents.append(dict(documents[0]))  # Duplicate inside the batch
+        documents.append(dict(documents[1], date="not a date"))
+        results = self.client.insert_many(documents)
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["success", "success", "success", "skipped", "error"],
+        )
+        # A second pass only finds duplicates of what is already stored
+        results = self.client.insert_many(documents[:3])
+        self.assertEqual([result["status"] for result in results], ["skipped"] * 3)
+        print("[PASS] Batch insert test passed.")
+
+    def test_content_hash_dedup(self):
+        """
+        Test that texts with backslashes dedup by normalized content hash.
+        """
+        text = 'Paths like C:\\models\\bert and "quotes" are fine.'
+        result = self.client.insert_data(
+            title="Hash Title",
+            author="Hash Author",
+            date="01-01-2023",
+            text=text,
+            categories=["Category1"],
+            url="http://example.com/hash",
+        )
+        self.assertEqual(result["status"], "success")
+        self.assertTrue(self.client.contains_text("  " + text.upper()))
+        self.assertFalse(self.client.contains_text("A brand new article."))
+        print("[PASS] Content hash dedup test passed.")
+
+    def test_content_hash_dedup_across_clients(self):
+        """
+        Test that a hash inserted by another process's client is seen as stored.
+        """
+        other = MilvusClient(collection_name=self.client.collection_name)
+        self.client.warm_dedup_index()
+        text = "Written by another worker process."
+        result = other.insert_data(
+            title="Other Title",
+            author="Other Author",
+            date="01-01-2023",
+            text=text,
+            categories=["Category1"],
+        )
+        self.assertEqual(result["status"], "success")
+        self.assertTrue(self.client.contains_text(text))
+        statuses = self.client.insert_many(
+            [
+                {
+                    "title": "Other Title",
+                    "author": "Other Author",
+                    "date": "01-01-2023",
+                    "text": text,
+                    "categories": ["Category1"],
+                }
+            ]
+        )
+        self.assertEqual(statuses[0]["status"], "skipped")
+        print("[PASS] Cross-client content hash dedup test passed.")
+
+    def test_known_hashes_skip_the_query(self):
+        """
+        Test that hashes loaded at warm-up are answered without querying Milvus.
+        """
+        text = "Stored before the worker warmed up."
+        self.client.insert_data(
+            title="Warm Title",
+            author="Warm Author",
+            date="01-01-2023",
+            text=text,
+            categories=["Category1"],
+        )
+        other = MilvusClient(collection_name=self.client.collection_name)
+        self.assertGreaterEqual(other.warm_dedup_index(), 1)
+        with mock.patch.object(other, "_run", side_effect=AssertionError):
+            self.assertTrue(other.contains_text(text))
+        self.assertFalse(other.contains_text("Never stored anywhere."))
+        print("[PASS] Known hash test passed.")
+
+    def test_near_duplicates_before_flush(self):
+        """
+        Test that near-duplicates are caught within a batch and right after insert.
+        """
+        text = "Milvus stores embeddings for near-duplicate detection."
+        matches = self.client.check_many_existence([text, text + " "])
+        self.assertIsNone(matches[0])
+        self.assertIsNotNone(matches[1])
+
+        self.client.insert_data(
+            title="Recent Title",
+            author="Recent Author",
+            date="01-01-2023",
+            text=text,
+            categories=["Category1"],
+        )
+        match = self.client.check_text_existence(text + "!")
+        self.assertEqual(match["title"], "Recent Title")
+        print("[PASS] Near-duplicate cache test passed.")
+
+    def test_precomputed_vectors_are_normalized(self):
+        """
+        Test that vectors passed to insert_many are stored with unit norm.
+        """
+        text = "Precomputed embeddings come straight from the worker."
+        vectors = 0.1 * self.client.embed_texts([text])
+        statuses = self.client.insert_many(
+            [
+                {
+                    "title": "Precomputed Title",
+                    "author": "Test Author",
+                    "date": "01-01-2023",
+                    "text": text,
+                    "categories": [],
+                }
+            ],
+            vectors=vectors,
+        )
+        self.assertEqual(statuses[0]["status"], "success")
+        rows = self.client._run(
+            lambda collection: collection.query(
+                'title == "Precomputed Title"', output_fields=["vector"], limit=1
+            )
+        )
+        self.assertAlmostEqual(float(np.linalg.norm(rows[0]["vector"])), 1.0, places=4)
+        match = self.client.check_many_existence([text], vectors=vectors)[0]
+        self.assertEqual(match["title"], "Precomputed Title")
+        print("[PASS] Precomputed vector test passed.")
+
     def test_duplicate_detection(self):
         """
         Test that duplicates are correctly detected and skipped.
@@ -77,6 +222,164 @@ class TestMilvusClient(unittest.TestCase):
         self.assertGreater(len(results), 0)
         print("[PASS] Search documents test passed.")
 
+    def test_search_many(self):
+        """
+        Test that a batch search returns one result list per query, in order.
+        """
+        self.client.insert_many(
+            [
+                {
+                    "title": "Batch Search",
+                    "author": "Test Author",
+                    "date": "01-01-2023",
+                    "text": text,
+                    "categories": [],
+                }
+                for text in (
+                    "Gradient boosting builds an ensemble of shallow trees.",
+                    "Diffusion models generate images by iterative denoising.",
+                )
+            ]
+        )
+        results = self.client.search_many(
+            ["ensembles of decision trees", "image generation by denoising"], limit=1
+        )
+        self.assertEqual(len(results), 2)
+        self.assertIn("trees", results[0][0]["text"])
+        self.assertIn("denoising", results[1][0]["text"])
+        self.assertEqual(self.client.search_many([]), [])
+        print("[PASS] Batch search test passed.")
+
+    def test_projection_and_get_by_ids(self):
+        """
+        Test that id-only searches are hydrated by get_by_ids.
+        """
+        text = "Retrieval augmented generation grounds answers in documents."
+        self.client.insert_data(
+            title="Projection Title",
+            author="Test Author",
+            date="01-01-2023",
+            text=text,
+            categories=["NLP"],
+        )
+        hits = self.client.search_similar(text, limit=1, projection="ids")
+        self.assertEqual(set(hits[0]), {"id", "distance"})
+        document = self.client.get_by_ids([hits[0]["id"]])[0]
+        self.assertEqual(document["text"], text)
+        self.client.get_by_ids([hits[0]["id"]])
+        self.assertEqual(self.client.document_cache_stats()["hits"], 1)
+        print("[PASS] Projection test passed.")
+
+    def test_search_passages(self):
+        """
+        Test that passages of a long document are grouped under their parent.
+        """
+        filler = " ".join(
+            f"Paragraph {i} discusses unrelated tooling details." for i in range(60)
+        )
+        text = filler + " Quantization stores weights as eight bit integers."
+        self.client.insert_data(
+            title="Passage Title",
+            author="Test Author",
+            date="01-01-2023",
+            text=text,
+            categories=["Efficiency"],
+        )
+        groups = self.client.search_passages(
+            ["eight bit integer weights"], category_filter="Efficiency", limit=1
+        )[0]
+        self.assertEqual(groups[0]["title"], "Passage Title")
+        self.assertTrue(
+            any("Quantization" in passage["text"] for passage in groups[0]["passages"])
+        )
+        self.assertTrue(all(len(p["text"]) < len(text) for p in groups[0]["passages"]))
+        print("[PASS] Passage search test passed.")
+
+    def test_date_range(self):
+        """
+        Test that since/until restrict results to the documents' dates.
+        """
+        self.client.insert_many(
+            [
+                {
+                    "title": f"Release {date}",
+                    "author": "Test Author",
+                    "date": date,
+                    "text": f"Release notes of the vector database, published {date}.",
+                    "categories": [],
+                }
+                for date in ("2023-01-15", "15-06-2024")
+            ]
+        )
+        results = self.client.search_similar(
+            "vector database release notes", limit=5, since="2024-01-01"
+        )
+        self.assertTrue(results)
+        self.assertTrue(all(r["date"] >= "2024-01-01" for r in results))
+        results = self.client.search_similar(
+            "vector database release notes", limit=5, until="31-12-2023"
+        )
+        self.assertTrue(all(r["date"] <= "2023-12-31" for r in results))
+        print("[PASS] Date range test passed.")
+
+    def test_category_filter(self):
+        """
+        Test that category filters match whole category names only.
+        """
+        self.client.insert_data(
+            title="Vision Title",
+            author="Vision Author",
+            date="01-01-2023",
+            text="Object detection with convolutional networks.",
+            categories=["Computer Vision"],
+        )
+        results = self.client.search_similar(
+            "object detection", category_filter="Computer Vision", limit=5
+        )
+        self.assertTrue(all("Computer Vision" in r["categories"] for r in results))
+        self.assertGreater(len(results), 0)
+        partial = self.client.search_similar(
+            "object detection", category_filter="Vision", limit=5
+        )
+        self.assertEqual(partial, [])
+        print("[PASS] Category filter test passed.")
+
+    def test_binary_quantization(self):
+        """
+        Test that a sign-bit collection re-ranks its candidates exactly.
+        """
+        with mock.patch.dict(os.environ, {"MILVUS_QUANTIZATION": "binary"}):
+            client = MilvusClient(
+                collection_name=f"test_binary_{uuid.uuid4().hex[:8]}",
+                embedder=self.client.embedder,
+                passages=False,
+            )
+        try:
+            self.assertIn("binary_vector", client._fields)
+            client.insert_many(
+                [
+                    {
+                        "title": f"Binary Title {i}",
+                        "author": "Test Author",
+                        "date": "01-01-2024",
+                        "text": text,
+                        "categories": [],
+                    }
+                    for i, text in enumerate(
+                        [
+                            "Sign bits compress embeddings thirty-two times.",
+                            "Gardening tips for growing tomatoes in spring.",
+                        ]
+                    )
+                ]
+            )
+            results = client.search_similar("compressing embeddings", limit=2)
+            self.assertEqual(results[0]["title"], "Binary Title 0")
+            self.assertGreater(results[0]["distance"], results[1]["distance"])
+        finally:
+            utility.drop_collection(client.collection_name)
+        print("[PASS] Binary quantization test passed.")
+
     @classmethod
     def tearDownClass(cls):
         """
@@ -85,6 +388,8 @@ class TestMilvusClient(unittest.TestCase):
         if utility.has_collection(cls.client.collection_name):
             utility.drop_collection(cls.client.collection_name)
             print(f"[INFO] Test collection '{cls.client.collection_name}' dropped.")
+        if utility.has_collection(cls.client.passages_collection_name):
+            utility.drop_collection(cls.client.passages_collection_name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+import unittest
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+import redis
+from app.scraper.scraper.claim_check import body_hash, enqueue_article
+from app.worker.payloads import BODY_KEY, PROCESSED_KEY, PayloadStore
+
+
+class TestClaimCheck(unittest.TestCase):
+    def setUp(self):
+        """
+        Uses a fresh stream on the Redis of REDIS_HOST/REDIS_PORT; the producer
+        client decodes responses like the scrapers' does.
+        """
+        host = os.getenv("REDIS_HOST", "localhost")
+        port = int(os.getenv("REDIS_PORT", 6379))
+        self.producer = redis.StrictRedis(host=host, port=port, decode_responses=True)
+        self.store = PayloadStore(redis.StrictRedis(host=host, port=port))
+        self.stream_name = f"test_stream_{uuid.uuid4().hex[:8]}"
+        self.text = f"Article body {uuid.uuid4().hex} " * 200
+        self.digest = body_hash(self.text)
+
+    def tearDown(self):
+        self.producer.delete(
+            self.stream_name,
+            BODY_KEY.format(self.digest),
+            PROCESSED_KEY.format(self.digest),
+        )
+
+    def enqueue(self):
+        job = {"title": "Claim check", "text": self.text}
+        return enqueue_article(self.producer, job, stream=self.stream_name)
+
+    def pop(self):
+        entries = self.producer.xrange(self.stream_name)
+        return [json.loads(fields["job"]) for _, fields in entries], [
+            entry_id for entry_id, _ in entries
+        ]
+
+    def test_stream_carries_a_reference(self):
+        self.assertTrue(self.enqueue())
+        jobs, entry_ids = self.pop()
+        self.assertNotIn("text", jobs[0])
+        self.assertEqual(jobs[0]["body_hash"], self.digest)
+        self.assertLess(
+            self.producer.strlen(BODY_KEY.format(self.digest)), len(self.text) / 10
+        )
+
+        jobs, entry_ids, expired = self.store.resolve(jobs, entry_ids)
+        self.assertEqual(jobs[0]["text"], self.text)
+        self.assertEqual(expired, [])
+
+    def test_queued_and_processed_bodies_are_not_requeued(self):
+        self.assertTrue(self.enqueue())
+        self.assertFalse(self.enqueue())  # Still waiting in the stream
+
+        jobs, _ = self.pop()
+        self.store.mark_processed(jobs, [{"status": "skipped"}])
+        self.assertFalse(self.producer.exists(BODY_KEY.format(self.digest)))
+        self.assertFalse(self.enqueue())
+        self.assertEqual(self.producer.xlen(self.stream_name), 1)
+
+    def test_failed_enqueue_keeps_no_body(self):
+        self.producer.set(self.stream_name, "not a stream")
+        with self.assertRaises(redis.exceptions.ResponseError):
+            self.enqueue()
+        self.assertFalse(self.producer.exists(BODY_KEY.format(self.digest)))
+        self.producer.delete(self.stream_name)
+        self.assertTrue(self.enqueue())
+
+    def test_failed_jobs_keep_their_body(self):
+        self.enqueue()
+        jobs, _ = self.pop()
+        self.store.mark_processed(jobs, [{"status": "error"}])
+        self.assertTrue(self.producer.exists(BODY_KEY.format(self.digest)))
+        self.assertFalse(self.producer.exists(PROCESSED_KEY.format(self.digest)))
+
+    def test_expired_bodies_are_dropped(self):
+        self.enqueue()
+        jobs, entry_ids = self.pop()
+        self.producer.delete(BODY_KEY.format(self.digest))
+        inline = {"title": "Inline", "text": "Old producer"}
+        jobs, kept_ids, expired = self.store.resolve(
+            jobs + [inline], entry_ids + ["inline-id"]
+        )
+        self.assertEqual(jobs, [inline])
+        self.assertEqual(kept_ids, ["inline-id"])
+        self.assertEqual(expired, entry_ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
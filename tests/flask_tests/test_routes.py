@@ -19,6 +19,19 @@ class TestRoutes(unittest.TestCase):
         response = self.client.get("/scrape_status/job_1")
         self.assertIn("status", response.json)
 
+    def test_query_batch_validation(self):
+        response = self.client.post("/query/batch", json={"queries": []})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/query/batch", json={"queries": ["what is rag?"], "mode": "summary"}
+        )
+        self.assertEqual(response.status_code, 400)
+        for limit in (0, -1, 10_000):
+            response = self.client.post(
+                "/query/batch", json={"queries": ["what is rag?"], "limit": limit}
+            )
+            self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
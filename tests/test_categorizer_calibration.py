@@ -0,0 +1,78 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+HAS_CATEGORIZER_DEPS = all(
+    importlib.util.find_spec(module) is not None for module in ("transformers", "torch")
+)
+LABELS = ["a", "b"]
+
+
+class FakeEmbedder:
+    """
+    Embeds the labels as the two axes and each text as the unit vector at the
+    angle (in degrees) it spells, so similarities cover 0..1.
+    """
+
+    def encode(self, texts):
+        if list(texts) == LABELS:
+            return np.eye(2, dtype=np.float32)
+        angles = np.radians([float(text) for text in texts])
+        return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+@unittest.skipUnless(HAS_CATEGORIZER_DEPS, "transformers and torch needed")
+class TestCalibration(unittest.TestCase):
+    def setUp(self):
+        from app.organizer.categorizer import ContentCategorizer
+
+        self.categorizer = ContentCategorizer(
+            mode="embedding", embedder=FakeEmbedder(), ambiguity_margin=0
+        )
+        self.texts = [str(angle) for angle in range(0, 91, 5)]
+
+        # NLI scores following a logistic with a different scale and center
+        def nli_scores(texts, candidate_labels, multi_label, batch_size, windows=None):
+            similarities = self.categorizer._similarities(texts, candidate_labels)
+            targets = 1 / (1 + np.exp(-8.0 * (similarities - 0.6)))
+            return [dict(zip(candidate_labels, row.tolist())) for row in targets]
+
+        self.nli_scores = nli_scores
+
+    def error(self):
+        targets = self.nli_scores(self.texts, LABELS, True, 8)
+        scores = self.categorizer._embedding_scores(self.texts, LABELS, True)
+        return np.mean(
+            [
+                abs(score[label] - target[label])
+                for score, target in zip(scores, targets)
+                for label in LABELS
+            ]
+        )
+
+    def test_calibrate_moves_scores_toward_nli(self):
+        with mock.patch.object(self.categorizer, "_nli_scores", self.nli_scores):
+            before = self.error()
+            scale, center = self.categorizer.calibrate(
+                self.texts, LABELS, steps=5000, learning_rate=2.0
+            )
+            after = self.error()
+        self.assertLess(after, before / 4)
+        self.assertAlmostEqual(center, 0.6, delta=0.05)
+
+    def test_saved_calibration_is_loaded(self):
+        from app.organizer.categorizer import load_calibration, save_calibration
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "calibration.json")
+            self.assertEqual(load_calibration(path), {})
+            save_calibration({"scale": 12.5, "center": 0.4}, path)
+            self.assertEqual(load_calibration(path), {"scale": 12.5, "center": 0.4})
+
+
+if __name__ == "__main__":
+    unittest.main()
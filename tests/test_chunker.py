@@ -0,0 +1,38 @@
+import unittest
+
+from app.cleaner.chunker import TextChunker
+
+
+class TestTextChunker(unittest.TestCase):
+    def setUp(self):
+        self.chunker = TextChunker(max_words=12, overlap_words=6)
+
+    def test_short_text_is_one_passage(self):
+        text = "Transformers use attention. They scale well."
+        self.assertEqual(self.chunker.chunk_text(text), [text])
+
+    def test_passages_overlap_and_cover_the_text(self):
+        sentences = [f"Sentence number {i} is here." for i in range(10)]
+        passages = self.chunker.chunk_text(" ".join(sentences))
+        self.assertGreater(len(passages), 1)
+        self.assertTrue(all(len(passage.split()) <= 12 for passage in passages))
+        for sentence in sentences:
+            self.assertTrue(any(sentence in passage for passage in passages))
+        for previous, passage in zip(passages, passages[1:]):
+            last_sentence = previous.rsplit(". ", 1)[-1]
+            self.assertTrue(passage.startswith(last_sentence.rstrip(".")))
+
+    def test_long_sentences_overlap_by_words(self):
+        words = [f"w{i}" for i in range(30)]
+        passages = self.chunker.chunk_text(" ".join(words))
+        self.assertTrue(all(len(passage.split()) <= 12 for passage in passages))
+        self.assertEqual(passages[0].split(), words[:12])
+        self.assertEqual(passages[1].split()[:6], words[6:12])
+        self.assertEqual(passages[-1].split()[-1], "w29")
+
+    def test_empty_text(self):
+        self.assertEqual(self.chunker.chunk_text("   "), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -57,6 +57,54 @@ class TestContentCategorizer(unittest.TestCase):
         )
         self.assertIn("AI Ethics", categories)
 
+    def test_categorize_many_shape(self):
+        texts = [
+            "Reinforcement learning agents learn policies from rewards.",
+            "",
+            "Generative AI models like GPT-3 create realistic text.",
+        ]
+        categories = self.categorizer.categorize_many(
+            texts, self.labels, threshold=0.3, multi_label=True
+        )
+        self.assertEqual(len(categories), 3)
+        self.assertIn("Reinforcement Learning", categories[0])
+        self.assertEqual(categories[1], [])
+        self.assertIn("Generative AI", categories[2])
+
+    def test_long_text_is_windowed(self):
+        filler = "The weather was mild and the meeting ran long. " * 200
+        text = filler + "Convolutional networks detect objects in video frames."
+        self.assertGreater(len(self.categorizer.window_texts(text)), 1)
+        categories = self.categorizer.categorize(
+            text, self.labels, threshold=0.3, multi_label=True
+        )
+        self.assertIn("Computer Vision", categories)
+
+
+class TestEmbeddingCategorizer(unittest.TestCase):
+    def setUp(self):
+        self.categorizer = ContentCategorizer(mode="embedding")
+        self.labels = [
+            "Computer Vision: image analysis, object detection, segmentation.",
+            "AI in Finance: trading algorithms, fraud detection, credit risk.",
+        ]
+
+    def test_embedding_mode_matches_topic(self):
+        text = "Object detection and image segmentation with convolutional networks."
+        categories = self.categorizer.categorize(
+            text, self.labels, threshold=0.5, multi_label=True
+        )
+        self.assertIn(self.labels[0], categories)
+        self.assertNotIn(self.labels[1], categories)
+
+    def test_precomputed_embedding(self):
+        text = "Fraud detection models score card transactions in real time."
+        embedding = self.categorizer.embedder.encode([text])[0]
+        categories = self.categorizer.categorize(
+            text, self.labels, threshold=0.5, multi_label=True, embedding=embedding
+        )
+        self.assertIn(self.labels[1], categories)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+from app.milvus_handler.dedup import content_hash
+
+
+class TestContentHash(unittest.TestCase):
+    def test_normalization(self):
+        self.assertEqual(
+            content_hash("Deep  Learning\nrocks"), content_hash("deep learning rocks ")
+        )
+
+    def test_backslashes_and_quotes(self):
+        text = 'C:\\models\\bert "base"'
+        self.assertNotEqual(content_hash(text), content_hash("C:models bert base"))
+        self.assertEqual(len(content_hash(text)), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from app.milvus_handler.document_cache import DocumentCache
+
+
+class TestDocumentCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = DocumentCache(capacity=2)
+        cache.put_many({1: {"title": "a"}, 2: {"title": "b"}})
+        cache.get_many([1])  # 2 is now the least recently used
+        cache.put_many({3: {"title": "c"}})
+        self.assertEqual(set(cache.get_many([1, 2, 3])), {1, 3})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 1))
+
+    def test_disabled(self):
+        cache = DocumentCache(capacity=0)
+        cache.put_many({1: {"title": "a"}})
+        self.assertEqual(cache.get_many([1]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+import numpy as np
+from app.embeddings.batcher import DynamicBatcher
+
+
+class RecordingEmbedder:
+    """
+    Encodes each text as its length and records the batch sizes it was called with.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=64):
+        self.calls.append(len(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+class TestDynamicBatcher(unittest.TestCase):
+    def test_concurrent_calls_share_a_batch(self):
+        embedder = RecordingEmbedder()
+        batcher = DynamicBatcher(embedder, max_wait_ms=200, max_batch_size=64)
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def encode(i):
+            barrier.wait()
+            results[i] = batcher.encode(["x" * i, "y" * (i + 10)])
+
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(len(embedder.calls), 8)
+        self.assertEqual(sum(embedder.calls), 16)
+        for i, vectors in results.items():
+            # Each caller gets back its own rows, in order
+            np.testing.assert_array_equal(vectors[:, 0], [i, i + 10])
+
+    def test_full_batches_bypass_the_queue(self):
+        embedder = RecordingEmbedder()
+        batcher = DynamicBatcher(embedder, max_wait_ms=200, max_batch_size=4)
+        self.assertEqual(len(batcher.encode(["a"] * 10)), 10)
+        self.assertEqual((embedder.calls, batcher.batches), ([10], 0))
+
+    def test_options_bypass_the_queue(self):
+        class NormalizingEmbedder(RecordingEmbedder):
+            def encode(self, texts, batch_size=64, normalize_embeddings=False):
+                vectors = super().encode(texts, batch_size)
+                if normalize_embeddings:
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                return vectors
+
+        embedder = NormalizingEmbedder()
+        batcher = DynamicBatcher(embedder, max_wait_ms=200, max_batch_size=64)
+        vectors = batcher.encode(["abc"], normalize_embeddings=True)
+        self.assertAlmostEqual(float(np.linalg.norm(vectors[0])), 1.0, places=6)
+        self.assertEqual(batcher.batches, 0)
+
+    def test_single_string(self):
+        batcher = DynamicBatcher(RecordingEmbedder(), max_wait_ms=1)
+        vector = batcher.encode("abcd")
+        self.assertEqual(vector.shape, (2,))
+        self.assertEqual(vector[0], 4)
+
+    def test_errors_reach_the_caller(self):
+        class FailingEmbedder:
+            def encode(self, texts, batch_size=64):
+                raise RuntimeError("model crashed")
+
+        batcher = DynamicBatcher(FailingEmbedder(), max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.encode(["text"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from app.embeddings.cache import DiskEmbeddingStore, EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = EmbeddingCache("test-model", dimension=4)
+        self.assertEqual(cache.get_many(["what is rag?"]), [None])
+        cache.put_many(["what is rag?"], np.ones((1, 4)))
+        vector = cache.get_many(["  what is   rag? "])[0]  # Same normalized text
+        np.testing.assert_array_equal(vector, np.ones(4, dtype=np.float32))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_byte_size_eviction(self):
+        cache = EmbeddingCache("test-model", dimension=4, max_bytes=2 * 16)
+        cache.put_many(["a", "b", "c"], np.arange(12).reshape(3, 4))
+        self.assertEqual(cache.get_many(["a"]), [None])  # Least recently used
+        self.assertLessEqual(cache.stats()["bytes"], 32)
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            EmbeddingCache("test-model", 4, directory=directory).put_many(
+                ["persisted"], np.full((1, 4), 2.0)
+            )
+            cache = EmbeddingCache("test-model", 4, directory=directory)
+            np.testing.assert_array_equal(
+                cache.get_many(["persisted"])[0], np.full(4, 2.0, dtype=np.float32)
+            )
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            # Keys include the model name
+            other = EmbeddingCache("other-model", 4, directory=directory)
+            self.assertEqual(other.get_many(["persisted"]), [None])
+
+    def test_disk_tier_appends_only_new_keys(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = DiskEmbeddingStore(directory, 4)
+            store.put_many(["a", "b"], np.arange(8).reshape(2, 4))
+            # A key stored by another process, and a key repeated in the batch
+            store.put_many(["b", "c", "c"], np.full((3, 4), 9.0))
+            self.assertEqual(os.path.getsize(store.vectors_path), 3 * 16)
+            vectors = store.get_many(["a", "b", "c"])
+            np.testing.assert_array_equal(vectors["b"], np.arange(4, 8))
+            np.testing.assert_array_equal(vectors["c"], np.full(4, 9.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
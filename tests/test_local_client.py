@@ -0,0 +1,182 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.milvus_handler.local_client import LocalClient
+
+
+class HashingEmbedder:
+    """
+    Deterministic stand-in for SentenceTransformer: a bag of hashed words, so
+    texts sharing words are similar.
+    """
+
+    def encode(self, texts, batch_size=64):
+        vectors = np.zeros((len(texts), 384), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.md5(word.encode()).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % 384] += 1.0
+        return vectors
+
+
+DOCUMENTS = [
+    {
+        "title": "Transformers",
+        "author": "A",
+        "date": "01-02-2024",
+        "text": "attention layers power transformer language models",
+        "categories": ["NLP"],
+    },
+    {
+        "title": "Convolutions",
+        "author": "B",
+        "date": "2024-06-15",
+        "text": "convolutional filters detect edges in images",
+        "categories": ["Vision"],
+    },
+    {
+        "title": "Reinforcement",
+        "author": "C",
+        "date": "10-11-2023",
+        "text": "agents learn policies from rewards in environments",
+        "categories": ["RL", "NLP"],
+    },
+]
+
+
+class TestLocalClient(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = self._client()
+
+    def tearDown(self):
+        self.client.store.close()
+        self.directory.cleanup()
+
+    def _client(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            return LocalClient(
+                directory=self.directory.name,
+                collection_name="test_collection",
+                embedder=HashingEmbedder(),
+            )
+
+    def test_insert_search_and_skip_duplicates(self):
+        statuses = self.client.insert_many(DOCUMENTS + [DOCUMENTS[0]])
+        self.assertEqual(
+            [status["status"] for status in statuses],
+            ["success", "success", "success", "skipped"],
+        )
+        self.assertEqual(self.client.insert_many(DOCUMENTS[:1])[0]["status"], "skipped")
+        self.assertEqual(self.client.count_documents(), 3)
+
+        hits = self.client.search_similar("transformer language models", limit=2)
+        self.assertEqual(hits[0]["title"], "Transformers")
+        self.assertEqual(hits[0]["categories"], ["NLP"])
+        self.assertGreater(hits[0]["distance"], hits[1]["distance"])
+        self.assertTrue(self.client.contains_text(DOCUMENTS[1]["text"]))
+
+        sample = self.client.sample_texts(2)
+        self.assertEqual(len(sample), 2)
+        self.assertLessEqual(set(sample), {document["text"] for document in DOCUMENTS})
+
+    def test_filters_and_projection(self):
+        self.client.insert_many(DOCUMENTS)
+        hits = self.client.search_similar("models", category_filter="NLP", limit=5)
+        self.assertEqual(
+            {hit["title"] for hit in hits}, {"Transformers", "Reinforcement"}
+        )
+        hits = self.client.search_similar(
+            "models", limit=5, since="2024-01-01", projection="ids"
+        )
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(set(hits[0]), {"id", "distance"})
+        self.assertEqual(self.client.get_by_ids([1, 99], "light")[1], None)
+
+    def test_passages_grouped_by_document(self):
+        self.client.insert_many(DOCUMENTS)
+        results = self.client.search_passages(["edges in images"], limit=1)
+        self.assertEqual(len(results[0]), 1)
+        self.assertEqual(results[0][0]["title"], "Convolutions")
+        self.assertTrue(results[0][0]["passages"])
+
+    def test_passages_ready(self):
+        self.assertTrue(self.client.passages_ready())  # Nothing stored yet
+        unchunked = self._client(PASSAGE_CHUNKING="False")
+        unchunked.insert_many(DOCUMENTS[:1])
+        self.assertFalse(unchunked.passages_ready())
+        unchunked.store.close()
+
+        # Documents stored without passages keep retrieval on whole documents
+        chunked = self._client(PASSAGE_CHUNKING="True")
+        chunked.insert_many(DOCUMENTS[1:])
+        self.assertFalse(chunked.passages_ready())
+        chunked.store.close()
+
+    def test_near_duplicates(self):
+        self.client.insert_many(DOCUMENTS)
+        matches = self.client.check_many_existence(
+            [
+                "attention layers power transformer language models today",
+                "completely unrelated gardening advice",
+            ],
+            similarity_threshold=0.8,
+        )
+        self.assertEqual(matches[0]["title"], "Transformers")
+        self.assertIsNone(matches[1])
+
+    def test_reopen_and_ivf(self):
+        client = self._client(LOCAL_IVF_THRESHOLD="20", LOCAL_IVF_NPROBE="64")
+        documents = [
+            {
+                "title": f"Document {i}",
+                "author": "A",
+                "date": "01-01-2024",
+                "text": f"topic{i % 7} word{i} shared text",
+                "categories": ["AI"],
+            }
+            for i in range(40)
+        ]
+        client.insert_many(documents, batch_size=8)
+        self.assertIsNotNone(client._documents.centroids())
+        client.store.close()
+
+        # Probing every list is exact, and the files are reopened from disk
+        reopened = self._client(LOCAL_IVF_THRESHOLD="20", LOCAL_IVF_NPROBE="64")
+        self.assertEqual(reopened.count_documents(), 40)
+        hits = reopened.search_similar("topic3 word10 shared text", limit=1)
+        self.assertEqual(hits[0]["title"], "Document 10")
+        reopened.store.close()
+
+    def test_concurrent_writers_insert_once(self):
+        other = self._client()
+        real_lookup = other._existing_hashes
+        lookups = []
+
+        def racing_lookup(hashes):
+            # The other writer's first check ran before this client inserted
+            lookups.append(hashes)
+            return set() if len(lookups) == 1 else real_lookup(hashes)
+
+        self.client.insert_many(DOCUMENTS[:1])
+        with mock.patch.object(other, "_existing_hashes", side_effect=racing_lookup):
+            statuses = other.insert_many(DOCUMENTS[:1])
+        other.store.close()
+        self.assertEqual(statuses[0]["status"], "skipped")
+        self.assertEqual(self.client.count_documents(), 1)
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.client.store.execute(
+                "INSERT INTO documents (id, content_hash) "
+                "SELECT 99, content_hash FROM documents"
+            )
+        self.client.store.rollback()
+
+
+if __name__ == "__main__":
+    unittest.main()
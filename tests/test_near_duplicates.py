@@ -0,0 +1,25 @@
+import unittest
+
+import numpy as np
+from app.milvus_handler.near_duplicates import RecentVectorCache
+
+
+class TestRecentVectorCache(unittest.TestCase):
+    def test_ring_keeps_the_last_vectors(self):
+        cache = RecentVectorCache(capacity=2, dimension=3)
+        cache.add(np.eye(3), [{"title": str(i)} for i in range(3)])
+        similarity, document = cache.match(np.eye(3)[[2]])[0]
+        self.assertAlmostEqual(similarity, 1.0)
+        self.assertEqual(document["title"], "2")
+        # The first vector was overwritten
+        similarity, _ = cache.match(np.eye(3)[[0]])[0]
+        self.assertAlmostEqual(similarity, 0.0)
+
+    def test_disabled(self):
+        cache = RecentVectorCache(capacity=0, dimension=3)
+        cache.add(np.eye(3), [{"title": str(i)} for i in range(3)])
+        self.assertEqual(cache.match(np.eye(3)), [None, None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
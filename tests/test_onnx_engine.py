@@ -0,0 +1,83 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.embeddings.generator import DEFAULT_MODEL
+
+HAS_ONNX = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("onnxruntime", "torch", "sentence_transformers")
+)
+TEXTS = [
+    "Transformers use attention to model long-range dependencies.",
+    "Milvus stores vector embeddings for similarity search.",
+    "short",
+    "Quantization reduces model size and speeds up CPU inference " * 40,
+]
+
+
+@unittest.skipUnless(HAS_ONNX, "onnxruntime, torch and sentence-transformers needed")
+class TestOnnxEmbedder(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from sentence_transformers import SentenceTransformer
+
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.reference = SentenceTransformer(DEFAULT_MODEL, device="cpu").encode(
+            TEXTS, normalize_embeddings=True
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def assert_parity(self, quantize, tolerance):
+        from app.embeddings.onnx_engine import OnnxEmbedder
+
+        embedder = OnnxEmbedder(DEFAULT_MODEL, self.directory.name, quantize=quantize)
+        vectors = embedder.encode(TEXTS, batch_size=3)
+        self.assertEqual(vectors.shape, self.reference.shape)
+        cosines = np.sum(vectors * self.reference, axis=1)
+        self.assertGreaterEqual(cosines.min(), 1 - tolerance, cosines)
+
+    def test_float_parity(self):
+        self.assert_parity(quantize=False, tolerance=1e-4)
+
+    def test_int8_parity(self):
+        self.assert_parity(quantize=True, tolerance=0.02)
+
+    def test_serving_an_export_needs_no_torch(self):
+        from app.embeddings.onnx_engine import OnnxEmbedder
+
+        OnnxEmbedder(DEFAULT_MODEL, self.directory.name)
+        blocked = {"torch": None, "sentence_transformers": None}
+        with mock.patch.dict(sys.modules, blocked):
+            embedder = OnnxEmbedder(DEFAULT_MODEL, self.directory.name)
+            self.assertEqual(embedder.encode(TEXTS[:1]).shape, self.reference[:1].shape)
+
+    def test_single_string_and_options(self):
+        from app.embeddings.onnx_engine import OnnxEmbedder
+
+        embedder = OnnxEmbedder(DEFAULT_MODEL, self.directory.name)
+        vector = embedder.encode(TEXTS[0], normalize_embeddings=True)
+        self.assertEqual(vector.shape, self.reference[0].shape)
+        self.assertGreaterEqual(float(vector @ self.reference[0]), 1 - 1e-4)
+
+        embedder.normalize = False  # Like a model without a Normalize module
+        raw = embedder.encode(TEXTS[:2])
+        normalized = embedder.encode(TEXTS[:2], normalize_embeddings=True)
+        self.assertTrue(np.allclose(np.linalg.norm(normalized, axis=1), 1, atol=1e-5))
+        self.assertTrue(
+            np.allclose(
+                normalized, raw / np.linalg.norm(raw, axis=1, keepdims=True), atol=1e-5
+            )
+        )
+        with self.assertRaises(TypeError):
+            embedder.encode(TEXTS, output_value="token_embeddings")
+
+
+if __name__ == "__main__":
+    unittest.main()
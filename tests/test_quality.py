@@ -0,0 +1,79 @@
+import unittest
+from app.cleaner.quality import QualityGate
+
+ARTICLE = (
+    "Transformers have changed the way we build language models. The attention "
+    "mechanism lets each token look at every other token in the sequence, which "
+    "is why these models capture long-range dependencies so well. In this post "
+    "we walk through the architecture, explain how the encoder and the decoder "
+    "work together, and show how to fine-tune a pretrained model on a small "
+    "dataset. By the end you will have a classifier that runs on a laptop and "
+    "is accurate enough for most practical text classification tasks."
+)
+
+
+class TestQualityGate(unittest.TestCase):
+    def setUp(self):
+        self.gate = QualityGate(min_words=50, languages=["en"])
+
+    def test_article_passes(self):
+        self.assertIsNone(self.gate.check(ARTICLE))
+        self.assertEqual(sum(self.gate.rejections.values()), 0)
+
+    def test_empty_and_short(self):
+        self.assertEqual(self.gate.check(""), "empty")
+        self.assertEqual(self.gate.check("   "), "empty")
+        self.assertEqual(self.gate.check("Read more on our site."), "too_short")
+
+    def test_boilerplate(self):
+        banner = (
+            "We use cookies to improve your experience. Accept all cookies or "
+            "read our privacy policy to learn more about how we use them. "
+            "Subscribe to our newsletter to get the latest stories in your inbox. "
+            "Sign in or create a free account to continue reading this story "
+            "and all the others in our archive. "
+        ) * 2
+        self.assertEqual(self.gate.check(banner), "boilerplate")
+
+    def test_boilerplate_words_inside_prose(self):
+        article = (
+            "The catalog in this post lists every model we tested. A dialog in the "
+            "app lets users pick one. Our blog in Portuguese covers the same ideas. "
+            "Each subscriber to the event stream gets the cookies from the recipe "
+            "dataset, which has two thousand chocolate chip cookie recipes. "
+            "We log every request, and the JavaScript client batches them. "
+        ) * 2
+        self.assertIsNone(self.gate.check(article))
+
+    def test_gibberish(self):
+        markup = " ".join(['{"id": 123, "x": [0.5, 1.2]}'] * 60)
+        self.assertEqual(self.gate.check(markup), "gibberish")
+        words = " ".join(f"qzx{chr(97 + i % 26)}vbn wrtplk" for i in range(60))
+        self.assertEqual(self.gate.check(words), "gibberish")
+
+    def test_repetitive(self):
+        self.assertEqual(self.gate.check("buy now " * 100), "repetitive")
+
+    def test_language(self):
+        portuguese = (
+            "O aprendizado de máquina é uma área da inteligência artificial que "
+            "estuda algoritmos capazes de aprender com os dados. Nos últimos anos, "
+            "os modelos de linguagem se tornaram muito populares, e hoje são usados "
+            "em tradutores, assistentes e sistemas de busca. Neste artigo, vamos "
+            "mostrar como treinar um modelo simples para classificar textos e como "
+            "avaliar o seu desempenho em um conjunto de dados pequeno."
+        )
+        self.assertEqual(
+            QualityGate.detect_language(portuguese.lower().split())[0], "pt"
+        )
+        self.assertEqual(self.gate.check(portuguese), "language")
+        self.assertIsNone(QualityGate(languages=["en", "pt"]).check(portuguese))
+
+    def test_rejections_are_counted_by_reason(self):
+        for text in ["", "", "Too short."]:
+            self.gate.check(text)
+        self.assertEqual(dict(self.gate.rejections), {"empty": 2, "too_short": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
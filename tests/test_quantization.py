@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+from app.milvus_handler.index_config import IndexConfig
+from app.milvus_handler.near_duplicates import normalize
+from app.milvus_handler.quantization import binarize, quantize_int8, rerank
+
+
+class TestQuantization(unittest.TestCase):
+    def test_binarize_packs_sign_bits(self):
+        vector = np.full(16, -0.5)
+        vector[[0, 9]] = 0.5
+        (bits,) = binarize([vector])
+        self.assertEqual(bits, bytes([0b10000000, 0b01000000]))
+        self.assertEqual(len(binarize(np.ones((2, 384)))[0]), 48)
+
+    def test_int8_round_trip(self):
+        vectors = normalize(np.random.default_rng(0).normal(size=(10, 384)))
+        codes, scales = quantize_int8(vectors)
+        self.assertEqual(codes.dtype, np.int8)
+        np.testing.assert_allclose(codes * scales, vectors, atol=scales.max())
+
+    def test_rerank_orders_by_exact_similarity(self):
+        vectors = {1: [1.0, 0.0], 2: [0.6, 0.8], 3: [0.0, 1.0]}
+        query = normalize([[0.0, 1.0]])
+        # Candidate 7 has no stored vector (deleted since the first pass)
+        results = rerank(query, [[1, 2, 3, 7]], vectors, limit=2)
+        self.assertEqual([hit for hit, _ in results[0]], [3, 2])
+        self.assertAlmostEqual(results[0][1][1], 0.8, places=5)
+
+    def test_distance_inverts_similarity(self):
+        for metric in ("COSINE", "IP", "L2"):
+            config = IndexConfig("FLAT", metric)
+            self.assertAlmostEqual(config.similarity(config.distance(0.7)), 0.7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from app.milvus_handler.index_config import IndexConfig
+from app.milvus_handler.tuner import (
+    SAMPLE_SCAN_FACTOR,
+    SearchTuner,
+    TuningStore,
+    exact_top_k,
+    recall_at_k,
+)
+
+
+class FakeIterator:
+    def __init__(self, ids, batch_size):
+        self.batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+
+    def next(self):
+        return [{"id": i} for i in self.batches.pop(0)] if self.batches else []
+
+    def close(self):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def query_iterator(self, batch_size, limit=-1, **kwargs):
+        ids = list(range(self.documents if limit < 0 else min(limit, self.documents)))
+        return FakeIterator(ids, batch_size)
+
+
+class TestSearchTuner(unittest.TestCase):
+    def test_exact_top_k_streams_and_excludes_queries(self):
+        rng = np.random.default_rng(0)
+        corpus = rng.normal(size=(50, 8)).astype(np.float32)
+        ids = np.arange(50)
+        chunks = [(ids[:20], corpus[:20]), (ids[20:], corpus[20:])]
+        top = exact_top_k(chunks, corpus[[3, 30]], 5, exclude_ids=[3, 30])
+
+        normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        for row, query_id in zip(top, [3, 30]):
+            scores = normalized @ normalized[query_id]
+            scores[query_id] = -np.inf
+            self.assertEqual(set(row), set(np.argsort(-scores)[:5]))
+
+    def test_recall_at_k(self):
+        self.assertEqual(recall_at_k([[1, 2], [3, 9]], [[1, 2], [3, 4]]), 0.75)
+
+    def test_candidates(self):
+        tuner = SearchTuner(k=10)
+        ivf = IndexConfig("IVF_FLAT", build_params={"nlist": 100})
+        self.assertEqual(tuner.candidates(ivf), [1, 2, 4, 8, 16, 32, 64, 100])
+        self.assertEqual(tuner.candidates(IndexConfig("HNSW"))[0], 11)
+        self.assertEqual(tuner.candidates(IndexConfig("FLAT")), [])
+
+    def test_staleness(self):
+        tuner = SearchTuner(growth_factor=2.0, min_documents=1000)
+        hnsw = IndexConfig("HNSW", "COSINE")
+        record = {
+            "index_type": "HNSW",
+            "metric_type": "COSINE",
+            "k": 10,
+            "recall_target": 0.95,
+            "documents": 5000,
+        }
+        self.assertFalse(tuner.is_stale(None, hnsw, 500))  # Too small to tune
+        self.assertTrue(tuner.is_stale(None, hnsw, 1500))
+        self.assertFalse(tuner.is_stale(record, hnsw, 9999))
+        self.assertTrue(tuner.is_stale(record, hnsw, 10000))
+        self.assertTrue(tuner.is_stale(record, IndexConfig("IVF_FLAT"), 5000))
+        self.assertEqual(tuner.next_check(record), 10000)
+
+    def test_tuning_is_opt_in(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(SearchTuner.from_env())
+        with mock.patch.dict(os.environ, {"SEARCH_TUNING": "True"}):
+            self.assertIsInstance(SearchTuner.from_env(), SearchTuner)
+
+    def test_sampled_ids_come_from_a_bounded_scan(self):
+        tuner = SearchTuner(sample_size=20)
+        ids = tuner._sample_ids(FakeCollection(100000), batch_size=1000)
+        self.assertEqual(len(set(ids)), 20)
+        self.assertLess(max(ids), 20 * SAMPLE_SCAN_FACTOR)
+        self.assertEqual(len(tuner._sample_ids(FakeCollection(5), batch_size=1000)), 5)
+
+    def test_store_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = TuningStore(os.path.join(directory, "tuning.json"))
+            store.put("a", {"value": 16})
+            store.put("b", {"value": 64})
+            store.discard("a")
+            self.assertIsNone(store.get("a"))
+            self.assertEqual(store.get("b"), {"value": 64})
+
+
+if __name__ == "__main__":
+    unittest.main()
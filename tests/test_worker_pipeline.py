@@ -0,0 +1,207 @@
+import importlib.util
+import threading
+import time
+import unittest
+
+import numpy as np
+from app.worker.context import JobBatch
+from app.worker.pipeline import InFlightDocuments, Stage, StagedPipeline
+
+HAS_WORKER_DEPS = all(
+    importlib.util.find_spec(module) is not None for module in ("redis", "transformers")
+)
+
+
+class Item:
+    def __init__(self, number):
+        self.number = number
+        self.trace = []
+        self.error = None
+
+
+class TestStagedPipeline(unittest.TestCase):
+    def test_items_go_through_every_stage_in_order(self):
+        done = []
+        pipeline = StagedPipeline(
+            [
+                Stage("a", lambda item: item.trace.append("a")),
+                Stage("b", lambda item: item.trace.append("b"), threads=3),
+                Stage("done", done.append),
+            ]
+        )
+        for number in range(10):
+            pipeline.submit(Item(number))
+        pipeline.close()
+
+        self.assertEqual(sorted(item.number for item in done), list(range(10)))
+        self.assertTrue(all(item.trace == ["a", "b"] for item in done))
+        self.assertEqual(pipeline.stats()["b"]["items"], 10)
+
+    def test_stages_overlap(self):
+        running = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def work(name):
+            def run(item):
+                with lock:
+                    running.add(name)
+                    if len(running) > 1:
+                        overlapped.set()
+                time.sleep(0.05)
+                with lock:
+                    running.discard(name)
+
+            return run
+
+        pipeline = StagedPipeline([Stage("a", work("a")), Stage("b", work("b"))])
+        for number in range(4):
+            pipeline.submit(Item(number))
+        pipeline.close()
+        self.assertTrue(overlapped.is_set())
+
+    def test_failed_items_skip_to_always_stages(self):
+        def fail(item):
+            if item.number == 1:
+                raise ValueError("boom")
+
+        finished = []
+        pipeline = StagedPipeline(
+            [
+                Stage("fail", fail),
+                Stage("after", lambda item: item.trace.append("after")),
+                Stage("finish", finished.append, always=True),
+            ]
+        )
+        for number in range(3):
+            pipeline.submit(Item(number))
+        pipeline.close()
+
+        by_number = {item.number: item for item in finished}
+        self.assertIsInstance(by_number[1].error, ValueError)
+        self.assertEqual(by_number[1].trace, [])
+        self.assertEqual(by_number[0].trace, ["after"])
+
+
+class TestInFlightDocuments(unittest.TestCase):
+    def test_hashes_of_other_batches_are_known(self):
+        in_flight = InFlightDocuments()
+        self.assertEqual(
+            in_flight.register_hashes(1, ["a", "b"], [False, True]), [False, True]
+        )
+        self.assertEqual(
+            in_flight.register_hashes(2, ["a", "b", "c"], [False] * 3),
+            [True, False, False],
+        )
+        in_flight.release(1)
+        self.assertEqual(in_flight.register_hashes(3, ["a"], [False]), [False])
+
+    def test_vectors_of_other_batches_match(self):
+        in_flight = InFlightDocuments()
+        vectors = np.eye(3, dtype=np.float32)
+        in_flight.register_vectors(
+            1, vectors[:2], [{"title": "x"}, {"title": "y"}], [None, None], 0.9
+        )
+        matches = in_flight.register_vectors(
+            2, vectors[1:], [{"title": "y2"}, {"title": "z"}], [None, None], 0.9
+        )
+        self.assertEqual(matches[0]["title"], "y")
+        self.assertIsNone(matches[1])
+
+        in_flight.release(1)
+        matches = in_flight.register_vectors(
+            3, vectors[:1], [{"title": "x2"}], [None], 0.9
+        )
+        self.assertEqual(matches, [None])
+
+
+class FakeCleaner:
+    def clean_text(self, text):
+        return text
+
+
+class FakeCategorizer:
+    def categorize_many(self, texts, categories, **kwargs):
+        return [[categories[0]] for _ in texts]
+
+
+class FakeMilvus:
+    """
+    Embeds each text as a one-hot vector of the length of its first word, so
+    "alpha one" and "alpha two" are near duplicates.
+    """
+
+    def __init__(self, fail_inserts=False):
+        self.inserted = []
+        self.fail_inserts = fail_inserts
+
+    def contains_texts(self, texts, hashes=None):
+        stored = {document["content_hash"] for document in self.inserted}
+        return [h in stored for h in hashes]
+
+    def embed_texts(self, texts):
+        vectors = np.zeros((len(texts), 8), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, len(text.split()[0]) % 8] = 1
+        return vectors
+
+    def check_many_existence(self, similarity_threshold, vectors):
+        stored = self.embed_texts([document["text"] for document in self.inserted])
+        return [
+            next(
+                (d for d, v in zip(self.inserted, stored) if v @ vector > 0.9),
+                None,
+            )
+            for vector in vectors
+        ]
+
+    def insert_many(self, documents, vectors=None):
+        if self.fail_inserts:
+            raise RuntimeError("Milvus down")
+        self.inserted.extend(documents)
+        return [{"status": "success"}] * len(documents)
+
+
+class FakeStream:
+    def __init__(self):
+        self.acked = []
+
+    def ack(self, entry_ids):
+        self.acked.extend(entry_ids)
+
+
+def job(text):
+    return {"title": text, "author": "A", "date": "01-01-2024", "text": text}
+
+
+@unittest.skipUnless(HAS_WORKER_DEPS, "redis and transformers needed")
+class TestWorkerPipeline(unittest.TestCase):
+    def run_batches(self, milvus, batches):
+        from app.worker.worker import build_pipeline
+
+        stream = FakeStream()
+        pipeline = build_pipeline(FakeCleaner(), FakeCategorizer(), milvus, stream)
+        for number, texts in enumerate(batches):
+            entry_ids = [f"{number}-{i}" for i in range(len(texts))]
+            pipeline.submit(JobBatch([job(text) for text in texts], entry_ids))
+        pipeline.close()
+        return stream
+
+    def test_duplicates_across_batches_are_inserted_once(self):
+        milvus = FakeMilvus()
+        stream = self.run_batches(
+            milvus, [["alpha one", "beta one"], ["alpha one", "alpha two"]]
+        )
+        self.assertEqual(
+            sorted(document["title"] for document in milvus.inserted),
+            ["alpha one", "beta one"],
+        )
+        self.assertEqual(sorted(stream.acked), ["0-0", "0-1", "1-0", "1-1"])
+
+    def test_failed_inserts_are_not_acked(self):
+        stream = self.run_batches(FakeMilvus(fail_inserts=True), [["alpha one"]])
+        self.assertEqual(stream.acked, [])
+
+
+if __name__ == "__main__":
+    unittest.main()